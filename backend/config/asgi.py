@@ -2,6 +2,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections to ``/ws/chat/`` go to the
+real-time chat gateway (see ``matching.gateway``). Serve it with an ASGI
+server, e.g. ``gunicorn -k uvicorn.workers.UvicornWorker config.asgi:application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -15,4 +18,20 @@ from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application: ASGIHandler = get_asgi_application()
+django_application: ASGIHandler = get_asgi_application()
+
+# Imported after Django is set up, since the gateway uses models
+from matching.gateway import ChatGateway, Receive, Scope, Send  # noqa: E402
+
+chat_gateway = ChatGateway()
+
+
+async def application(scope: Scope, receive: Receive, send: Send) -> None:
+    if scope["type"] == "websocket":
+        if scope["path"].rstrip("/") == "/ws/chat":
+            await chat_gateway(scope, receive, send)
+        else:
+            await receive()  # websocket.connect
+            await send({"type": "websocket.close"})
+        return
+    await django_application(scope, receive, send)
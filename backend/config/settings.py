@@ -300,6 +300,48 @@ SOCIAL_AUTH_USER_MODEL: str = "users.User"
 
 OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+# Point at any OpenAI-compatible server, e.g. a local stub for load tests
+OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL", "")
+OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "20"))
+OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+
+# In-flight AI requests per worker process, and how long a request may wait
+# for a free slot before failing
+AI_MAX_CONCURRENCY: int = int(os.getenv("AI_MAX_CONCURRENCY", "8"))
+AI_QUEUE_TIMEOUT: float = float(os.getenv("AI_QUEUE_TIMEOUT", "5"))
+
+# Seconds each endpoint's AI call may take in total (a streamed one included)
+# before it gives up and the endpoint serves its fallback
+AI_LATENCY_BUDGETS: dict[str, float] = {
+    "suggestions": float(os.getenv("AI_SUGGESTIONS_BUDGET", "6")),
+    "summary": float(os.getenv("AI_SUMMARY_BUDGET", "10")),
+    "mock_reply": float(os.getenv("AI_MOCK_REPLY_BUDGET", "20")),
+}
+
+# Circuit breaker: after AI_BREAKER_THRESHOLD failures within
+# AI_BREAKER_WINDOW seconds, AI calls fail fast for AI_BREAKER_COOLDOWN seconds
+AI_BREAKER_THRESHOLD: int = int(os.getenv("AI_BREAKER_THRESHOLD", "5"))
+AI_BREAKER_WINDOW: int = int(os.getenv("AI_BREAKER_WINDOW", "60"))
+AI_BREAKER_COOLDOWN: int = int(os.getenv("AI_BREAKER_COOLDOWN", "30"))
+
+# Opt-in: generate reply suggestions in the background when a message arrives
+# for a user who used suggestions within SPECULATIVE_SUGGESTIONS_RECENCY
+# seconds, at most SPECULATIVE_SUGGESTIONS_DAILY_BUDGET times per user per day
+AI_SPECULATIVE_SUGGESTIONS: bool = os.getenv("AI_SPECULATIVE_SUGGESTIONS", "False").lower() == "true"
+SPECULATIVE_SUGGESTIONS_RECENCY: int = int(os.getenv("SPECULATIVE_SUGGESTIONS_RECENCY", "1800"))
+SPECULATIVE_SUGGESTIONS_DAILY_BUDGET: int = int(os.getenv("SPECULATIVE_SUGGESTIONS_DAILY_BUDGET", "50"))
+
+# Opt-in: mock users open each new match with a greeting, taken from a pool
+# of pre-generated greetings (see matching.greetings). A pool at or below the
+# low-water mark is refilled in the background
+MOCK_GREETINGS: bool = os.getenv("MOCK_GREETINGS", "False").lower() == "true"
+GREETING_POOL_SIZE: int = int(os.getenv("GREETING_POOL_SIZE", "10"))
+GREETING_POOL_LOW_WATER: int = int(os.getenv("GREETING_POOL_LOW_WATER", "3"))
+
+# Token budget for the recent chat turns sent with each AI prompt; older turns
+# are replaced by a rolling summary (counted with tiktoken)
+AI_CONTEXT_TOKEN_BUDGET: int = int(os.getenv("AI_CONTEXT_TOKEN_BUDGET", "1200"))
+
 # Also expose Facebook credentials without the SOCIAL_AUTH prefix for our custom views
 FACEBOOK_APP_ID: str = os.getenv("FACEBOOK_APP_ID", "")
 FACEBOOK_APP_SECRET: str = os.getenv("FACEBOOK_APP_SECRET", "")
@@ -322,6 +364,95 @@ if os.getenv("CLOUDINARY_CLOUD_NAME"):
     DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
 
 
+# =============================================================================
+# Caches
+# =============================================================================
+
+# CACHE_BACKEND picks the shared cache every worker reads and writes:
+#   locmem - per process; fine for runserver and tests only
+#   file   - a directory on one machine; development only, since add() and
+#            incr() are not atomic across processes (locks, breaker counts,
+#            budgets) and culling drops a random third of all entries
+#   db     - the database's cache table (production default without
+#            REDIS_URL; the release step runs ``manage.py createcachetable``).
+#            add() is atomic, incr() is not, so breaker failure counts and
+#            suggestion budgets may run slightly over under heavy concurrency
+#   redis  - a Redis-protocol server (production default with REDIS_URL;
+#            needs redis-py); add() and incr() are both atomic
+CACHE_BACKEND: str = os.getenv(
+    "CACHE_BACKEND", "locmem" if DEBUG else ("redis" if os.getenv("REDIS_URL") else "db")
+)
+CACHE_LOCATION: str = os.getenv("CACHE_LOCATION", "")
+
+
+def _cache_config(alias: str) -> dict[str, Any]:
+    if CACHE_BACKEND == "file":
+        return {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.path.join(CACHE_LOCATION or str(BASE_DIR / ".cache"), alias),
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    if CACHE_BACKEND == "db":
+        return {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": CACHE_LOCATION or "django_cache",
+            "KEY_PREFIX": alias,
+            "OPTIONS": {"MAX_ENTRIES": 10000},
+        }
+    if CACHE_BACKEND == "redis":
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_LOCATION or os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            "KEY_PREFIX": alias,
+        }
+    return {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": alias,
+    }
+
+
+CACHES: dict[str, dict[str, Any]] = {
+    # Profile cards, taxonomy and profile version tokens
+    "default": _cache_config("default"),
+    # Typing flags, online state and presence maps: small, hot and short-lived
+    "presence": _cache_config("presence"),
+}
+
+
+# =============================================================================
+# Real-time chat (WebSocket gateway in config/asgi.py)
+# =============================================================================
+
+# Channel layer class. The in-memory layer only reaches sockets on the same
+# process (fine for runserver); the database layer relays events between web
+# workers and ``manage.py run_jobs`` and is the production default.
+REALTIME_CHANNEL_LAYER: str = os.getenv(
+    "REALTIME_CHANNEL_LAYER",
+    "matching.realtime.InMemoryChannelLayer" if DEBUG else "matching.realtime.DatabaseChannelLayer",
+)
+
+
+# =============================================================================
+# Delta sync (matching.sync)
+# =============================================================================
+
+# Days of change log kept for /api/sync/; ``manage.py prune_change_log``
+# removes older entries and clients holding older tokens get a reset
+CHANGELOG_RETENTION_DAYS: int = int(os.getenv("CHANGELOG_RETENTION_DAYS", "30"))
+
+
+# =============================================================================
+# Background jobs (matching.jobs)
+# =============================================================================
+
+# Run queued jobs on a daemon thread in each web worker. Disable when a
+# dedicated ``manage.py run_jobs`` process is used instead.
+BACKGROUND_JOBS_IN_PROCESS: bool = os.getenv("BACKGROUND_JOBS_IN_PROCESS", "True").lower() == "true"
+
+# Delay mock-user replies according to their profile's response_pace
+MOCK_REPLY_HONOR_PACE: bool = os.getenv("MOCK_REPLY_HONOR_PACE", "False").lower() == "true"
+
+
 # =============================================================================
 # Logging Configuration
 # =============================================================================
@@ -3,13 +3,13 @@ from __future__ import annotations
 from typing import Any
 
 from django.contrib import admin, messages
-from django.db.models import Q, QuerySet
+from django.db.models import F, Q, QuerySet
 from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
 from django.template.response import TemplateResponse
 from django.urls import path, reverse
 from django.utils.html import format_html
 
-from .models import Block, Conversation, Match, Message, Swipe
+from .models import BackgroundJob, Block, Conversation, Match, Message, Swipe
 from .support import SUPPORT_USERNAME
 
 
@@ -22,6 +22,37 @@ def _get_support_user():  # type: ignore[no-untyped-def]
     return User.objects.filter(username=SUPPORT_USERNAME).first()
 
 
+# A message is read once it is at or below the recipient's read watermark
+READ_BY_RECIPIENT = Q(
+    sender_id=F("conversation__match__user1_id"),
+    id__lte=F("conversation__user2_last_read_id"),
+) | Q(
+    sender_id=F("conversation__match__user2_id"),
+    id__lte=F("conversation__user1_last_read_id"),
+)
+
+
+def _read_by_recipient(obj: Message) -> bool:
+    watermark = obj.conversation.read_watermarks().get(obj.sender_id)
+    last_read_id = watermark[0] if watermark else None
+    return last_read_id is not None and obj.id <= last_read_id
+
+
+class ReadListFilter(admin.SimpleListFilter):
+    title = "read"
+    parameter_name = "read"
+
+    def lookups(self, request: HttpRequest, model_admin: Any) -> list[tuple[str, str]]:
+        return [("yes", "Yes"), ("no", "No")]
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet[Any]) -> QuerySet[Any]:
+        if self.value() == "yes":
+            return queryset.filter(READ_BY_RECIPIENT)
+        if self.value() == "no":
+            return queryset.exclude(READ_BY_RECIPIENT)
+        return queryset
+
+
 # ---------------------------------------------------------------------------
 # Custom admin action
 # ---------------------------------------------------------------------------
@@ -57,6 +88,7 @@ class SwipeAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     list_filter = ["action", "created_at"]
     search_fields = ["from_user__username", "to_user__username"]
     date_hierarchy = "created_at"
+    ordering = ["-created_at"]
     actions = [clear_all_matching_data]
 
 
@@ -77,6 +109,7 @@ class MatchAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     list_filter = ["is_active", "matched_at"]
     search_fields = ["user1__username", "user2__username"]
     date_hierarchy = "matched_at"
+    ordering = ["-matched_at"]
     actions = [clear_all_matching_data]
 
     change_list_template = "admin/matching/match/change_list.html"
@@ -118,9 +151,17 @@ class MatchAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
 class MessageInline(admin.TabularInline):  # type: ignore[type-arg]
     model = Message
     extra = 0
-    readonly_fields = ["sender", "content", "sent_at", "is_read"]
+    readonly_fields = ["sender", "content", "sent_at", "read"]
+    ordering = ["sent_at"]
     can_delete = False
 
+    def get_queryset(self, request: HttpRequest) -> QuerySet[Message]:
+        return super().get_queryset(request).select_related("conversation__match")
+
+    def read(self, obj: Message) -> bool:
+        return _read_by_recipient(obj)
+    read.boolean = True  # type: ignore[attr-defined]
+
 
 # ---------------------------------------------------------------------------
 # Conversation — with support-reply functionality
@@ -188,7 +229,7 @@ class ConversationAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     message_count.short_description = "Messages"  # type: ignore[attr-defined]
 
     def last_message_preview(self, obj: Conversation) -> str:
-        last = obj.messages.order_by("-sent_at").first()
+        last = obj.last_message
         if not last:
             return "-"
         prefix = "You" if last.sender.username == SUPPORT_USERNAME else last.sender.username
@@ -215,6 +256,8 @@ class ConversationAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
             "match__user2",
             "match__user1__profile",
             "match__user2__profile",
+            "last_message",
+            "last_message__sender",
         )
 
     # -- reply view -----------------------------------------------------------
@@ -256,7 +299,6 @@ class ConversationAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
                     sender=support_user,
                     content=content,
                 )
-                conversation.save()
                 messages.success(request, f"Reply sent to {other_name}.")
                 return HttpResponseRedirect(
                     reverse("admin:matching_conversation_reply", args=[conversation_id])
@@ -296,12 +338,14 @@ class MessageAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         "conversation",
         "short_content",
         "message_type",
-        "is_read",
+        "read",
         "sent_at",
     ]
-    list_filter = ["message_type", "is_read", "sent_at"]
+    list_filter = ["message_type", ReadListFilter, "sent_at"]
+    list_select_related = ["conversation__match"]
     search_fields = ["content", "sender__username"]
     date_hierarchy = "sent_at"
+    ordering = ["-sent_at"]
 
     def short_content(self, obj: Message) -> str:
         if len(obj.content) > 80:
@@ -309,6 +353,10 @@ class MessageAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
         return obj.content
     short_content.short_description = "Content"  # type: ignore[attr-defined]
 
+    def read(self, obj: Message) -> bool:
+        return _read_by_recipient(obj)
+    read.boolean = True  # type: ignore[attr-defined]
+
 
 # ---------------------------------------------------------------------------
 # Block
@@ -319,3 +367,15 @@ class BlockAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
     list_display = ["blocker", "blocked", "reason", "created_at"]
     list_filter = ["reason", "created_at"]
     search_fields = ["blocker__username", "blocked__username"]
+
+
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+@admin.register(BackgroundJob)
+class BackgroundJobAdmin(admin.ModelAdmin):  # type: ignore[type-arg]
+    list_display = ["kind", "status", "attempts", "run_after", "created_at"]
+    list_filter = ["kind", "status"]
+    readonly_fields = ["locked_at", "last_error", "created_at", "updated_at"]
+    ordering = ["-created_at"]
@@ -0,0 +1,223 @@
+"""
+Process-wide OpenAI client.
+
+Every AI call in the process goes through one ``OpenAI`` instance, so its
+HTTP connection pool (and the TLS sessions in it) is reused instead of being
+set up per request. ``chat_completion`` also caps how many requests a worker
+process has in flight at once (``AI_MAX_CONCURRENCY``); callers that cannot
+get a slot within ``AI_QUEUE_TIMEOUT`` seconds fail fast with ``AIBusyError``
+rather than piling up behind a slow upstream. ``stream_chat_completion``
+does the same for streamed completions.
+
+Calls can carry a latency budget (``AI_LATENCY_BUDGETS``, per endpoint),
+and are refused with ``AIUnavailableError`` while the circuit breaker in
+``matching.circuit_breaker`` is open.
+
+``OPENAI_BASE_URL`` points the client at any OpenAI-compatible server, e.g.
+a local stub for load tests.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+
+from .circuit_breaker import breaker_open, record_failure, record_success
+from .telemetry import track_ai_call
+
+
+class AIBusyError(RuntimeError):
+    """All of this worker's AI request slots stayed busy for AI_QUEUE_TIMEOUT."""
+
+
+class AIUnavailableError(RuntimeError):
+    """The circuit breaker is open, so AI calls fail fast."""
+
+
+_lock = threading.Lock()
+_client: Any = None
+_semaphore: Optional[threading.BoundedSemaphore] = None
+_config: Optional[tuple[Any, ...]] = None
+
+# Cleared when the server rejects ``stream_options`` (older OpenAI-compatible servers)
+_stream_usage = True
+
+
+def _current_config() -> tuple[Any, ...]:
+    return (
+        getattr(settings, "OPENAI_API_KEY", ""),
+        getattr(settings, "OPENAI_BASE_URL", "") or None,
+        getattr(settings, "OPENAI_TIMEOUT", 20.0),
+        getattr(settings, "OPENAI_MAX_RETRIES", 2),
+        getattr(settings, "AI_MAX_CONCURRENCY", 8),
+    )
+
+
+def _ensure_client() -> tuple[Any, threading.BoundedSemaphore]:
+    global _client, _semaphore, _config
+    config = _current_config()
+    with _lock:
+        if _client is None or _semaphore is None or config != _config:
+            api_key, base_url, timeout, max_retries, concurrency = config
+            if not api_key:
+                raise ValueError("OpenAI API key not configured")
+            from openai import OpenAI
+
+            _client = OpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                max_retries=max_retries,
+            )
+            _semaphore = threading.BoundedSemaphore(concurrency)
+            _config = config
+        return _client, _semaphore
+
+
+def get_client() -> Any:
+    """The shared ``OpenAI`` client for the current settings."""
+    client, _ = _ensure_client()
+    return client
+
+
+def latency_budget(endpoint: str) -> Optional[float]:
+    """Seconds an ``endpoint``'s AI call may take (``AI_LATENCY_BUDGETS``)."""
+    budgets: dict[str, float] = getattr(settings, "AI_LATENCY_BUDGETS", {})
+    return budgets.get(endpoint)
+
+
+@contextmanager
+def ai_slot(timeout: Optional[float] = None) -> Iterator[Any]:
+    """
+    Hold one of this worker's AI request slots; yields the shared client.
+
+    With ``timeout`` (a latency budget) the client makes a single attempt
+    bounded by it, and the wait for a slot counts against it too.
+    """
+    client, semaphore = _ensure_client()
+    if breaker_open():
+        raise AIUnavailableError("AI circuit breaker is open")
+    wait = getattr(settings, "AI_QUEUE_TIMEOUT", 5.0)
+    started = time.monotonic()
+    if not semaphore.acquire(timeout=min(wait, timeout) if timeout else wait):
+        raise AIBusyError("Too many concurrent AI requests")
+    try:
+        if timeout:
+            remaining = max(timeout - (time.monotonic() - started), 0.1)
+            client = client.with_options(timeout=remaining, max_retries=0)
+        yield client
+    finally:
+        semaphore.release()
+
+
+def chat_completion(timeout: Optional[float] = None, caller: str = "other", **kwargs: Any) -> Any:
+    """
+    ``client.chat.completions.create`` within the worker's concurrency limit.
+
+    ``timeout`` is the call's latency budget. Upstream errors and timeouts
+    count towards the circuit breaker. The call is recorded in
+    ``matching.telemetry`` under ``caller``.
+    """
+    with track_ai_call(caller, kwargs.get("model", "")) as call:
+        try:
+            with ai_slot(timeout) as client:
+                try:
+                    response = client.chat.completions.create(**kwargs)
+                except Exception:
+                    record_failure()
+                    raise
+        except (AIBusyError, AIUnavailableError):
+            call.outcome = "fallback"
+            raise
+        record_success()
+        call.usage(getattr(response, "usage", None))
+        call.outcome = "success" if response.choices and response.choices[0].message.content else "empty"
+    return response
+
+
+def _create_stream(client: Any, kwargs: dict[str, Any]) -> Any:
+    """Start a stream, asking for token usage unless the server has refused to send it."""
+    global _stream_usage
+    if not _stream_usage:
+        return client.chat.completions.create(stream=True, **kwargs)
+    from openai import BadRequestError
+
+    try:
+        return client.chat.completions.create(
+            stream=True, stream_options={"include_usage": True}, **kwargs
+        )
+    except BadRequestError:
+        stream = client.chat.completions.create(stream=True, **kwargs)
+        _stream_usage = False  # Only once the request is known to work without it
+        return stream
+
+
+def stream_chat_completion(
+    timeout: Optional[float] = None, caller: str = "other", **kwargs: Any
+) -> Iterator[str]:
+    """
+    Stream a chat completion, yielding content deltas as they arrive.
+
+    The concurrency slot is held until the stream is exhausted or closed.
+    ``timeout`` is a deadline for the whole stream, slot wait included: once
+    it passes the stream is closed and ``TimeoutError`` raised, even mid-way.
+    Recorded like ``chat_completion``, with token usage from the stream's
+    final chunk when the server supports ``stream_options``.
+    """
+    deadline = time.monotonic() + timeout if timeout else None
+    with track_ai_call(caller, kwargs.get("model", "")) as call:
+        received = False
+        try:
+            with ai_slot(timeout) as client:
+                try:
+                    stream = _create_stream(client, kwargs)
+                    expired = threading.Event()
+                    watchdog: Optional[threading.Timer] = None
+                    if deadline is not None:
+
+                        def expire() -> None:
+                            expired.set()
+                            stream.close()  # Unblocks a read that is waiting on the server
+
+                        watchdog = threading.Timer(max(deadline - time.monotonic(), 0), expire)
+                        watchdog.daemon = True
+                        watchdog.start()
+                    try:
+                        for chunk in stream:
+                            if expired.is_set():
+                                break
+                            if chunk.usage:
+                                call.usage(chunk.usage)
+                            if chunk.choices and chunk.choices[0].delta.content:
+                                received = True
+                                yield chunk.choices[0].delta.content
+                    except Exception:
+                        if not expired.is_set():
+                            raise
+                    finally:
+                        if watchdog is not None:
+                            watchdog.cancel()
+                        stream.close()
+                    if expired.is_set():
+                        raise TimeoutError(f"AI stream ran past its {timeout}s budget")
+                except Exception:
+                    record_failure()
+                    raise
+        except (AIBusyError, AIUnavailableError):
+            call.outcome = "fallback"
+            raise
+        record_success()
+        call.outcome = "success" if received else "empty"
+
+
+def reset_client() -> None:
+    """Drop the shared client, closing its connections."""
+    global _client, _semaphore, _config, _stream_usage
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = _semaphore = _config = None
+        _stream_usage = True
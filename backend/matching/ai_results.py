@@ -0,0 +1,95 @@
+"""
+Cached AI suggestions and summaries.
+
+A result is stored per (kind, conversation, requesting user, language)
+together with the conversation's ``last_message_id`` at the time it was
+generated, and is only served while that is still the newest message. The
+``invalidate_ai_results`` signal also drops a conversation's entries as soon
+as a message is inserted. Failed generations (``None``) are not cached.
+Generation goes through ``single_flight``, so concurrent identical requests
+make one model call between them.
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Optional, TypeVar
+
+from django.core.cache import cache
+
+from profiles.taxonomy import SUPPORTED_LANGUAGES
+
+from .models import Conversation
+from .single_flight import single_flight
+
+T = TypeVar("T")
+
+RESULT_KINDS: tuple[str, ...] = ("suggestions", "summary")
+RESULT_TIMEOUT = 60 * 60 * 24
+
+
+def result_key(kind: str, conversation_id: int, user_id: int, language: str) -> str:
+    return f"ai:{kind}:{conversation_id}:{user_id}:{language}"
+
+
+def flight_key(kind: str, conversation: Conversation, user_id: int, language: str) -> str:
+    """The ``single_flight`` key shared by identical generations."""
+    return f"ai:{kind}:{conversation.id}:{conversation.last_message_id}:{user_id}:{language}"
+
+
+def get_result(kind: str, conversation: Conversation, user_id: int, language: str) -> Any:
+    """The cached ``kind`` result for the conversation's current last message, or None."""
+    entry: Optional[dict[str, Any]] = cache.get(
+        result_key(kind, conversation.id, user_id, language)
+    )
+    if entry is not None and entry["last_message_id"] == conversation.last_message_id:
+        return entry["result"]
+    return None
+
+
+def store_result(
+    kind: str, conversation: Conversation, user_id: int, language: str, result: Any
+) -> None:
+    cache.set(
+        result_key(kind, conversation.id, user_id, language),
+        {"last_message_id": conversation.last_message_id, "result": result},
+        timeout=RESULT_TIMEOUT,
+    )
+
+
+def cached_result(
+    kind: str,
+    conversation: Conversation,
+    user_id: int,
+    language: str,
+    generate: Callable[[], Optional[T]],
+    refresh: bool = False,
+) -> Optional[T]:
+    """
+    Return the cached ``kind`` result for the current last message, or generate it.
+
+    ``refresh`` skips the cached result and replaces it with a new one.
+    Concurrent misses for the same inputs are coalesced into one generation.
+    """
+    if not refresh:
+        cached: Optional[T] = get_result(kind, conversation, user_id, language)
+        if cached is not None:
+            return cached
+
+    def generate_and_store() -> Optional[T]:
+        result = generate()
+        if result is not None:
+            store_result(kind, conversation, user_id, language, result)
+        return result
+
+    # Identical concurrent requests (double clicks, two tabs) share one call
+    return single_flight(flight_key(kind, conversation, user_id, language), generate_and_store)
+
+
+def invalidate_results(conversation_id: int, user_ids: list[int]) -> None:
+    cache.delete_many(
+        [
+            result_key(kind, conversation_id, user_id, language)
+            for kind in RESULT_KINDS
+            for user_id in user_ids
+            for language in SUPPORTED_LANGUAGES
+        ]
+    )
@@ -9,9 +9,14 @@ import logging
 import re
 from typing import Any, Literal, Optional
 
-from django.conf import settings
+from django.core.cache import cache
 from pydantic import BaseModel, Field
 
+from profiles.cards import get_profile_versions
+from profiles.taxonomy import get_taxonomy_version
+
+from .ai_client import chat_completion, get_client, latency_budget
+
 logger = logging.getLogger(__name__)
 
 
@@ -29,7 +34,32 @@ class ProfileSummary(BaseModel):
     
     @classmethod
     def from_django_profile(cls, profile: Any) -> ProfileSummary:
-        """Create a ProfileSummary from a Django Profile model instance."""
+        """
+        Create a ProfileSummary from a Django Profile model instance.
+        
+        The projection is cached per profile version and taxonomy version (see
+        ``profiles.cards``), so edits to the profile, its tags or interests, or
+        renamed tags invalidate it. Only the user's preferred language is read
+        live, from ``profile.user``.
+        """
+        key = _profile_summary_key(profile.pk)
+        data: Optional[dict[str, Any]] = cache.get(key)
+        if data is None:
+            data = cls._build(profile).model_dump()
+            cache.set(key, data, timeout=PROFILE_SUMMARY_TIMEOUT)
+        summary = cls(**data)
+        
+        # Try to get user's preferred language
+        try:
+            if hasattr(profile.user, 'preferred_language') and profile.user.preferred_language:
+                summary.language = profile.user.preferred_language
+        except Exception:
+            pass  # Use detected language
+        
+        return summary
+    
+    @classmethod
+    def _build(cls, profile: Any) -> ProfileSummary:
         # Get disability tags
         tags = list(profile.disability_tags.values_list("name_en", flat=True))
         tags_str = ", ".join(tags) if tags else "none specified"
@@ -51,13 +81,6 @@ class ProfileSummary(BaseModel):
             elif any('\u0600' <= char <= '\u06FF' for char in profile.bio):
                 language = "ar"
         
-        # Try to get user's preferred language
-        try:
-            if hasattr(profile.user, 'preferred_language') and profile.user.preferred_language:
-                language = profile.user.preferred_language
-        except Exception:
-            pass  # Use detected language
-        
         return cls(
             name=profile.display_name or "User",
             bio=profile.bio or "",
@@ -70,6 +93,14 @@ class ProfileSummary(BaseModel):
         )
 
 
+PROFILE_SUMMARY_TIMEOUT = 60 * 60 * 24
+
+
+def _profile_summary_key(profile_id: int) -> str:
+    version = get_profile_versions([profile_id])[profile_id]
+    return f"ai:profile_summary:{profile_id}:{version}:{get_taxonomy_version()}"
+
+
 class ChatMessage(BaseModel):
     """A single chat message for conversation history."""
     
@@ -202,18 +233,43 @@ class AIResponseGenerator:
     
     def __init__(self, config: Optional[AIConfig] = None):
         self.config = config or AIConfig()
-        self._client = None
     
     @property
     def client(self):
-        """Lazy-load the OpenAI client."""
-        if self._client is None:
-            from openai import OpenAI
-            api_key = getattr(settings, 'OPENAI_API_KEY', None)
-            if not api_key:
-                raise ValueError("OpenAI API key not configured")
-            self._client = OpenAI(api_key=api_key)
-        return self._client
+        """The process-wide OpenAI client."""
+        return get_client()
+    
+    def build_request(
+        self,
+        mock_profile: ProfileSummary,
+        user_message: str,
+        conversation_history: list[ChatMessage],
+        real_user_profile: Optional[ProfileSummary] = None,
+        memory: str = "",
+    ) -> dict[str, Any]:
+        """Build the chat completion arguments for a mock user's reply."""
+        # Build the system prompt
+        prompt_builder = PersonalityPromptBuilder(mock_profile, real_user_profile)
+        system_prompt = prompt_builder.build()
+        
+        # Build messages array
+        messages = [ChatMessage(role="system", content=system_prompt)]
+        if memory:
+            messages.append(ChatMessage(role="system", content=_memory_note(memory)))
+        messages.extend(conversation_history)
+        messages.append(ChatMessage(role="user", content=user_message))
+        
+        return {
+            "model": self.config.model,
+            # Convert to dict format for OpenAI API
+            "messages": [msg.model_dump() for msg in messages],
+            "max_tokens": self.config.max_tokens,
+            "temperature": self.config.temperature,
+            "presence_penalty": self.config.presence_penalty,
+            "frequency_penalty": self.config.frequency_penalty,
+            "timeout": latency_budget("mock_reply"),
+            "caller": "mock_reply",
+        }
     
     def generate_response(
         self,
@@ -221,6 +277,7 @@ class AIResponseGenerator:
         user_message: str,
         conversation_history: list[ChatMessage],
         real_user_profile: Optional[ProfileSummary] = None,
+        memory: str = "",
     ) -> Optional[str]:
         """
         Generate an AI response for a mock user.
@@ -230,32 +287,16 @@ class AIResponseGenerator:
             user_message: The message the real user just sent
             conversation_history: List of previous messages
             real_user_profile: The real user's profile summary (for context)
+            memory: Summary of the conversation before ``conversation_history``
         
         Returns:
             The generated response text, or None if generation failed
         """
         try:
-            # Build the system prompt
-            prompt_builder = PersonalityPromptBuilder(mock_profile, real_user_profile)
-            system_prompt = prompt_builder.build()
-            
-            # Build messages array
-            messages = [ChatMessage(role="system", content=system_prompt)]
-            messages.extend(conversation_history)
-            messages.append(ChatMessage(role="user", content=user_message))
-            
-            # Convert to dict format for OpenAI API
-            messages_dict = [msg.model_dump() for msg in messages]
-            
-            # Generate response
-            response = self.client.chat.completions.create(
-                model=self.config.model,
-                messages=messages_dict,  # type: ignore
-                max_tokens=self.config.max_tokens,
-                temperature=self.config.temperature,
-                presence_penalty=self.config.presence_penalty,
-                frequency_penalty=self.config.frequency_penalty,
+            request = self.build_request(
+                mock_profile, user_message, conversation_history, real_user_profile, memory
             )
+            response = chat_completion(**request)
             
             ai_message = response.choices[0].message.content
             
@@ -304,7 +345,8 @@ Guidelines:
 Be yourself!"""}
             ]
             
-            response = self.client.chat.completions.create(
+            response = chat_completion(
+                caller="greeting",
                 model=self.config.model,
                 messages=messages,  # type: ignore
                 max_tokens=60,
@@ -330,6 +372,7 @@ def generate_ai_response(
     conversation_history: list[dict[str, str]],
     real_user_profile: Any = None,
     max_tokens: int = 150,
+    memory: str = "",
 ) -> Optional[str]:
     """
     Generate an AI response for a mock user.
@@ -342,10 +385,62 @@ def generate_ai_response(
         conversation_history: List of previous messages [{"role": "user/assistant", "content": "..."}]
         real_user_profile: The real user's Django Profile object (for context)
         max_tokens: Maximum tokens for the response
+        memory: Summary of the conversation before ``conversation_history``
     
     Returns:
         The generated response text, or None if generation failed
     """
+    generator, kwargs = _ai_response_inputs(
+        mock_profile, user_message, conversation_history, real_user_profile, max_tokens, memory
+    )
+    return generator.generate_response(**kwargs)
+
+
+def get_greeting_message(profile: Any) -> Optional[str]:
+    """
+    Get a greeting message when a match is made.
+
+    This is a backward-compatible wrapper around ``matching.greetings``: it
+    takes a greeting from the mock user's pool, and generates one only when
+    the pool is empty.
+
+    Args:
+        profile: The mock user's Django Profile object
+
+    Returns:
+        A greeting message, or None if generation failed
+    """
+    from .greetings import take_greeting
+
+    greeting = take_greeting(profile.user)
+    if greeting is not None:
+        return greeting
+    return AIResponseGenerator().generate_greeting(ProfileSummary.from_django_profile(profile))
+
+
+def ai_response_request(
+    mock_profile: Any,
+    user_message: str,
+    conversation_history: list[dict[str, str]],
+    real_user_profile: Any = None,
+    max_tokens: int = 150,
+    memory: str = "",
+) -> dict[str, Any]:
+    """Chat completion arguments for ``generate_ai_response``, e.g. to stream it."""
+    generator, kwargs = _ai_response_inputs(
+        mock_profile, user_message, conversation_history, real_user_profile, max_tokens, memory
+    )
+    return generator.build_request(**kwargs)
+
+
+def _ai_response_inputs(
+    mock_profile: Any,
+    user_message: str,
+    conversation_history: list[dict[str, str]],
+    real_user_profile: Any,
+    max_tokens: int,
+    memory: str,
+) -> tuple[AIResponseGenerator, dict[str, Any]]:
     # Convert Django profiles to Pydantic models
     mock_summary = ProfileSummary.from_django_profile(mock_profile)
     
@@ -359,33 +454,59 @@ def generate_ai_response(
         for msg in conversation_history
     ]
     
-    # Generate response
-    config = AIConfig(max_tokens=max_tokens)
-    generator = AIResponseGenerator(config)
-    
-    return generator.generate_response(
-        mock_profile=mock_summary,
-        user_message=user_message,
-        conversation_history=history,
-        real_user_profile=user_summary,
-    )
+    generator = AIResponseGenerator(AIConfig(max_tokens=max_tokens))
+    return generator, {
+        "mock_profile": mock_summary,
+        "user_message": user_message,
+        "conversation_history": history,
+        "real_user_profile": user_summary,
+        "memory": memory,
+    }
 
 
-def get_greeting_message(profile: Any) -> Optional[str]:
+def _memory_note(memory: str) -> str:
+    return f"Summary of the earlier part of this conversation: {memory}"
+
+
+def summarize_conversation_memory(transcript: str, previous_summary: str = "") -> Optional[str]:
     """
-    Generate a greeting message when a match is made.
-    
-    This is a backward-compatible wrapper around AIResponseGenerator.
-    
+    Fold older chat turns into a running summary used as prompt memory.
+
     Args:
-        profile: The mock user's Django Profile object
-    
+        transcript: The turns to add, one "Name: message" line each
+        previous_summary: The summary of everything before them, if any
+
     Returns:
-        A greeting message, or None if generation failed
+        The updated summary, or None if generation failed
     """
-    profile_summary = ProfileSummary.from_django_profile(profile)
-    generator = AIResponseGenerator()
-    return generator.generate_greeting(profile_summary)
+    try:
+        system_prompt = """You keep a running memory of a chat between two people on a dating app.
+Write a compact third-person summary (at most 5 sentences) of the facts, topics, plans and
+feelings worth remembering. Use the people's names and the language of the chat."""
+        context_prompt = f"""Summary so far:
+{previous_summary or "(nothing yet)"}
+
+New messages:
+{transcript}
+
+Return the updated summary as plain text only."""
+
+        generator = AIResponseGenerator(AIConfig(max_tokens=200, temperature=0.2))
+        response = chat_completion(
+            caller="memory",
+            model=generator.config.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": context_prompt},
+            ],  # type: ignore
+            max_tokens=generator.config.max_tokens,
+            temperature=generator.config.temperature,
+        )
+        content = response.choices[0].message.content
+        return content.strip() if content else None
+    except Exception as exc:
+        logger.warning(f"Failed to update conversation memory: {exc}")
+        return None
 
 
 def _extract_json_list(text: str) -> Optional[list[str]]:
@@ -421,50 +542,73 @@ def generate_message_suggestions(
     other_profile: Any,
     language_code: str = "en",
     max_suggestions: int = 3,
+    memory: str = "",
 ) -> Optional[list[str]]:
     """
     Generate short reply suggestions for the current user.
+
+    The history goes into the prompt once, as a transcript; ``memory``
+    summarizes whatever came before it.
     """
     try:
-        user_summary = ProfileSummary.from_django_profile(user_profile)
-        other_summary = ProfileSummary.from_django_profile(other_profile)
-
-        language_name = _language_name(language_code)
-
-        # Build transcript first to detect conversation stage
-        transcript_lines: list[str] = []
-        for msg in conversation_history:
-            role = msg.get("role")
-            content = (msg.get("content") or "").strip()
-            if not content:
-                continue
-            speaker = user_summary.name if role == "user" else other_summary.name
-            transcript_lines.append(f"{speaker}: {content}")
-
-        transcript = "\n".join(transcript_lines)
-        if len(transcript) > 1500:
-            transcript = transcript[-1500:]
-
-        msg_count = len(transcript_lines)
-        if msg_count <= 4:
-            stage_hint = "This is the beginning of the conversation — keep suggestions light and friendly, like a gentle ice-breaker."
-        elif msg_count <= 12:
-            stage_hint = "The conversation is building — suggestions should show genuine interest and follow up naturally on what was said."
-        else:
-            stage_hint = "The conversation is well underway — suggestions can be more personal and reference shared topics that came up."
-
-        # Detect last message sender to guide reply direction
-        last_msg_from_other = ""
-        for msg in reversed(conversation_history):
-            if msg.get("role") == "assistant" and (msg.get("content") or "").strip():
-                last_msg_from_other = (msg.get("content") or "").strip()
-                break
-
-        reply_anchor = ""
-        if last_msg_from_other:
-            reply_anchor = f"\nThe last message from {other_summary.name} was: \"{last_msg_from_other[:200]}\"\nSuggestions MUST be relevant responses to that message — do not ignore it."
-
-        system_prompt = f"""You are helping {user_summary.name} reply to {other_summary.name} in an inclusive dating app.
+        request = suggestions_request(
+            conversation_history, user_profile, other_profile, language_code, max_suggestions, memory
+        )
+        response = chat_completion(**request)
+        return parse_suggestions(response.choices[0].message.content or "", max_suggestions)
+    except Exception as exc:
+        logger.warning(f"Failed to generate suggestions: {exc}")
+        return None
+
+
+def suggestions_request(
+    conversation_history: list[dict[str, str]],
+    user_profile: Any,
+    other_profile: Any,
+    language_code: str = "en",
+    max_suggestions: int = 3,
+    memory: str = "",
+) -> dict[str, Any]:
+    """Chat completion arguments for ``generate_message_suggestions``."""
+    user_summary = ProfileSummary.from_django_profile(user_profile)
+    other_summary = ProfileSummary.from_django_profile(other_profile)
+
+    language_name = _language_name(language_code)
+
+    # Build transcript first to detect conversation stage
+    transcript_lines: list[str] = []
+    for msg in conversation_history:
+        role = msg.get("role")
+        content = (msg.get("content") or "").strip()
+        if not content:
+            continue
+        speaker = user_summary.name if role == "user" else other_summary.name
+        transcript_lines.append(f"{speaker}: {content}")
+
+    transcript = "\n".join(transcript_lines)
+
+    msg_count = len(transcript_lines)
+    if memory:
+        stage_hint = "The conversation is well underway — suggestions can be more personal and reference shared topics that came up."
+    elif msg_count <= 4:
+        stage_hint = "This is the beginning of the conversation — keep suggestions light and friendly, like a gentle ice-breaker."
+    elif msg_count <= 12:
+        stage_hint = "The conversation is building — suggestions should show genuine interest and follow up naturally on what was said."
+    else:
+        stage_hint = "The conversation is well underway — suggestions can be more personal and reference shared topics that came up."
+
+    # Detect last message sender to guide reply direction
+    last_msg_from_other = ""
+    for msg in reversed(conversation_history):
+        if msg.get("role") == "assistant" and (msg.get("content") or "").strip():
+            last_msg_from_other = (msg.get("content") or "").strip()
+            break
+
+    reply_anchor = ""
+    if last_msg_from_other:
+        reply_anchor = f"\nThe last message from {other_summary.name} was: \"{last_msg_from_other[:200]}\"\nSuggestions MUST be relevant responses to that message — do not ignore it."
+
+    system_prompt = f"""You are helping {user_summary.name} reply to {other_summary.name} in an inclusive dating app.
 
 TONE GUIDELINES:
 - Warm, soft, and gentle — never blunt, aggressive, or overly direct.
@@ -479,28 +623,29 @@ TONE GUIDELINES:
 
 Keep each suggestion under 100 characters. Respond ONLY in {language_name}."""
 
-        recent_messages = f"- Recent messages:\n{transcript}" if transcript else ""
+    recent_messages = f"- Recent messages:\n{transcript}" if transcript else ""
+    earlier = f"- Earlier in the conversation: {memory}\n" if memory else ""
 
-        # Find shared interests for better relevance
-        user_interests = set(
-            i.strip().lower()
-            for i in user_summary.interests.split(",")
-            if i.strip() and i.strip() != "various things"
-        )
-        other_interests = set(
-            i.strip().lower()
-            for i in other_summary.interests.split(",")
-            if i.strip() and i.strip() != "various things"
-        )
-        shared = user_interests & other_interests
-        shared_hint = ""
-        if shared:
-            shared_hint = f"- Shared interests: {', '.join(shared)}\n"
+    # Find shared interests for better relevance
+    user_interests = set(
+        i.strip().lower()
+        for i in user_summary.interests.split(",")
+        if i.strip() and i.strip() != "various things"
+    )
+    other_interests = set(
+        i.strip().lower()
+        for i in other_summary.interests.split(",")
+        if i.strip() and i.strip() != "various things"
+    )
+    shared = user_interests & other_interests
+    shared_hint = ""
+    if shared:
+        shared_hint = f"- Shared interests: {', '.join(shared)}\n"
 
-        context_prompt = f"""CONTEXT:
+    context_prompt = f"""CONTEXT:
 - {user_summary.name}'s interests: {user_summary.interests}
 - {other_summary.name}'s interests: {other_summary.interests}
-{shared_hint}{recent_messages}{reply_anchor}
+{shared_hint}{earlier}{recent_messages}{reply_anchor}
 
 TASK:
 Generate exactly {max_suggestions} short, gentle reply suggestions as a JSON array of strings in {language_name}.
@@ -509,25 +654,27 @@ Generate exactly {max_suggestions} short, gentle reply suggestions as a JSON arr
 - Do NOT include generic greetings or filler phrases.
 - Output ONLY the JSON array, nothing else."""
 
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": context_prompt})
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": context_prompt},
+    ]
 
-        generator = AIResponseGenerator(AIConfig(max_tokens=200, temperature=0.7))
-        response = generator.client.chat.completions.create(
-            model=generator.config.model,
-            messages=messages,  # type: ignore
-            max_tokens=generator.config.max_tokens,
-            temperature=generator.config.temperature,
-        )
-        content = response.choices[0].message.content or ""
-        suggestions = _extract_json_list(content)
-        if suggestions:
-            return suggestions[:max_suggestions]
-        return None
-    except Exception as exc:
-        logger.warning(f"Failed to generate suggestions: {exc}")
-        return None
+    config = AIConfig(max_tokens=200, temperature=0.7)
+    return {
+        "model": config.model,
+        "messages": messages,
+        "max_tokens": config.max_tokens,
+        "temperature": config.temperature,
+        "timeout": latency_budget("suggestions"),
+        "caller": "suggestions",
+    }
+
+
+def parse_suggestions(content: str, max_suggestions: int = 3) -> Optional[list[str]]:
+    suggestions = _extract_json_list(content)
+    if suggestions:
+        return suggestions[:max_suggestions]
+    return None
 
 
 def generate_conversation_summary(
@@ -535,36 +682,64 @@ def generate_conversation_summary(
     user_profile: Any,
     other_profile: Any,
     language_code: str = "en",
+    previous_summary: str = "",
 ) -> Optional[str]:
     """
     Generate a short summary of the conversation for the current user.
+
+    With ``previous_summary`` the history holds only the messages since that
+    summary, and the model updates it instead of starting over.
     """
     try:
-        user_summary = ProfileSummary.from_django_profile(user_profile)
-        other_summary = ProfileSummary.from_django_profile(other_profile)
+        request = summary_request(
+            conversation_history, user_profile, other_profile, language_code, previous_summary
+        )
+        response = chat_completion(**request)
+        content = response.choices[0].message.content
+        return content.strip() if content else None
+    except Exception as exc:
+        logger.warning(f"Failed to generate summary: {exc}")
+        return None
 
-        language_name = _language_name(language_code)
-        system_prompt = f"""You are summarizing a conversation for {user_summary.name} in a dating app.
+
+def summary_request(
+    conversation_history: list[dict[str, str]],
+    user_profile: Any,
+    other_profile: Any,
+    language_code: str = "en",
+    previous_summary: str = "",
+) -> dict[str, Any]:
+    """Chat completion arguments for ``generate_conversation_summary``."""
+    user_summary = ProfileSummary.from_django_profile(user_profile)
+    other_summary = ProfileSummary.from_django_profile(other_profile)
+
+    language_name = _language_name(language_code)
+    system_prompt = f"""You are summarizing a conversation for {user_summary.name} in a dating app.
 Keep it concise (2-3 sentences), positive, and avoid sensitive details unless explicitly discussed.
 Respond in {language_name}."""
 
+    if previous_summary:
+        context_prompt = f"""
+Update this summary of the conversation between {user_summary.name} and {other_summary.name} with the messages above:
+{previous_summary}
+
+Keep the whole conversation in view, in 2-3 sentences.
+Return plain text only in {language_name}."""
+    else:
         context_prompt = f"""
 Summarize the conversation between {user_summary.name} and {other_summary.name} in 2-3 sentences.
 Return plain text only in {language_name}."""
 
-        messages = [{"role": "system", "content": system_prompt}]
-        messages.extend(conversation_history)
-        messages.append({"role": "user", "content": context_prompt})
-
-        generator = AIResponseGenerator(AIConfig(max_tokens=150, temperature=0.4))
-        response = generator.client.chat.completions.create(
-            model=generator.config.model,
-            messages=messages,  # type: ignore
-            max_tokens=generator.config.max_tokens,
-            temperature=generator.config.temperature,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else None
-    except Exception as exc:
-        logger.warning(f"Failed to generate summary: {exc}")
-        return None
+    messages = [{"role": "system", "content": system_prompt}]
+    messages.extend(conversation_history)
+    messages.append({"role": "user", "content": context_prompt})
+
+    config = AIConfig(max_tokens=150, temperature=0.4)
+    return {
+        "model": config.model,
+        "messages": messages,
+        "max_tokens": config.max_tokens,
+        "temperature": config.temperature,
+        "timeout": latency_budget("summary"),
+        "caller": "summary",
+    }
@@ -1,8 +1,35 @@
 from __future__ import annotations
 
+import os
+import sys
+
 from django.apps import AppConfig
 
+# Processes that serve requests; management commands and shells are left alone
+SERVER_PROGRAMS = ("gunicorn", "uvicorn", "daphne")
+
+
+def _serves_requests() -> bool:
+    program = os.path.basename(sys.argv[0]) if sys.argv else ""
+    if program.startswith(SERVER_PROGRAMS):
+        return True
+    # runserver's autoreloader child (RUN_MAIN) is the one that serves
+    return sys.argv[1:2] == ["runserver"] and os.environ.get("RUN_MAIN") == "true"
+
 
 class MatchingConfig(AppConfig):
     default_auto_field: str = "django.db.models.BigAutoField"
     name: str = "matching"
+
+    def ready(self) -> None:
+        import matching.signals  # noqa: F401
+
+        if _serves_requests():
+            from .context_window import preload_encoding
+            from .jobs import wake_worker
+
+            # The tokenizer's first load downloads a file; don't do it on a request
+            preload_encoding()
+            # Run jobs left pending, delayed or stuck by a restart without
+            # waiting for the next enqueue (no-op unless BACKGROUND_JOBS_IN_PROCESS)
+            wake_worker()
@@ -0,0 +1,55 @@
+"""
+Circuit breaker for calls to the AI provider, shared by all workers.
+
+Failures (errors and timeouts) are counted in the shared cache. After
+``AI_BREAKER_THRESHOLD`` of them within ``AI_BREAKER_WINDOW`` seconds the
+breaker opens for ``AI_BREAKER_COOLDOWN`` seconds, during which every worker
+fails fast and serves fallbacks instead of waiting on a struggling upstream.
+When the cooldown ends calls are let through again, but the first failure
+reopens the breaker straight away; the first success closes it.
+"""
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+FAILURES_KEY = "ai:breaker:failures"
+OPEN_KEY = "ai:breaker:open"
+TRIPPED_KEY = "ai:breaker:tripped"
+
+
+def breaker_open() -> bool:
+    return bool(cache.get(OPEN_KEY))
+
+
+def _open() -> None:
+    cooldown = getattr(settings, "AI_BREAKER_COOLDOWN", 30)
+    cache.set(OPEN_KEY, True, timeout=cooldown)
+    # Remembered past the cooldown, so a failing probe reopens at once
+    cache.set(TRIPPED_KEY, True, timeout=cooldown * 10)
+    cache.delete(FAILURES_KEY)
+    logger.warning(f"AI circuit breaker opened for {cooldown}s")
+
+
+def record_failure() -> None:
+    if cache.get(TRIPPED_KEY):
+        _open()
+        return
+    cache.add(FAILURES_KEY, 0, timeout=getattr(settings, "AI_BREAKER_WINDOW", 60))
+    try:
+        failures = cache.incr(FAILURES_KEY)
+    except ValueError:
+        failures = 1  # Expired between add and incr
+        cache.set(FAILURES_KEY, failures, timeout=getattr(settings, "AI_BREAKER_WINDOW", 60))
+    if failures >= getattr(settings, "AI_BREAKER_THRESHOLD", 5):
+        _open()
+
+
+def record_success() -> None:
+    if cache.get(TRIPPED_KEY):
+        logger.info("AI circuit breaker closed")
+    cache.delete_many([FAILURES_KEY, TRIPPED_KEY])
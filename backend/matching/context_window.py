@@ -0,0 +1,207 @@
+"""
+Token-budgeted conversation context for AI prompts.
+
+``build_context`` walks a conversation from the newest message backwards and
+keeps turns until ``AI_CONTEXT_TOKEN_BUDGET`` tokens are used. Everything
+older is folded into a rolling memory summary that is cached per
+conversation and only ever extended with the turns that dropped out of the
+window since it was written, so prompt size stays bounded however long the
+chat gets. The memory is extended by a background job; a request uses
+whatever summary is cached.
+
+Tokens are counted locally with ``tiktoken``'s ``o200k_base`` encoding,
+which server processes load at startup (``preload_encoding``) because the
+first load downloads its BPE file. If it cannot be loaded, tokens are
+estimated at about four characters per token.
+"""
+from __future__ import annotations
+
+import functools
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q, QuerySet
+
+from .jobs import enqueue_once
+from .models import Conversation, Message
+
+DEFAULT_TOKEN_BUDGET = 1200
+
+# Per-message framing the chat API adds on top of the content
+MESSAGE_OVERHEAD = 4
+
+MEMORY_JOB = "memory"
+
+# Older turns summarized per model call while catching up
+MEMORY_INPUT_BUDGET = 2000
+MEMORY_TIMEOUT = 60 * 60 * 24 * 7
+
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding() -> Any:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None  # The encoding could not be downloaded or loaded
+
+
+def preload_encoding() -> None:
+    """Load the tokenizer now rather than on the first request that counts tokens."""
+    _encoding()
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def message_text(message: Message) -> str:
+    if message.message_type == "voice":
+        return "[Voice message]"
+    return message.content or ""
+
+
+@dataclass
+class ContextWindow:
+    """Recent turns (oldest first) plus a summary of everything before them."""
+
+    turns: list[dict[str, str]] = field(default_factory=list)
+    memory: str = ""
+    truncated: bool = False
+
+
+def before_cursor(sent_at: datetime, message_id: int) -> Q:
+    return Q(sent_at__lt=sent_at) | Q(sent_at=sent_at, id__lt=message_id)
+
+
+def after_cursor(sent_at: datetime, message_id: int) -> Q:
+    return Q(sent_at__gt=sent_at) | Q(sent_at=sent_at, id__gt=message_id)
+
+
+def build_context(
+    conversation: Conversation,
+    user_id: int,
+    before_id: Optional[int] = None,
+    budget: Optional[int] = None,
+) -> ContextWindow:
+    """
+    Collect the newest turns of ``conversation`` that fit in ``budget`` tokens.
+
+    Roles are from ``user_id``'s point of view: their messages are ``user``
+    and the partner's are ``assistant``. With ``before_id`` only messages
+    older than that one are considered. The newest turn is always kept,
+    even when it alone exceeds the budget.
+    """
+    if budget is None:
+        budget = getattr(settings, "AI_CONTEXT_TOKEN_BUDGET", DEFAULT_TOKEN_BUDGET)
+
+    messages = conversation.messages.order_by("-sent_at", "-id").only(
+        "id", "sender_id", "sent_at", "message_type", "content"
+    )
+    if before_id is not None:
+        messages = messages.filter(id__lt=before_id)
+
+    window = ContextWindow()
+    used = 0
+    oldest: Optional[Message] = None
+    for msg in messages.iterator(chunk_size=50):
+        content = message_text(msg)
+        cost = count_tokens(content) + MESSAGE_OVERHEAD
+        if window.turns and used + cost > budget:
+            window.truncated = True
+            break
+        used += cost
+        oldest = msg
+        window.turns.append(
+            {"role": "user" if msg.sender_id == user_id else "assistant", "content": content}
+        )
+    window.turns.reverse()
+
+    if window.truncated and oldest is not None:
+        window.memory = rolling_memory(conversation, oldest)
+    return window
+
+
+def _memory_key(conversation_id: int) -> str:
+    return f"context:memory:{conversation_id}"
+
+
+def _memory_state(conversation_id: int) -> dict[str, Any]:
+    state: Optional[dict[str, Any]] = cache.get(_memory_key(conversation_id))
+    return state or {"summary": "", "until": None}
+
+
+def _pending_memory(
+    conversation: Conversation, boundary: Q, state: dict[str, Any]
+) -> QuerySet[Message]:
+    pending = conversation.messages.filter(boundary).order_by("sent_at", "id")
+    if state["until"]:
+        pending = pending.filter(after_cursor(*state["until"]))
+    return pending.only("id", "sender_id", "sent_at", "message_type", "content")
+
+
+def rolling_memory(conversation: Conversation, oldest: Message) -> str:
+    """
+    Summary of the messages before ``oldest``, the first turn of the window.
+
+    Returns the cached summary straight away. When messages have left the
+    window since it was written, ``catch_up_memory`` is queued to fold them
+    in, so the model is never called on the request path.
+    """
+    state = _memory_state(conversation.id)
+    if _pending_memory(conversation, before_cursor(oldest.sent_at, oldest.id), state).exists():
+        enqueue_once(
+            MEMORY_JOB,
+            {"conversation_id": conversation.id, "before_id": oldest.id},
+            unique_on=["conversation_id"],
+        )
+    summary: str = state["summary"]
+    return summary
+
+
+def catch_up_memory(conversation_id: int, before_id: int) -> None:
+    """
+    Job handler: fold every message before ``before_id`` into the memory.
+
+    The cached summary records the last message it covers; each model call
+    gets the previous summary plus at most ``MEMORY_INPUT_BUDGET`` tokens of
+    newer messages, until the memory reaches ``before_id``.
+    """
+    from .ai_service import summarize_conversation_memory
+
+    conversation = Conversation.objects.filter(id=conversation_id).first()
+    oldest = Message.objects.filter(id=before_id, conversation_id=conversation_id).first()
+    if conversation is None or oldest is None:
+        return
+    boundary = before_cursor(oldest.sent_at, oldest.id)
+    names = conversation.participant_names()
+    state = _memory_state(conversation_id)
+    while True:
+        lines: list[str] = []
+        used = 0
+        last: Optional[Message] = None
+        for msg in _pending_memory(conversation, boundary, state).iterator(chunk_size=50):
+            line = f"{names.get(msg.sender_id, 'User')}: {message_text(msg)}"
+            cost = count_tokens(line)
+            if lines and used + cost > MEMORY_INPUT_BUDGET:
+                break
+            lines.append(line)
+            used += cost
+            last = msg
+        if last is None:
+            return
+
+        summary = summarize_conversation_memory("\n".join(lines), state["summary"])
+        if not summary:
+            raise RuntimeError(f"Memory update failed for conversation {conversation_id}")  # Retried
+        state = {"summary": summary, "until": (last.sent_at, last.id)}
+        cache.set(_memory_key(conversation_id), state, timeout=MEMORY_TIMEOUT)
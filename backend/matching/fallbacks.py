@@ -0,0 +1,172 @@
+"""
+Template reply suggestions for when the model can't be used.
+
+``fallback_suggestions`` is served when the circuit breaker is open or the
+suggestions call runs past its latency budget. It needs one small query and
+no network, so it returns within milliseconds. The choice of templates is
+seeded from the conversation and its last message, so repeated requests get
+the same suggestions until the conversation moves on.
+"""
+from __future__ import annotations
+
+import random
+from typing import Any
+
+from profiles.models import Interest
+from users.models import User
+
+from .models import Conversation
+
+# Per language: replies to a question, reactions to a statement, prompts
+# about an interest ({interest}), and openers that fit anywhere
+TEMPLATES: dict[str, dict[str, list[str]]] = {
+    "en": {
+        "answer": [
+            "Good question! Let me think about it for a second 😊",
+            "Honestly, I'd love to tell you more about that",
+        ],
+        "react": [
+            "That sounds really nice!",
+            "I like how you put that 😊",
+            "Tell me more!",
+        ],
+        "interest": [
+            "I see we both like {interest} - how did you get into it?",
+            "What do you enjoy most about {interest}?",
+        ],
+        "open": [
+            "How has your day been so far?",
+            "What's something that made you smile this week?",
+            "What do you like to do on a relaxed weekend?",
+        ],
+    },
+    "he": {
+        "answer": [
+            "שאלה טובה! תן/י לי רגע לחשוב 😊",
+            "האמת שאשמח לספר לך על זה עוד",
+        ],
+        "react": [
+            "זה נשמע ממש נחמד!",
+            "אהבתי איך שניסחת את זה 😊",
+            "ספר/י לי עוד!",
+        ],
+        "interest": [
+            "ראיתי ששנינו אוהבים {interest} - איך התחלת עם זה?",
+            "מה הכי כיף לך ב{interest}?",
+        ],
+        "open": [
+            "איך עבר עליך היום?",
+            "מה גרם לך לחייך השבוע?",
+            "מה את/ה אוהב/ת לעשות בסופ\"ש רגוע?",
+        ],
+    },
+    "es": {
+        "answer": [
+            "¡Buena pregunta! Déjame pensarlo un segundo 😊",
+            "La verdad, me encantaría contarte más sobre eso",
+        ],
+        "react": [
+            "¡Eso suena muy bien!",
+            "Me gusta cómo lo dijiste 😊",
+            "¡Cuéntame más!",
+        ],
+        "interest": [
+            "Veo que a los dos nos gusta {interest}, ¿cómo empezaste?",
+            "¿Qué es lo que más disfrutas de {interest}?",
+        ],
+        "open": [
+            "¿Qué tal tu día hasta ahora?",
+            "¿Qué te hizo sonreír esta semana?",
+            "¿Qué te gusta hacer un fin de semana tranquilo?",
+        ],
+    },
+    "fr": {
+        "answer": [
+            "Bonne question ! Laisse-moi réfléchir une seconde 😊",
+            "Honnêtement, j'aimerais t'en dire plus",
+        ],
+        "react": [
+            "Ça a l'air vraiment sympa !",
+            "J'aime ta façon de le dire 😊",
+            "Raconte-moi en plus !",
+        ],
+        "interest": [
+            "On aime tous les deux {interest} - comment tu as commencé ?",
+            "Qu'est-ce que tu préfères dans {interest} ?",
+        ],
+        "open": [
+            "Comment se passe ta journée ?",
+            "Qu'est-ce qui t'a fait sourire cette semaine ?",
+            "Qu'est-ce que tu aimes faire pendant un week-end tranquille ?",
+        ],
+    },
+    "ar": {
+        "answer": [
+            "سؤال جميل! دعني أفكر لحظة 😊",
+            "بصراحة، يسعدني أن أخبرك المزيد عن ذلك",
+        ],
+        "react": [
+            "هذا يبدو لطيفًا حقًا!",
+            "أعجبتني طريقتك في قول ذلك 😊",
+            "أخبرني المزيد!",
+        ],
+        "interest": [
+            "أرى أننا نحب {interest} كلانا - كيف بدأت؟",
+            "ما أكثر ما تستمتع به في {interest}؟",
+        ],
+        "open": [
+            "كيف كان يومك حتى الآن؟",
+            "ما الذي جعلك تبتسم هذا الأسبوع؟",
+            "ماذا تحب أن تفعل في عطلة نهاية أسبوع هادئة؟",
+        ],
+    },
+}
+
+
+def _shared_interests(user: User, other_profile: Any) -> list[str]:
+    profile = user.profile
+    shared = list(
+        Interest.objects.filter(profiles=profile)
+        .filter(profiles=other_profile)
+        .values_list("name", flat=True)
+    )
+    mine = {str(i).strip().lower() for i in profile.custom_interests or []}
+    shared += [
+        i for i in other_profile.custom_interests or [] if str(i).strip().lower() in mine
+    ]
+    return shared
+
+
+def fallback_suggestions(
+    conversation: Conversation,
+    user: User,
+    other_profile: Any,
+    language: str,
+    max_suggestions: int = 3,
+) -> list[str]:
+    """Reply suggestions built from templates, shared interests and the last message."""
+    templates = TEMPLATES.get(language, TEMPLATES["en"])
+    rng = random.Random(f"{conversation.id}:{conversation.last_message_id}")
+
+    last = conversation.last_message
+    categories: list[str] = []
+    if last is not None and last.sender_id != user.id:
+        asked = last.message_type == "text" and last.content.rstrip().endswith(("?", "؟"))
+        categories.append("answer" if asked else "react")
+    interests = _shared_interests(user, other_profile)
+    if interests:
+        categories.append("interest")
+    categories += ["open"] * max_suggestions
+
+    suggestions: list[str] = []
+    openers = rng.sample(templates["open"], len(templates["open"]))
+    for category in categories[:max_suggestions]:
+        if category == "open":
+            if not openers:
+                break
+            suggestions.append(openers.pop())
+        elif category == "interest":
+            suggestions.append(rng.choice(templates["interest"]).format(interest=rng.choice(interests)))
+        else:
+            suggestions.append(rng.choice(templates[category]))
+    return suggestions
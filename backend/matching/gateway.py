@@ -0,0 +1,171 @@
+"""
+WebSocket gateway for real-time chat, served at ``/ws/chat/``.
+
+Clients authenticate with their DRF token, passed as ``?token=<key>`` since
+browsers cannot set headers on WebSocket requests. After the handshake the
+server pushes JSON events:
+
+- ``{"type": "message", "conversation_id", "message"}`` for new messages,
+- ``{"type": "typing", "conversation_id", "user_id", "is_typing"}``,
+- ``{"type": "read", "conversation_id", "user_id", "last_read_id", "read_at"}``.
+
+Clients may send ``{"action": "typing", "conversation_id", "is_typing"}``,
+``{"action": "read", "conversation_id", "up_to_id"?}`` and
+``{"action": "ping"}`` (which also keeps the user online for presence).
+Sending messages stays on the HTTP endpoint.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Awaitable, Callable, Mapping, Optional
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+
+from .models import Conversation
+from .presence import mark_online
+from .realtime import (
+    Event,
+    get_channel_layer,
+    publish_read,
+    publish_typing,
+    set_typing,
+    user_group,
+)
+
+logger = logging.getLogger(__name__)
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+# Takes any mapping, so Django's ASGIHandler accepts the same callable
+Send = Callable[[Mapping[str, Any]], Awaitable[None]]
+
+# Close codes in the 4000-4999 application range
+CLOSE_UNAUTHORIZED = 4401
+
+
+def _token_from_scope(scope: dict[str, Any]) -> Optional[str]:
+    query_string: bytes = scope.get("query_string", b"")
+    query = parse_qs(query_string.decode())
+    if query.get("token"):
+        return query["token"][0]
+    headers: list[tuple[bytes, bytes]] = scope.get("headers", [])
+    for name, value in headers:
+        if name == b"authorization":
+            keyword, _, key = value.decode().partition(" ")
+            if keyword.lower() == "token" and key:
+                return key
+    return None
+
+
+def authenticate_token(key: Optional[str]) -> Optional[User]:
+    if not key:
+        return None
+    token = Token.objects.select_related("user").filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return None
+    user: User = token.user
+    return user
+
+
+def _conversation_partner(user: User, conversation_id: int) -> Optional[int]:
+    pair = (
+        Conversation.objects.filter(id=conversation_id)
+        .filter(Q(match__user1=user) | Q(match__user2=user))
+        .values_list("match__user1_id", "match__user2_id")
+        .first()
+    )
+    if pair is None:
+        return None
+    return pair[1] if pair[0] == user.id else pair[0]
+
+
+def _mark_read(user: User, conversation_id: int, up_to_id: Optional[int]) -> bool:
+    conversation = (
+        Conversation.objects.filter(id=conversation_id)
+        .filter(Q(match__user1=user) | Q(match__user2=user))
+        .select_related("match")
+        .first()
+    )
+    if conversation is None:
+        return False
+    if conversation.mark_read(user.id, up_to_id=up_to_id):
+        publish_read(conversation, user.id)
+    return True
+
+
+class ChatGateway:
+    """ASGI application handling one WebSocket connection per call."""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (await receive())["type"] != "websocket.connect":
+            return
+        user = await sync_to_async(authenticate_token)(_token_from_scope(scope))
+        if user is None:
+            await send({"type": "websocket.close", "code": CLOSE_UNAUTHORIZED})
+            return
+        await send({"type": "websocket.accept"})
+
+        layer = get_channel_layer()
+        group = user_group(user.id)
+        queue = layer.subscribe(group)
+        forwarder = asyncio.create_task(self._forward(queue, send))
+        partners: dict[int, Optional[int]] = {}
+        try:
+            while True:
+                event = await receive()
+                if event["type"] == "websocket.disconnect":
+                    break
+                if event["type"] == "websocket.receive":
+                    reply = await self._handle(user, partners, event.get("text") or "")
+                    if reply is not None:
+                        await send({"type": "websocket.send", "text": json.dumps(reply)})
+        finally:
+            layer.unsubscribe(group, queue)
+            forwarder.cancel()
+
+    async def _forward(self, queue: asyncio.Queue[Event], send: Send) -> None:
+        while True:
+            event = await queue.get()
+            await send({"type": "websocket.send", "text": json.dumps(event)})
+
+    async def _handle(
+        self, user: User, partners: dict[int, Optional[int]], text: str
+    ) -> Optional[Event]:
+        try:
+            payload = json.loads(text)
+            action = payload.get("action")
+            conversation_id = int(payload.get("conversation_id") or 0)
+            up_to_id = int(payload.get("up_to_id") or 0) or None
+        except (ValueError, TypeError, AttributeError):
+            return {"type": "error", "error": "Invalid payload"}
+
+        if action == "ping":
+            await sync_to_async(mark_online)(user.id)
+            return {"type": "pong"}
+
+        if action == "typing":
+            # The partner lookup is cached for the lifetime of the socket
+            if conversation_id not in partners:
+                partners[conversation_id] = await sync_to_async(_conversation_partner)(
+                    user, conversation_id
+                )
+            partner_id = partners[conversation_id]
+            if partner_id is None:
+                return {"type": "error", "error": "Conversation not found"}
+            is_typing = bool(payload.get("is_typing", True))
+            await sync_to_async(set_typing)(conversation_id, user.id, is_typing)
+            await sync_to_async(publish_typing)(conversation_id, user.id, partner_id, is_typing)
+            return None
+
+        if action == "read":
+            found = await sync_to_async(_mark_read)(user, conversation_id, up_to_id)
+            return None if found else {"type": "error", "error": "Conversation not found"}
+
+        return {"type": "error", "error": "Unknown action"}
@@ -0,0 +1,169 @@
+"""
+Pools of pre-generated greetings from mock users.
+
+A mock user's first message depends only on its persona, not on who it
+matched with, so greetings are generated ahead of time and stored as
+``MockGreeting`` rows. A new match takes one from the pool without calling
+the model; when a pool runs low (``GREETING_POOL_LOW_WATER``) a background
+job tops it up to ``GREETING_POOL_SIZE``.
+
+Greetings are sent only with ``MOCK_GREETINGS`` on; otherwise a new match
+with a mock user starts silent, as before. Fill the pools up front with
+``manage.py fill_greeting_pools`` (the release step does), and again with
+``--refresh`` after editing mock personas.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Optional
+
+from django.conf import settings
+
+from users.models import User
+
+from .jobs import enqueue
+from .models import BackgroundJob, Conversation, Message, MockGreeting
+
+GREETING_JOB = "greeting_pool"
+
+# A taken greeting can lose a race with another match; retry a few times
+TAKE_ATTEMPTS = 3
+
+
+class RateLimiter:
+    """Spaces calls at least ``1 / rate`` seconds apart across threads."""
+
+    def __init__(self, rate: float = 0) -> None:
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def greetings_enabled() -> bool:
+    return getattr(settings, "MOCK_GREETINGS", False)
+
+
+def pool_size() -> int:
+    return getattr(settings, "GREETING_POOL_SIZE", 10)
+
+
+def fill_pools(
+    users: Iterable[User], size: Optional[int] = None, concurrency: int = 1, rate: float = 0
+) -> int:
+    """
+    Top up each user's greeting pool to ``size``; return how many were added.
+
+    Up to ``concurrency`` model calls run at once, started no faster than
+    ``rate`` per second (0 for no limit).
+    """
+    from .ai_service import AIResponseGenerator, ProfileSummary
+
+    size = pool_size() if size is None else size
+    work = []
+    for user in users:
+        missing = size - MockGreeting.objects.filter(user=user).count()
+        if missing > 0 and hasattr(user, "profile"):
+            summary = ProfileSummary.from_django_profile(user.profile)
+            work += [(user.id, summary)] * missing
+    if not work:
+        return 0
+
+    generator = AIResponseGenerator()
+    limiter = RateLimiter(rate)
+
+    def generate(item: tuple[int, ProfileSummary]) -> tuple[int, Optional[str]]:
+        user_id, summary = item
+        limiter.wait()
+        return user_id, generator.generate_greeting(summary)
+
+    # Only the model calls run in threads; rows are saved here
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        results = list(executor.map(generate, work))
+    greetings = [
+        MockGreeting(user_id=user_id, content=text.strip())
+        for user_id, text in results
+        if text and text.strip()
+    ]
+    MockGreeting.objects.bulk_create(greetings)
+    return len(greetings)
+
+
+def take_greeting(mock_user: User) -> Optional[str]:
+    """Remove a random greeting from the user's pool, scheduling a refill when low."""
+    content: Optional[str] = None
+    for _ in range(TAKE_ATTEMPTS):
+        greeting = MockGreeting.objects.filter(user=mock_user).order_by("?").first()
+        if greeting is None:
+            break
+        deleted, _ = MockGreeting.objects.filter(id=greeting.id).delete()
+        if deleted:
+            content = greeting.content
+            break
+
+    if content is None:
+        return None  # The caller decides how to refill an empty pool
+    low_water = getattr(settings, "GREETING_POOL_LOW_WATER", 3)
+    if MockGreeting.objects.filter(user=mock_user).count() <= low_water:
+        schedule_refill(mock_user)
+    return content
+
+
+def schedule_refill(mock_user: User, conversation_id: Optional[int] = None) -> None:
+    """Queue a refill of the user's pool, unless one is already queued."""
+    if conversation_id is None:
+        queued = BackgroundJob.objects.filter(
+            kind=GREETING_JOB,
+            status__in=[BackgroundJob.STATUS_PENDING, BackgroundJob.STATUS_RUNNING],
+            payload__user_id=mock_user.id,
+        ).exists()
+        if queued:
+            return
+    enqueue(GREETING_JOB, {"user_id": mock_user.id, "conversation_id": conversation_id})
+
+
+def send_greeting(conversation: Conversation, mock_user: User) -> Optional[Message]:
+    """
+    Post a pooled greeting from ``mock_user`` to a new conversation.
+
+    With an empty pool the greeting is sent by the refill job instead.
+    """
+    content = take_greeting(mock_user)
+    if content is None:
+        schedule_refill(mock_user, conversation.id)
+        return None
+    return Message.objects.create(conversation=conversation, sender=mock_user, content=content)
+
+
+def _greet_if_silent(mock_user: User, conversation_id: int) -> None:
+    from .ai_service import AIResponseGenerator, ProfileSummary
+
+    conversation = Conversation.objects.filter(id=conversation_id).first()
+    if conversation is None or conversation.last_message_id is not None:
+        return
+    content = take_greeting(mock_user)  # Another refill may have landed meanwhile
+    if content is None and hasattr(mock_user, "profile"):
+        summary = ProfileSummary.from_django_profile(mock_user.profile)
+        content = (AIResponseGenerator().generate_greeting(summary) or "").strip() or None
+    if content is None:
+        raise RuntimeError(f"No greeting could be generated for {mock_user}")  # Retried
+    Message.objects.create(conversation=conversation, sender=mock_user, content=content)
+
+
+def refill_pool(user_id: int, conversation_id: Optional[int] = None) -> None:
+    """Job handler: greet ``conversation_id`` if still silent, then top up the pool."""
+    mock_user = User.objects.select_related("profile").filter(id=user_id).first()
+    if mock_user is None:
+        return
+    if conversation_id is not None:
+        _greet_if_silent(mock_user, conversation_id)
+    fill_pools([mock_user])
@@ -0,0 +1,224 @@
+"""
+Database-backed background jobs with an in-process worker.
+
+``enqueue`` stores a ``BackgroundJob`` row and, once the surrounding
+transaction commits, wakes a daemon thread in the current process that runs
+due jobs. Web server processes also start it at boot (``MatchingConfig.ready``)
+so jobs left behind by a restart run without waiting for an enqueue. Jobs
+are claimed with a conditional UPDATE, so several workers
+(gunicorn processes, or ``manage.py run_jobs``) can share the table safely.
+A job left running by a crashed worker is picked up again after
+``STALE_AFTER``.
+
+Handlers are registered by kind in ``JOB_HANDLERS`` and receive the payload.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Callable, Iterable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 3
+RETRY_DELAY = timedelta(seconds=30)
+STALE_AFTER = timedelta(minutes=5)
+POLL_INTERVAL = 5.0  # seconds between checks when nothing woke the worker
+
+
+def _mock_reply(payload: dict[str, Any]) -> None:
+    from .mock_replies import deliver_mock_reply
+
+    deliver_mock_reply(**payload)
+
+
+def _greeting_pool(payload: dict[str, Any]) -> None:
+    from .greetings import refill_pool
+
+    refill_pool(**payload)
+
+
+def _suggestions(payload: dict[str, Any]) -> None:
+    from .suggestions import precompute_suggestions
+
+    precompute_suggestions(**payload)
+
+
+def _summary(payload: dict[str, Any]) -> None:
+    from .summaries import catch_up_summary
+
+    catch_up_summary(**payload)
+
+
+def _memory(payload: dict[str, Any]) -> None:
+    from .context_window import catch_up_memory
+
+    catch_up_memory(**payload)
+
+
+JOB_HANDLERS: dict[str, Callable[[dict[str, Any]], None]] = {
+    "mock_reply": _mock_reply,
+    "greeting_pool": _greeting_pool,
+    "suggestions": _suggestions,
+    "summary": _summary,
+    "memory": _memory,
+}
+
+
+def enqueue(kind: str, payload: dict[str, Any], delay: float = 0) -> BackgroundJob:
+    """Schedule a job to run after ``delay`` seconds."""
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    job = BackgroundJob.objects.create(
+        kind=kind,
+        payload=payload,
+        run_after=timezone.now() + timedelta(seconds=delay),
+    )
+    transaction.on_commit(wake_worker)
+    return job
+
+
+def enqueue_once(
+    kind: str,
+    payload: dict[str, Any],
+    delay: float = 0,
+    unique_on: Optional[Iterable[str]] = None,
+) -> Optional[BackgroundJob]:
+    """
+    ``enqueue``, unless a pending ``kind`` job with the same payload is already queued.
+
+    With ``unique_on``, only those payload keys have to match.
+    """
+    keys = payload.keys() if unique_on is None else unique_on
+    lookups = {f"payload__{key}": payload[key] for key in keys}
+    if BackgroundJob.objects.filter(kind=kind, status=BackgroundJob.STATUS_PENDING, **lookups).exists():
+        return None
+    return enqueue(kind, payload, delay)
+
+
+def _claim_next() -> Optional[BackgroundJob]:
+    now = timezone.now()
+    due = Q(status=BackgroundJob.STATUS_PENDING, run_after__lte=now) | Q(
+        status=BackgroundJob.STATUS_RUNNING, locked_at__lt=now - STALE_AFTER
+    )
+    for job in BackgroundJob.objects.filter(due).order_by("run_after")[:10]:
+        claimed = (
+            BackgroundJob.objects.filter(id=job.id, status=job.status, locked_at=job.locked_at)
+            .update(status=BackgroundJob.STATUS_RUNNING, locked_at=now, attempts=F("attempts") + 1)
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def claim(kind: str, **payload: Any) -> Optional[BackgroundJob]:
+    """
+    Take over a pending ``kind`` job whose payload matches, to run it inline.
+
+    The caller must report the outcome with ``finish_job``, or give the job
+    back with ``release_job``.
+    """
+    lookups = {f"payload__{key}": value for key, value in payload.items()}
+    job = BackgroundJob.objects.filter(
+        kind=kind, status=BackgroundJob.STATUS_PENDING, **lookups
+    ).first()
+    if job is None:
+        return None
+    claimed = BackgroundJob.objects.filter(id=job.id, status=BackgroundJob.STATUS_PENDING).update(
+        status=BackgroundJob.STATUS_RUNNING, locked_at=timezone.now(), attempts=F("attempts") + 1
+    )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def finish_job(job: BackgroundJob, error: Optional[Exception] = None) -> None:
+    """Mark a claimed job done, or schedule a retry after ``error``."""
+    if error is None:
+        BackgroundJob.objects.filter(id=job.id).update(
+            status=BackgroundJob.STATUS_DONE, locked_at=None
+        )
+        return
+    logger.error(f"Background job {job} failed: {error}")
+    retry = job.attempts < MAX_ATTEMPTS
+    BackgroundJob.objects.filter(id=job.id).update(
+        status=BackgroundJob.STATUS_PENDING if retry else BackgroundJob.STATUS_FAILED,
+        run_after=timezone.now() + RETRY_DELAY * job.attempts,
+        locked_at=None,
+        last_error=str(error),
+    )
+
+
+def release_job(job: BackgroundJob) -> None:
+    """Hand a claimed job back to the queue, due immediately."""
+    BackgroundJob.objects.filter(id=job.id, status=BackgroundJob.STATUS_RUNNING).update(
+        status=BackgroundJob.STATUS_PENDING, run_after=timezone.now(), locked_at=None
+    )
+    transaction.on_commit(wake_worker)
+
+
+def run_job(job: BackgroundJob) -> None:
+    try:
+        JOB_HANDLERS[job.kind](job.payload)
+    except Exception as e:
+        finish_job(job, e)
+        return
+    finish_job(job)
+
+
+def run_pending(limit: int = 100) -> int:
+    """Run due jobs until none are left (or ``limit``); return how many ran."""
+    count = 0
+    while count < limit:
+        job = _claim_next()
+        if job is None:
+            break
+        run_job(job)
+        count += 1
+    return count
+
+
+class JobWorker(threading.Thread):
+    """Daemon thread that runs due jobs, woken on enqueue or every POLL_INTERVAL."""
+
+    def __init__(self) -> None:
+        super().__init__(name="background-jobs", daemon=True)
+        self.wake = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            self.wake.wait(POLL_INTERVAL)
+            self.wake.clear()
+            close_old_connections()
+            try:
+                run_pending()
+            except Exception as e:
+                logger.error(f"Background worker error: {e}")
+            finally:
+                close_old_connections()
+
+
+_worker: Optional[JobWorker] = None
+_worker_lock = threading.Lock()
+
+
+def wake_worker() -> None:
+    """Start this process's worker thread if needed and nudge it."""
+    global _worker
+    if not getattr(settings, "BACKGROUND_JOBS_IN_PROCESS", True):
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = JobWorker()
+            _worker.start()
+    _worker.wake.set()
@@ -0,0 +1,63 @@
+"""
+Management command to report AI call latency, token usage and cost per caller.
+Usage: python manage.py ai_telemetry_report [--caller suggestions] [--reset]
+"""
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from matching.telemetry import OUTCOMES, AICall, clear_published, percentile, published_samples
+
+
+class Command(BaseCommand):
+    help = "Print latency percentiles, token usage, cost and outcomes of recent AI calls"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--caller",
+            action="append",
+            default=[],
+            help="Only report this caller (repeatable)",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Discard the published samples after reporting",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        by_caller: dict[str, list[AICall]] = defaultdict(list)
+        for call in published_samples():
+            if not options["caller"] or call.caller in options["caller"]:
+                by_caller[call.caller].append(call)
+
+        if not by_caller:
+            self.stdout.write(self.style.WARNING("⚠️ No AI calls recorded yet"))
+        else:
+            self.stdout.write(
+                f"{'caller':<12} {'calls':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+                f"{'prompt':>8} {'compl.':>7} {'cost $':>9}  outcomes"
+            )
+            for caller, calls in sorted(
+                by_caller.items(), key=lambda item: -sum(c.latency_ms for c in item[1])
+            ):
+                latencies = [call.latency_ms for call in calls]
+                outcomes = Counter(call.outcome for call in calls)
+                self.stdout.write(
+                    f"{caller:<12} {len(calls):>6} "
+                    f"{percentile(latencies, 50):>8.0f} "
+                    f"{percentile(latencies, 90):>8.0f} "
+                    f"{percentile(latencies, 99):>8.0f} "
+                    f"{sum(c.prompt_tokens for c in calls) / len(calls):>8.0f} "
+                    f"{sum(c.completion_tokens for c in calls) / len(calls):>7.0f} "
+                    f"{sum(c.cost_usd for c in calls):>9.4f}  "
+                    + " ".join(f"{o}={outcomes[o]}" for o in OUTCOMES if outcomes[o])
+                )
+            self.stdout.write("(prompt and completion tokens are per-call averages)")
+
+        if options["reset"]:
+            clear_published()
+            self.stdout.write(self.style.SUCCESS("✓ Samples discarded"))
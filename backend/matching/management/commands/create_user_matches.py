@@ -74,9 +74,7 @@ class Command(BaseCommand):
         with transaction.atomic():
             for mock_user in mock_users:
                 # Check if match already exists
-                existing_match = Match.objects.filter(
-                    Q(user1=user, user2=mock_user) | Q(user1=mock_user, user2=user)
-                ).first()
+                existing_match = Match.get_match_between(user, mock_user)
                 
                 if existing_match:
                     self.stdout.write(f"  🔄 Match already exists: {mock_user.username}")
@@ -115,6 +113,8 @@ class Command(BaseCommand):
                         message_type="text",
                         is_read=True,
                     )
+                conversation.mark_read(user.id)
+                conversation.mark_read(mock_user.id)
                 
                 self.stdout.write(
                     self.style.SUCCESS(f"  ➕ Created match: {user.username} <-> {mock_user.username}")
@@ -0,0 +1,73 @@
+"""
+Management command to pre-generate greeting pools for mock users.
+Usage: python manage.py fill_greeting_pools [username ...] [--size 10] [--refresh]
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from matching.greetings import fill_pools, greetings_enabled, pool_size
+from matching.mock_replies import MOCK_USER_PREFIX
+from matching.models import MockGreeting
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Pre-generate greetings for mock users so new matches don't wait on the model"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "usernames",
+            nargs="*",
+            help="Mock users to fill (default: all mock users)",
+        )
+        parser.add_argument(
+            "--size",
+            type=int,
+            default=None,
+            help="Greetings to keep per user (default: GREETING_POOL_SIZE)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Model requests in flight at once (default: 4)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=float,
+            default=2.0,
+            help="Maximum model requests started per second, 0 for no limit (default: 2)",
+        )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Discard existing greetings first, e.g. after editing personas",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if not greetings_enabled():
+            self.stdout.write(self.style.WARNING("⚠️ MOCK_GREETINGS is off, nothing to fill"))
+            return
+        mock_users = User.objects.filter(username__startswith=MOCK_USER_PREFIX).select_related(
+            "profile"
+        )
+        if options["usernames"]:
+            mock_users = mock_users.filter(username__in=options["usernames"])
+        users = list(mock_users)
+        if not users:
+            self.stdout.write(self.style.WARNING("⚠️ No mock users found"))
+            return
+
+        if options["refresh"]:
+            deleted, _ = MockGreeting.objects.filter(user__in=users).delete()
+            self.stdout.write(f"  🗑️ Discarded {deleted} greetings")
+
+        size = pool_size() if options["size"] is None else options["size"]
+        self.stdout.write(f"👋 Filling greeting pools for {len(users)} mock users (size {size})...")
+        created = fill_pools(
+            users, size=size, concurrency=options["concurrency"], rate=options["rate"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"✅ Generated {created} greetings"))
@@ -0,0 +1,27 @@
+"""
+Management command to delete sync change-log entries past their retention.
+Usage: python manage.py prune_change_log [--days 30]
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from matching.sync import prune_change_log
+
+
+class Command(BaseCommand):
+    help = "Delete change-log entries older than CHANGELOG_RETENTION_DAYS"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Keep this many days instead (default: CHANGELOG_RETENTION_DAYS)",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        deleted = prune_change_log(options["days"])
+        self.stdout.write(self.style.SUCCESS(f"✅ Pruned {deleted} change-log entries"))
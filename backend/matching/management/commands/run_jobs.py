@@ -0,0 +1,33 @@
+"""Management command to run queued background jobs in a dedicated process."""
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from matching.jobs import POLL_INTERVAL, run_pending
+
+
+class Command(BaseCommand):
+    """Process BackgroundJob rows until interrupted."""
+
+    help = "Run queued background jobs (mock replies etc.)"
+
+    def add_arguments(self, parser: Any) -> None:
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the jobs that are due now and exit",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["once"]:
+            count = run_pending()
+            self.stdout.write(self.style.SUCCESS(f"✓ Ran {count} jobs"))
+            return
+
+        self.stdout.write("⚙️  Running background jobs (Ctrl+C to stop)...")
+        while True:
+            if not run_pending():
+                time.sleep(POLL_INTERVAL)
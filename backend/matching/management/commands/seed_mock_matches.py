@@ -55,10 +55,7 @@ class Command(BaseCommand):
                     continue
                 
                 # Check if match already exists
-                existing_match = Match.objects.filter(
-                    user1__in=[user1, user2],
-                    user2__in=[user1, user2],
-                ).first()
+                existing_match = Match.get_match_between(user1, user2)
                 
                 if existing_match:
                     self.stdout.write(f"  🔄 Match exists: {user1_name} <-> {user2_name}")
@@ -101,6 +98,8 @@ class Command(BaseCommand):
                         message_type="text",
                         is_read=True,
                     )
+                conversation.mark_read(user1.id)
+                conversation.mark_read(user2.id)
                 
                 self.stdout.write(f"  ➕ Created match: {user1_name} <-> {user2_name}")
         
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_last_message(apps, schema_editor):
+    Conversation = apps.get_model("matching", "Conversation")
+    Message = apps.get_model("matching", "Message")
+    for conversation in Conversation.objects.all().iterator():
+        last = (
+            Message.objects.filter(conversation_id=conversation.pk)
+            .order_by("-sent_at", "-id")
+            .first()
+        )
+        if last is None:
+            continue
+        Conversation.objects.filter(pk=conversation.pk).update(
+            last_message=last,
+            last_message_text=(last.content or "")[:120],
+            last_message_at=last.sent_at,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0008_add_message_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='matching.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_text',
+            field=models.CharField(blank=True, max_length=120),
+        ),
+        migrations.RunPython(backfill_last_message, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:21
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def backfill_read_state(apps, schema_editor):
+    """Derive watermarks and counters from the legacy per-message is_read flags."""
+    Conversation = apps.get_model("matching", "Conversation")
+    Message = apps.get_model("matching", "Message")
+    for conversation in Conversation.objects.select_related("match").iterator():
+        match = conversation.match
+        updates = {}
+        for side, reader_id in (("user1", match.user1_id), ("user2", match.user2_id)):
+            incoming = Message.objects.filter(conversation_id=conversation.pk).exclude(
+                sender_id=reader_id
+            )
+            read = incoming.filter(is_read=True).aggregate(
+                last_id=Max("id"), last_at=Max("read_at")
+            )
+            updates[f"{side}_last_read_id"] = read["last_id"]
+            updates[f"{side}_last_read_at"] = read["last_at"]
+            updates[f"{side}_unread_count"] = incoming.filter(is_read=False).count()
+        Conversation.objects.filter(pk=conversation.pk).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0009_conversation_last_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='user1_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user1_last_read_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user1_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user2_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user2_last_read_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='user2_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_read_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+def backfill_pair_key(apps, schema_editor):
+    # The oldest match of a pair keeps the key; any duplicate stored in the
+    # reverse order is left NULL so the unique constraint can be added.
+    Match = apps.get_model("matching", "Match")
+    seen = set()
+    for match in Match.objects.order_by("id").iterator():
+        pair = tuple(sorted((match.user1_id, match.user2_id)))
+        if pair in seen:
+            continue
+        seen.add(pair)
+        Match.objects.filter(pk=match.pk).update(pair_low=pair[0], pair_high=pair[1])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0010_conversation_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='pair_high',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='pair_low',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_pair_key, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('pair_low', 'pair_high'), name='unique_match_pair'),
+        ),
+    ]
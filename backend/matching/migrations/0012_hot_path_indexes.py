@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0011_match_pair_key'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='match',
+            options={'verbose_name': 'Match', 'verbose_name_plural': 'Matches'},
+        ),
+        migrations.AlterModelOptions(
+            name='message',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='swipe',
+            options={},
+        ),
+        migrations.AddIndex(
+            model_name='block',
+            index=models.Index(fields=['blocked', 'blocker'], name='block_blocked_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['user1', 'is_active', '-matched_at'], name='match_user1_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['user2', 'is_active', '-matched_at'], name='match_user2_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'sent_at', 'id'], name='message_conv_sent_idx'),
+        ),
+    ]
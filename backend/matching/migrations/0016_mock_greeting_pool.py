@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 09:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('matching', '0015_conversation_summary_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MockGreeting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='greeting_pool', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:40
+
+from django.db import migrations, models
+
+
+def merge_reverse_duplicates(apps, schema_editor):
+    # 0011 left a match stored in the reverse order of an older one without a
+    # pair key. Fold each into the older match: its messages move to the
+    # older conversation (or its conversation moves over if there is none),
+    # then the duplicate is deleted.
+    Match = apps.get_model("matching", "Match")
+    Conversation = apps.get_model("matching", "Conversation")
+    Message = apps.get_model("matching", "Message")
+    preview_length = Conversation._meta.get_field("last_message_text").max_length
+
+    for duplicate in Match.objects.filter(pair_low__isnull=True).order_by("id").iterator():
+        low, high = sorted((duplicate.user1_id, duplicate.user2_id))
+        keeper = Match.objects.filter(pair_low=low, pair_high=high).first()
+        if keeper is None:
+            Match.objects.filter(pk=duplicate.pk).update(pair_low=low, pair_high=high)
+            continue
+
+        moved = Conversation.objects.filter(match=duplicate).first()
+        target = Conversation.objects.filter(match=keeper).first()
+        if moved is not None and target is None:
+            Conversation.objects.filter(pk=moved.pk).update(
+                match=keeper,
+                # The sides are swapped relative to the keeper's users
+                user1_last_read_id=moved.user2_last_read_id,
+                user1_last_read_at=moved.user2_last_read_at,
+                user1_unread_count=moved.user2_unread_count,
+                user2_last_read_id=moved.user1_last_read_id,
+                user2_last_read_at=moved.user1_last_read_at,
+                user2_unread_count=moved.user1_unread_count,
+            )
+        elif moved is not None:
+            Message.objects.filter(conversation=moved).update(conversation=target)
+            messages = Message.objects.filter(conversation=target)
+            last = messages.order_by("-sent_at", "-id").first()
+            target.last_message_id = last.id if last else None
+            target.last_message_text = (last.content or "")[:preview_length] if last else ""
+            target.last_message_at = last.sent_at if last else None
+            target.user1_unread_count = (
+                messages.exclude(sender_id=keeper.user1_id)
+                .filter(id__gt=target.user1_last_read_id or 0)
+                .count()
+            )
+            target.user2_unread_count = (
+                messages.exclude(sender_id=keeper.user2_id)
+                .filter(id__gt=target.user2_last_read_id or 0)
+                .count()
+            )
+            target.save(
+                update_fields=[
+                    "last_message_id",
+                    "last_message_text",
+                    "last_message_at",
+                    "user1_unread_count",
+                    "user2_unread_count",
+                ]
+            )
+            moved.delete()
+        duplicate.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matching', '0016_mock_greeting_pool'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_reverse_duplicates, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='match',
+            name='pair_high',
+            field=models.PositiveBigIntegerField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='match',
+            name='pair_low',
+            field=models.PositiveBigIntegerField(editable=False),
+        ),
+    ]
@@ -0,0 +1,131 @@
+"""
+AI replies from ``mock_`` users, generated off the request thread.
+
+``ConversationMessagesView`` enqueues a ``mock_reply`` job when a real user
+writes to a mock user; the job generates the reply and saves it as a normal
+message, so it reaches the client through the WebSocket push, delta sync or
+the next message poll. A client can instead stream the reply as it is
+generated (see ``matching.streaming``), which takes the job over.
+"""
+from __future__ import annotations
+
+import logging
+import random
+from typing import Any, Optional
+
+from django.conf import settings
+
+from users.models import User
+
+from .ai_client import AIUnavailableError
+from .circuit_breaker import breaker_open
+from .context_window import build_context
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+MOCK_USER_PREFIX = "mock_"
+
+# Seconds a reply queued for streaming waits for the client to open the stream
+STREAM_CLAIM_WINDOW = 15
+
+# Delivery delay range in seconds per response_pace, when pacing is enabled
+PACE_DELAYS: dict[str, tuple[float, float]] = {
+    "quick": (2, 5),
+    "moderate": (10, 30),
+    "slow": (30, 90),
+    "variable": (5, 60),
+}
+
+
+def is_mock_user(user: Optional[User]) -> bool:
+    return bool(user and user.username.startswith(MOCK_USER_PREFIX))
+
+
+def reply_delay(mock_user: User) -> float:
+    """Seconds to wait before replying, from the profile's response_pace."""
+    if not getattr(settings, "MOCK_REPLY_HONOR_PACE", False):
+        return 0
+    try:
+        pace = mock_user.profile.response_pace
+    except Exception:
+        return 0
+    low, high = PACE_DELAYS.get(pace, (0, 0))
+    return random.uniform(low, high)
+
+
+def prepare_mock_reply(
+    conversation_id: int, sender_id: int, message_id: int
+) -> Optional[tuple[Conversation, User, dict[str, Any]]]:
+    """
+    Load what the mock partner needs to answer ``message_id``.
+
+    Returns the conversation, the mock user and the keyword arguments for
+    ``generate_ai_response``/``ai_response_request``, or None when there is
+    nothing to reply to.
+    """
+    conversation = (
+        Conversation.objects.filter(id=conversation_id)
+        .select_related("match__user1__profile", "match__user2__profile")
+        .first()
+    )
+    if conversation is None:
+        return None  # Unmatched in the meantime
+    match = conversation.match
+    sender, other_user = (
+        (match.user1, match.user2) if match.user1_id == sender_id else (match.user2, match.user1)
+    )
+    if not is_mock_user(other_user):
+        return None
+
+    try:
+        mock_profile = other_user.profile
+    except Exception:
+        return None
+
+    real_user_profile = None
+    try:
+        real_user_profile = sender.profile
+    except Exception:
+        pass  # Continue without real user context
+
+    user_message = (
+        Message.objects.filter(id=message_id).values_list("content", flat=True).first() or ""
+    )
+
+    # Recent turns before the new message, which is sent separately
+    context = build_context(conversation, sender.id, before_id=message_id)
+
+    return conversation, other_user, {
+        "mock_profile": mock_profile,
+        "user_message": user_message,
+        "conversation_history": context.turns,
+        "real_user_profile": real_user_profile,
+        "memory": context.memory,
+    }
+
+
+def save_mock_reply(conversation: Conversation, mock_user: User, text: str) -> Message:
+    # Create the AI response as a message from the mock user
+    return Message.objects.create(
+        conversation=conversation,
+        sender=mock_user,
+        content=text,
+    )
+
+
+def deliver_mock_reply(conversation_id: int, sender_id: int, message_id: int) -> None:
+    """Generate and save the mock partner's reply to ``message_id``."""
+    from .ai_service import generate_ai_response
+
+    prepared = prepare_mock_reply(conversation_id, sender_id, message_id)
+    if prepared is None:
+        return
+    conversation, mock_user, inputs = prepared
+
+    ai_response = generate_ai_response(**inputs)
+    if ai_response:
+        save_mock_reply(conversation, mock_user, ai_response)
+    elif breaker_open():
+        # Let the job retry once the provider has had time to recover
+        raise AIUnavailableError("AI circuit breaker is open")
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Optional
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Optional
 
 from django.conf import settings
 from django.db import models
-from django.db.models import Q
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
 if TYPE_CHECKING:
     from users.models import User
 
 
+PREVIEW_LENGTH = 120
+
+
 class Swipe(models.Model):
     """Records user swipes (pass/like/super-like)."""
 
@@ -33,8 +38,9 @@ class Swipe(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # The unique index also serves the mutual-like and "already swiped"
+        # lookups, which always lead with from_user.
         unique_together = ["from_user", "to_user"]
-        ordering = ["-created_at"]
 
     def __str__(self) -> str:
         return f"{self.from_user} -> {self.to_user}: {self.action}"
@@ -69,21 +75,51 @@ class Match(models.Model):
     # Full compatibility breakdown stored as JSON
     compatibility_breakdown = models.JSONField(default=dict, blank=True)
 
+    # Canonical (lower id, higher id) pair, set on save. Unique, so the same
+    # two users can only be matched once whichever order they are stored in.
+    pair_low = models.PositiveBigIntegerField(editable=False)
+    pair_high = models.PositiveBigIntegerField(editable=False)
+
     class Meta:
         unique_together = ["user1", "user2"]
-        ordering = ["-matched_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["pair_low", "pair_high"], name="unique_match_pair"
+            ),
+        ]
+        indexes = [
+            # Active matches of a user, newest first, from either side
+            models.Index(
+                fields=["user1", "is_active", "-matched_at"], name="match_user1_active_idx"
+            ),
+            models.Index(
+                fields=["user2", "is_active", "-matched_at"], name="match_user2_active_idx"
+            ),
+        ]
         verbose_name = "Match"
         verbose_name_plural = "Matches"
 
     def __str__(self) -> str:
         return f"Match: {self.user1} & {self.user2}"
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        pair = Match.pair_lookup(self.user1_id, self.user2_id)
+        self.pair_low, self.pair_high = pair["pair_low"], pair["pair_high"]
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "pair_low", "pair_high"}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def pair_lookup(user1_id: int, user2_id: int) -> dict[str, int]:
+        """Filter kwargs matching the pair of two user ids, in either order."""
+        low, high = sorted((user1_id, user2_id))
+        return {"pair_low": low, "pair_high": high}
+
     @staticmethod
     def get_match_between(user1: User, user2: User) -> Optional[Match]:
         """Get match between two users, regardless of order."""
-        return Match.objects.filter(
-            Q(user1=user1, user2=user2) | Q(user1=user2, user2=user1)
-        ).first()
+        return Match.objects.filter(**Match.pair_lookup(user1.id, user2.id)).first()
 
 
 class Conversation(models.Model):
@@ -95,6 +131,27 @@ class Conversation(models.Model):
         related_name="conversation",
     )
 
+    # Denormalized copy of the newest message, maintained by record_message()
+    last_message = models.ForeignKey(
+        "Message",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_message_text = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    # Per-participant read watermarks and unread counters, one set per match
+    # side. A message is read by its recipient once its id is at or below the
+    # recipient's last_read_id.
+    user1_last_read_id = models.BigIntegerField(null=True, blank=True)
+    user1_last_read_at = models.DateTimeField(null=True, blank=True)
+    user1_unread_count = models.PositiveIntegerField(default=0)
+    user2_last_read_id = models.BigIntegerField(null=True, blank=True)
+    user2_last_read_at = models.DateTimeField(null=True, blank=True)
+    user2_unread_count = models.PositiveIntegerField(default=0)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -104,9 +161,115 @@ class Conversation(models.Model):
     def __str__(self) -> str:
         return f"Conversation for {self.match}"
 
-    @property
-    def last_message(self) -> Optional[Message]:
-        return self.messages.order_by("-sent_at").first()
+    def side_for(self, user_id: int) -> str:
+        """Return ``"user1"`` or ``"user2"`` for a participant."""
+        return "user1" if self.match.user1_id == user_id else "user2"
+
+    def unread_count_for(self, user_id: int) -> int:
+        count: int = getattr(self, f"{self.side_for(user_id)}_unread_count")
+        return count
+
+    def read_watermarks(self) -> dict[int, tuple[Optional[int], Optional[datetime]]]:
+        """
+        Map each sender id to how far the *other* participant has read.
+
+        Messages from a sender are read if their id is at or below the
+        returned watermark id; the timestamp is when that watermark was set.
+        """
+        match = self.match
+        return {
+            match.user1_id: (self.user2_last_read_id, self.user2_last_read_at),
+            match.user2_id: (self.user1_last_read_id, self.user1_last_read_at),
+        }
+
+    def participant_names(self) -> dict[int, str]:
+        """
+        Map both participants' ids to their display names.
+
+        Select ``match__user1__profile`` and ``match__user2__profile`` to
+        resolve this without extra queries.
+        """
+        names: dict[int, str] = {}
+        for user in (self.match.user1, self.match.user2):
+            profile = getattr(user, "profile", None)
+            names[user.id] = (profile.display_name if profile else "") or user.username
+        return names
+
+    def record_message(self, message: Message) -> None:
+        """Update the denormalized last-message fields and the recipient's unread counter."""
+        from django.utils import timezone
+
+        recipient_side = "user2" if self.side_for(message.sender_id) == "user1" else "user1"
+        unread_field = f"{recipient_side}_unread_count"
+        fields = {
+            "last_message": message,
+            "last_message_text": (message.content or "")[:PREVIEW_LENGTH],
+            "last_message_at": message.sent_at,
+            "updated_at": timezone.now(),
+        }
+        Conversation.objects.filter(pk=self.pk).update(**{unread_field: F(unread_field) + 1})
+        # Only move forward, so an out-of-order insert never rewinds the pointer
+        Conversation.objects.filter(pk=self.pk).filter(
+            Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.sent_at)
+        ).update(**fields)
+        for name, value in fields.items():
+            setattr(self, name, value)
+        setattr(self, unread_field, getattr(self, unread_field) + 1)
+
+    def mark_read(self, user_id: int, up_to_id: Optional[int] = None) -> bool:
+        """
+        Advance a participant's read watermark with a single-row update.
+
+        Marks everything up to ``up_to_id`` (default: the last message) as
+        read. Returns False if there was nothing new to mark.
+        """
+        from django.utils import timezone
+
+        if up_to_id is None:
+            up_to_id = self.last_message_id
+        if up_to_id is None:
+            return False
+        side = self.side_for(user_id)
+        current: Optional[int] = getattr(self, f"{side}_last_read_id")
+        if current is not None and current >= up_to_id:
+            return False
+
+        # Recount only what lies beyond the new watermark (normally nothing),
+        # inside the same UPDATE so a message racing in is never lost.
+        remaining = (
+            Message.objects.filter(conversation=OuterRef("pk"), id__gt=up_to_id)
+            .exclude(sender_id=user_id)
+            .order_by()
+            .values("conversation")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        unread_field = f"{side}_unread_count"
+        fields: dict[str, Any] = {
+            f"{side}_last_read_id": up_to_id,
+            f"{side}_last_read_at": timezone.now(),
+        }
+        updated = (
+            Conversation.objects.filter(pk=self.pk)
+            .filter(
+                Q(**{f"{side}_last_read_id__isnull": True})
+                | Q(**{f"{side}_last_read_id__lt": up_to_id})
+            )
+            .update(**fields, **{unread_field: Coalesce(Subquery(remaining), 0)})
+        )
+        if not updated:
+            return False
+        from .sync import record_changes
+
+        match = self.match
+        record_changes([match.user1_id, match.user2_id], ChangeLogEntry.KIND_READ, self.pk)
+        for name, value in fields.items():
+            setattr(self, name, value)
+        if up_to_id == self.last_message_id:
+            setattr(self, unread_field, 0)
+        else:
+            self.refresh_from_db(fields=[unread_field])
+        return True
 
 
 class Message(models.Model):
@@ -153,18 +316,22 @@ class Message(models.Model):
     sent_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ["sent_at"]
+        indexes = [
+            # Keyset pagination and "latest N messages" per conversation
+            models.Index(
+                fields=["conversation", "sent_at", "id"], name="message_conv_sent_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"Message from {self.sender} at {self.sent_at}"
 
     def mark_as_read(self) -> None:
-        if not self.is_read:
-            from django.utils import timezone
-
-            self.is_read = True
-            self.read_at = timezone.now()
-            self.save()
+        """Mark this message (and everything before it) read by its recipient."""
+        conversation = self.conversation
+        match = conversation.match
+        recipient_id = match.user2_id if self.sender_id == match.user1_id else match.user1_id
+        conversation.mark_read(recipient_id, up_to_id=self.id)
 
 
 class ShortcutResponse(models.Model):
@@ -215,6 +382,164 @@ class Block(models.Model):
 
     class Meta:
         unique_together = ["blocker", "blocked"]
+        indexes = [
+            # Covers "who blocked me" without touching the table
+            models.Index(fields=["blocked", "blocker"], name="block_blocked_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.blocker} blocked {self.blocked}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Append-only log of changes each user's clients need to sync.
+
+    The auto-increment id is the sync sequence: ``/api/sync/?since=<id>``
+    returns whatever was logged for the user after that id.
+    """
+
+    KIND_MATCH = "match"
+    KIND_UNMATCH = "unmatch"
+    KIND_MESSAGE = "message"
+    KIND_READ = "read"
+    KIND_PROFILE = "profile"
+    KIND_CHOICES: list[tuple[str, str]] = [
+        (KIND_MATCH, "New match"),
+        (KIND_UNMATCH, "Unmatch"),
+        (KIND_MESSAGE, "New message"),
+        (KIND_READ, "Read state"),
+        (KIND_PROFILE, "Profile update"),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    # Match id, message id, conversation id or profile id, depending on kind
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "id"], name="changelog_user_seq_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.id} {self.kind} {self.object_id} for {self.user_id}"
+
+
+class BackgroundJob(models.Model):
+    """
+    A unit of deferred work, run by the in-process worker in ``matching.jobs``.
+
+    Jobs live in the database so they survive restarts and can be picked up
+    by any worker process; no external broker is needed.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES: list[tuple[str, str]] = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_DONE, "Done"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    run_after = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="job_status_due_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} #{self.id} ({self.status})"
+
+
+class ConversationSummaryState(models.Model):
+    """
+    The latest AI summary of a conversation for one participant and language.
+
+    ``last_message_id``/``last_message_at`` mark the newest message the
+    summary covers, so the next update only needs the messages after it.
+    """
+
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="summary_states",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    language = models.CharField(max_length=10, default="en")
+    summary = models.TextField(blank=True, default="")
+    last_message_id = models.BigIntegerField(null=True, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["conversation", "user", "language"],
+                name="unique_summary_state",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"Summary of {self.conversation_id} for {self.user_id} ({self.language})"
+
+
+class MockGreeting(models.Model):
+    """
+    A pre-generated first message from a mock user.
+
+    Greetings depend only on the mock user's persona, so they are generated
+    ahead of time (``manage.py fill_greeting_pools``) and each new match
+    takes one from the pool; see ``matching.greetings``.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="greeting_pool",
+    )
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"Greeting #{self.id} from {self.user_id}"
+
+
+class RealtimeEvent(models.Model):
+    """
+    A chat event relayed between processes by ``DatabaseChannelLayer``.
+
+    Rows only live long enough for every process to poll them; see
+    ``matching.realtime``.
+    """
+
+    group = models.CharField(max_length=100)
+    # The process that published the event (it delivers to its own sockets directly)
+    origin = models.CharField(max_length=100)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f"Event #{self.id} for {self.group}"
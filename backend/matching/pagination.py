@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime
+from typing import Any, Optional, Sequence, cast
+
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Message
+
+Cursor = tuple[datetime, int]
+
+
+def encode_cursor(sent_at: datetime, message_id: int) -> str:
+    raw = f"{sent_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _message_cursor(message: Message) -> str:
+    return encode_cursor(message.sent_at, message.id)
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        sent_at, message_id = base64.urlsafe_b64decode(value.encode()).decode().split("|")
+        return datetime.fromisoformat(sent_at), int(message_id)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise NotFound("Invalid cursor") from exc
+
+
+class MessageKeysetPagination(BasePagination):
+    """
+    Keyset pagination over (sent_at, id) for conversation messages.
+
+    Without parameters it returns the newest page. Each page's ``results``
+    are in chronological order so they can be rendered as-is.
+
+    - ``?before=<cursor>`` returns the page of older messages before the cursor.
+    - ``?after=<cursor>`` returns messages newer than the cursor, oldest first.
+    - ``?since=<message id>`` is the same as ``after``, anchored on a message
+      id the client already has. This is the cheap incremental sync for polling.
+
+    The response includes ``before`` (the cursor for older history, or null
+    when there is none), ``after`` (the cursor to poll with next) and
+    ``has_more``. No COUNT(*) or OFFSET is ever issued.
+    """
+
+    page_size = 50
+    max_page_size = 100
+    page_size_query_param = "page_size"
+
+    page: list[Message]
+    has_more: bool
+    older_cursor: Optional[str]
+    newer_cursor: Optional[str]
+
+    def get_page_size(self, request: Request) -> int:
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, ""))
+        except ValueError:
+            return self.page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def _since_cursor(self, queryset: QuerySet[Message], value: str) -> Cursor:
+        try:
+            message_id = int(value)
+        except ValueError as exc:
+            raise NotFound("Invalid since id") from exc
+        sent_at: Optional[datetime] = (
+            queryset.filter(id=message_id).values_list("sent_at", flat=True).first()
+        )
+        if sent_at is None:
+            raise NotFound("Invalid since id")
+        return sent_at, message_id
+
+    def paginate_queryset(
+        self,
+        queryset: QuerySet[Any, Any] | Sequence[Any],
+        request: Request,
+        view: Optional[APIView] = None,
+    ) -> Optional[list[Any]]:
+        if not isinstance(queryset, QuerySet):
+            raise TypeError("MessageKeysetPagination needs a queryset")
+        messages = cast("QuerySet[Message]", queryset)
+        size = self.get_page_size(request)
+        params = request.query_params
+
+        after: Optional[Cursor] = None
+        if params.get("since"):
+            after = self._since_cursor(messages, params["since"])
+        elif params.get("after"):
+            after = decode_cursor(params["after"])
+
+        if after is not None:
+            sent_at, message_id = after
+            rows = list(
+                messages.filter(
+                    Q(sent_at__gt=sent_at) | Q(sent_at=sent_at, id__gt=message_id)
+                ).order_by("sent_at", "id")[: size + 1]
+            )
+            self.has_more = len(rows) > size
+            self.page = rows[:size]
+            self.older_cursor = None
+            self.newer_cursor = (
+                _message_cursor(self.page[-1]) if self.page else encode_cursor(*after)
+            )
+            return self.page
+
+        if params.get("before"):
+            sent_at, message_id = decode_cursor(params["before"])
+            messages = messages.filter(
+                Q(sent_at__lt=sent_at) | Q(sent_at=sent_at, id__lt=message_id)
+            )
+        rows = list(messages.order_by("-sent_at", "-id")[: size + 1])
+        self.has_more = len(rows) > size
+        self.page = list(reversed(rows[:size]))
+        self.older_cursor = _message_cursor(self.page[0]) if self.has_more else None
+        self.newer_cursor = _message_cursor(self.page[-1]) if self.page else None
+        return self.page
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response(
+            {
+                "results": data,
+                "before": self.older_cursor,
+                "after": self.newer_cursor,
+                "has_more": self.has_more,
+            }
+        )
@@ -0,0 +1,73 @@
+"""
+Batched typing and online state for a user's conversations.
+
+Each user's conversation -> partner map is cached so a presence poll needs
+no database access at all: one ``get_many`` reads every partner's typing and
+online keys. The map is dropped whenever a conversation is created or
+deleted, or a match is deactivated.
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from django.db.models import Q
+
+from .models import Conversation
+from .realtime import get_presence_cache, typing_key
+
+PARTNERS_TIMEOUT = 60 * 10
+
+# A user counts as online for this long after their last presence poll
+ONLINE_TIMEOUT = 60
+
+
+def _partners_key(user_id: int) -> str:
+    return f"presence:partners:{user_id}"
+
+
+def online_key(user_id: int) -> str:
+    return f"presence:online:{user_id}"
+
+
+def mark_online(user_id: int) -> None:
+    get_presence_cache().set(online_key(user_id), True, timeout=ONLINE_TIMEOUT)
+
+
+def conversation_partners(user_id: int) -> dict[int, int]:
+    """Map each of the user's active conversation ids to the partner's user id."""
+    partners: Optional[dict[int, int]] = get_presence_cache().get(_partners_key(user_id))
+    if partners is None:
+        rows = (
+            Conversation.objects.filter(
+                Q(match__user1_id=user_id) | Q(match__user2_id=user_id),
+                match__is_active=True,
+            )
+            .values_list("id", "match__user1_id", "match__user2_id")
+        )
+        partners = {
+            conversation_id: user2_id if user1_id == user_id else user1_id
+            for conversation_id, user1_id, user2_id in rows
+        }
+        get_presence_cache().set(_partners_key(user_id), partners, timeout=PARTNERS_TIMEOUT)
+    return partners
+
+
+def invalidate_conversation_partners(user_ids: Iterable[int]) -> None:
+    get_presence_cache().delete_many([_partners_key(user_id) for user_id in user_ids])
+
+
+def presence_for(user_id: int) -> list[dict[str, object]]:
+    """Typing and online state of the partner in each active conversation."""
+    partners = conversation_partners(user_id)
+    keys = [typing_key(cid, pid) for cid, pid in partners.items()]
+    keys += [online_key(pid) for pid in set(partners.values())]
+    found = get_presence_cache().get_many(keys)
+    return [
+        {
+            "conversation_id": conversation_id,
+            "user_id": partner_id,
+            "is_typing": bool(found.get(typing_key(conversation_id, partner_id))),
+            "is_online": bool(found.get(online_key(partner_id))),
+        }
+        for conversation_id, partner_id in partners.items()
+    ]
@@ -0,0 +1,279 @@
+"""
+Channel layer for pushing chat events to connected WebSocket clients.
+
+Every connection of a user subscribes to the group ``user.<id>``; the app
+publishes events for a conversation to both participants' groups. The layer
+is chosen by ``settings.REALTIME_CHANNEL_LAYER`` (a dotted path):
+
+- ``InMemoryChannelLayer`` only reaches sockets served by the same process,
+  which is enough for ``runserver`` and tests.
+- ``DatabaseChannelLayer`` (the production default) also relays events
+  through the ``RealtimeEvent`` table, so sockets on other web workers and
+  events published by ``manage.py run_jobs`` are reached too. Each process
+  polls the table every ``RELAY_POLL_INTERVAL`` seconds.
+
+``publish`` is safe to call from sync code (views, signals) running in any
+thread.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+Event = dict[str, Any]
+
+# Events that pile up for a slow socket are dropped past this many
+MAX_PENDING_EVENTS = 256
+
+# Typing flags expire on their own in case the "stopped typing" event is lost
+TYPING_TIMEOUT = 8
+
+# Cache alias for typing and presence state (see settings.CACHES)
+PRESENCE_CACHE = "presence"
+
+# DatabaseChannelLayer: seconds between polls, rows read per poll, and how
+# long relayed events are kept
+RELAY_POLL_INTERVAL = 0.5
+RELAY_BATCH_SIZE = 500
+RELAY_EVENT_TTL = timedelta(minutes=1)
+
+
+def get_presence_cache() -> BaseCache:
+    return caches[PRESENCE_CACHE]
+
+
+def user_group(user_id: int) -> str:
+    return f"user.{user_id}"
+
+
+def typing_key(conversation_id: int, user_id: int) -> str:
+    return f"typing:{conversation_id}:{user_id}"
+
+
+def set_typing(conversation_id: int, user_id: int, is_typing: bool) -> None:
+    """Store a typing flag for the polling endpoint."""
+    key = typing_key(conversation_id, user_id)
+    if is_typing:
+        get_presence_cache().set(key, True, timeout=TYPING_TIMEOUT)
+    else:
+        get_presence_cache().delete(key)
+
+
+class BaseChannelLayer:
+    """Interface for channel layer backends."""
+
+    def subscribe(self, group: str) -> asyncio.Queue[Event]:
+        """Start receiving a group's events on a new queue (call from the event loop)."""
+        raise NotImplementedError
+
+    def unsubscribe(self, group: str, queue: asyncio.Queue[Event]) -> None:
+        raise NotImplementedError
+
+    def group_send(self, group: str, event: Event) -> None:
+        """Deliver ``event`` to every subscriber of ``group``."""
+        raise NotImplementedError
+
+    def has_subscribers(self, group: str) -> bool:
+        """Whether ``group`` may have subscribers; layers that cannot tell say True."""
+        return True
+
+
+class InMemoryChannelLayer(BaseChannelLayer):
+    """Process-local layer: subscribers are asyncio queues on their own loops."""
+
+    def __init__(self) -> None:
+        self._groups: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue[Event]]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, group: str) -> asyncio.Queue[Event]:
+        queue: asyncio.Queue[Event] = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        with self._lock:
+            self._groups.setdefault(group, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, group: str, queue: asyncio.Queue[Event]) -> None:
+        with self._lock:
+            members = self._groups.get(group, set())
+            for member in [m for m in members if m[1] is queue]:
+                members.discard(member)
+            if not members:
+                self._groups.pop(group, None)
+
+    def has_subscribers(self, group: str) -> bool:
+        with self._lock:
+            return bool(self._groups.get(group))
+
+    def group_send(self, group: str, event: Event) -> None:
+        with self._lock:
+            members = list(self._groups.get(group, ()))
+        for loop, queue in members:
+            try:
+                loop.call_soon_threadsafe(_put, queue, event)
+            except RuntimeError:  # The socket's loop has already closed
+                self.unsubscribe(group, queue)
+
+
+class DatabaseChannelLayer(InMemoryChannelLayer):
+    """
+    Process-local delivery plus a relay through the ``RealtimeEvent`` table.
+
+    ``group_send`` delivers to this process's sockets right away and stores
+    the event for the other processes, whose relay threads pick it up on
+    their next poll. Call it from sync code only.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.origin = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._relay: Optional[threading.Thread] = None
+        self._closed = threading.Event()
+
+    def subscribe(self, group: str) -> asyncio.Queue[Event]:
+        queue = super().subscribe(group)
+        with self._lock:
+            if not self._closed.is_set() and (self._relay is None or not self._relay.is_alive()):
+                self._relay = threading.Thread(
+                    target=self._run_relay,
+                    args=(timezone.now(),),
+                    name="realtime-relay",
+                    daemon=True,
+                )
+                self._relay.start()
+        return queue
+
+    def has_subscribers(self, group: str) -> bool:
+        return True  # Other processes' sockets are unknown here
+
+    def close(self) -> None:
+        """Stop relaying events from other processes."""
+        self._closed.set()
+
+    def group_send(self, group: str, event: Event) -> None:
+        from .models import RealtimeEvent
+
+        super().group_send(group, event)
+        RealtimeEvent.objects.create(group=group, origin=self.origin, payload=event)
+
+    def _run_relay(self, started: datetime) -> None:
+        from .models import RealtimeEvent
+
+        # Events from before the first subscription predate this process's sockets
+        pruned_at = started
+        cursor = 0
+        while not self._closed.wait(RELAY_POLL_INTERVAL):
+            close_old_connections()
+            try:
+                rows = list(
+                    RealtimeEvent.objects.filter(id__gt=cursor, created_at__gte=started)
+                    .order_by("id")
+                    .values_list("id", "group", "origin", "payload")[:RELAY_BATCH_SIZE]
+                )
+                for event_id, group, origin, payload in rows:
+                    cursor = event_id
+                    if origin != self.origin:
+                        super().group_send(group, payload)
+                if timezone.now() - pruned_at > RELAY_EVENT_TTL:
+                    pruned_at = timezone.now()
+                    RealtimeEvent.objects.filter(
+                        created_at__lt=pruned_at - RELAY_EVENT_TTL
+                    ).delete()
+            except Exception as e:
+                logger.error(f"Realtime relay error: {e}")
+            finally:
+                close_old_connections()
+
+
+def _put(queue: asyncio.Queue[Event], event: Event) -> None:
+    try:
+        queue.put_nowait(event)
+    except asyncio.QueueFull:
+        logger.warning("Dropping realtime event %s for a slow consumer", event.get("type"))
+
+
+_layer: Optional[BaseChannelLayer] = None
+_layer_lock = threading.Lock()
+
+
+def get_channel_layer() -> BaseChannelLayer:
+    global _layer
+    if _layer is None:
+        with _layer_lock:
+            if _layer is None:
+                backend = getattr(
+                    settings, "REALTIME_CHANNEL_LAYER", "matching.realtime.InMemoryChannelLayer"
+                )
+                _layer = import_string(backend)()
+    return _layer
+
+
+def publish(user_ids: Iterable[int], event: Event) -> None:
+    """Push an event to every connected socket of the given users."""
+    layer = get_channel_layer()
+    for user_id in set(user_ids):
+        try:
+            layer.group_send(user_group(user_id), event)
+        except Exception as e:
+            # Realtime delivery is best-effort; clients resync over HTTP.
+            logger.error(f"Failed to publish realtime event: {e}")
+
+
+def publish_typing(conversation_id: int, user_id: int, partner_id: int, is_typing: bool) -> None:
+    publish(
+        [partner_id],
+        {
+            "type": "typing",
+            "conversation_id": conversation_id,
+            "user_id": user_id,
+            "is_typing": is_typing,
+        },
+    )
+
+
+def publish_read(conversation: Any, user_id: int) -> None:
+    """Tell both participants how far ``user_id`` has read."""
+    side = conversation.side_for(user_id)
+    last_read_at = getattr(conversation, f"{side}_last_read_at")
+    publish(
+        [conversation.match.user1_id, conversation.match.user2_id],
+        {
+            "type": "read",
+            "conversation_id": conversation.id,
+            "user_id": user_id,
+            "last_read_id": getattr(conversation, f"{side}_last_read_id"),
+            "read_at": last_read_at.isoformat() if last_read_at else None,
+        },
+    )
+
+
+def publish_message(message: Any) -> None:
+    """Push a newly sent message to both participants, if either is connected."""
+    from .serializers import MessageSerializer
+
+    conversation = message.conversation
+    match = conversation.match
+    layer = get_channel_layer()
+    if not any(
+        layer.has_subscribers(user_group(user_id)) for user_id in (match.user1_id, match.user2_id)
+    ):
+        return  # Nobody to push to, so skip serializing
+    data = MessageSerializer(
+        message, context={"read_watermarks": conversation.read_watermarks()}
+    ).data
+    publish(
+        [match.user1_id, match.user2_id],
+        {"type": "message", "conversation_id": conversation.id, "message": dict(data)},
+    )
@@ -4,7 +4,8 @@ from typing import Any, Optional
 
 from rest_framework import serializers
 
-from profiles.serializers import ProfileCardSerializer
+from profiles.cards import render_profile_card, render_profile_cards
+from profiles.fieldsets import SparseFieldsetMixin, wants
 from users.models import User
 from users.serializers import UserSerializer
 
@@ -20,7 +21,35 @@ class SwipeSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
         read_only_fields: list[str] = ["id", "created_at"]
 
 
-class MatchSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+def _other_user(match: Match, user: User) -> User:
+    return match.user2 if match.user1_id == user.id else match.user1
+
+
+def _warm_other_profile_cards(
+    matches: list[Match], context: dict[str, Any], fieldset: Any
+) -> None:
+    """Render the other side's cards for a page of matches in one batch."""
+    request = context.get("request")
+    if not request or not wants(fieldset, "other_profile"):
+        return
+    profiles = []
+    for match in matches:
+        other = _other_user(match, request.user)
+        if hasattr(other, "profile"):
+            profiles.append(other.profile)
+    render_profile_cards(profiles, context)
+
+
+class MatchListSerializer(serializers.ListSerializer):  # type: ignore[type-arg]
+    """Batches card rendering for every match in the list."""
+
+    def to_representation(self, data: Any) -> list[Any]:
+        matches = list(data.all() if hasattr(data, "all") else data)
+        _warm_other_profile_cards(matches, self.context, self.child.fieldset)
+        return super().to_representation(matches)
+
+
+class MatchSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for matches."""
 
     other_user = serializers.SerializerMethodField()
@@ -41,17 +70,18 @@ class MatchSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
             "compatibility_breakdown",
             "is_active",
         ]
+        list_serializer_class = MatchListSerializer
 
     def get_other_user(self, obj: Match) -> dict[str, Any]:
-        request_user: User = self.context["request"].user
-        other: User = obj.user2 if obj.user1 == request_user else obj.user1
+        other = _other_user(obj, self.context["request"].user)
         return dict(UserSerializer(other).data)
 
     def get_other_profile(self, obj: Match) -> Optional[dict[str, Any]]:
-        request_user: User = self.context["request"].user
-        other: User = obj.user2 if obj.user1 == request_user else obj.user1
+        other = _other_user(obj, self.context["request"].user)
         if hasattr(other, "profile"):
-            return dict(ProfileCardSerializer(other.profile, context=self.context).data)
+            return render_profile_card(
+                other.profile, self.context, self.sub_fieldset("other_profile")
+            )
         return None
 
     def get_conversation_id(self, obj: Match) -> Optional[int]:
@@ -64,11 +94,13 @@ class MatchSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
             return conversation.id  # type: ignore[attr-defined]
 
 
-class MessageSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class MessageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for chat messages."""
 
     sender_name = serializers.SerializerMethodField()
     is_mine = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
+    read_at = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
@@ -90,6 +122,10 @@ class MessageSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
         read_only_fields: list[str] = ["id", "sender", "is_read", "read_at", "sent_at"]
 
     def get_sender_name(self, obj: Message) -> str:
+        # Message list views resolve both participants once per request
+        names: Optional[dict[int, str]] = self.context.get("participant_names")
+        if names is not None and obj.sender_id in names:
+            return names[obj.sender_id]
         try:
             if hasattr(obj.sender, "profile") and obj.sender.profile:
                 return obj.sender.profile.display_name or obj.sender.username
@@ -100,9 +136,38 @@ class MessageSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
     def get_is_mine(self, obj: Message) -> bool:
         request = self.context.get("request")
         if request:
-            return bool(obj.sender == request.user)
+            return bool(obj.sender_id == request.user.id)
         return False
 
+    def _read_watermark(self, obj: Message) -> Optional[tuple[Optional[int], Any]]:
+        """
+        Return the recipient's (last_read_id, last_read_at) for this message.
+
+        Views pass ``read_watermarks`` (sender id -> watermark) in the context;
+        otherwise the message's cached conversation is used.
+        """
+        watermarks: Optional[dict[int, Any]] = self.context.get("read_watermarks")
+        if watermarks is None and Message.conversation.is_cached(obj):  # type: ignore[attr-defined]
+            watermarks = obj.conversation.read_watermarks()
+        if watermarks is None:
+            return None
+        return watermarks.get(obj.sender_id)
+
+    def get_is_read(self, obj: Message) -> bool:
+        watermark = self._read_watermark(obj)
+        if watermark is None:
+            return obj.is_read
+        last_read_id = watermark[0]
+        return last_read_id is not None and obj.id <= last_read_id
+
+    def get_read_at(self, obj: Message) -> Any:
+        watermark = self._read_watermark(obj)
+        if watermark is None:
+            return obj.read_at
+        if not self.get_is_read(obj):
+            return None
+        return serializers.DateTimeField().to_representation(watermark[1]) if watermark[1] else None
+
 
 class VoiceMessageSerializer(serializers.Serializer):  # type: ignore[type-arg]
     """Serializer for voice message upload."""
@@ -157,7 +222,22 @@ class ShortcutSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
         return value
 
 
-class ConversationSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class ConversationListSerializer(serializers.ListSerializer):  # type: ignore[type-arg]
+    """Batches card rendering for every conversation in the list."""
+
+    def to_representation(self, data: Any) -> list[Any]:
+        conversations = list(data.all() if hasattr(data, "all") else data)
+        fieldset = self.child.fieldset
+        if wants(fieldset, "match"):
+            _warm_other_profile_cards(
+                [conversation.match for conversation in conversations],
+                self.context,
+                self.child.sub_fieldset("match"),
+            )
+        return super().to_representation(conversations)
+
+
+class ConversationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for conversations."""
 
     match = MatchSerializer(read_only=True)
@@ -170,15 +250,24 @@ class ConversationSerializer(serializers.ModelSerializer):  # type: ignore[type-
             "id",
             "match",
             "last_message",
+            "last_message_text",
+            "last_message_at",
             "unread_count",
             "created_at",
             "updated_at",
         ]
+        list_serializer_class = ConversationListSerializer
+
+    def to_representation(self, instance: Conversation) -> Any:
+        if instance.last_message is not None:
+            # Lets the nested MessageSerializer read the watermarks without a query
+            instance.last_message.conversation = instance
+        return super().to_representation(instance)
 
     def get_unread_count(self, obj: Conversation) -> int:
         request = self.context.get("request")
         if request:
-            return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
+            return obj.unread_count_for(request.user.id)
         return 0
 
 
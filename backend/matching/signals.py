@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from profiles.models import Profile, ProfilePhoto
+
+from .ai_results import invalidate_results
+from .models import ChangeLogEntry, Conversation, Match, Message
+from .presence import invalidate_conversation_partners
+from .realtime import publish_message
+from .suggestions import schedule_precompute
+from .sync import record_changes, record_profile_change
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_last_message(
+    sender: type, instance: Message, created: bool, **kwargs: object
+) -> None:
+    """Keep Conversation.last_message* in sync with newly sent messages."""
+    if created:
+        instance.conversation.record_message(instance)
+
+
+@receiver(post_save, sender=Message)
+def push_new_message(sender: type, instance: Message, created: bool, **kwargs: object) -> None:
+    """Push new messages to connected WebSocket clients once they are committed."""
+    if created:
+        transaction.on_commit(lambda: publish_message(instance), robust=True)
+
+
+@receiver(post_save, sender=Message)
+def log_new_message(sender: type, instance: Message, created: bool, **kwargs: object) -> None:
+    if created:
+        match = instance.conversation.match
+        user_ids = [match.user1_id, match.user2_id]
+        record_changes(user_ids, ChangeLogEntry.KIND_MESSAGE, instance.id)
+
+
+@receiver(post_save, sender=Message)
+def invalidate_ai_results(
+    sender: type, instance: Message, created: bool, **kwargs: object
+) -> None:
+    """Cached suggestions and summaries are stale once a new message arrives."""
+    if created:
+        match = instance.conversation.match
+        invalidate_results(instance.conversation_id, [match.user1_id, match.user2_id])
+
+
+@receiver(post_save, sender=Message)
+def precompute_suggestions(
+    sender: type, instance: Message, created: bool, **kwargs: object
+) -> None:
+    """Queue reply suggestions for recipients who use them (when enabled)."""
+    if created:
+        schedule_precompute(instance)
+
+
+@receiver(post_save, sender=Match)
+def log_new_match(sender: type, instance: Match, created: bool, **kwargs: object) -> None:
+    if created:
+        user_ids = [instance.user1_id, instance.user2_id]
+        record_changes(user_ids, ChangeLogEntry.KIND_MATCH, instance.id)
+
+
+@receiver(post_save, sender=Profile)
+def log_profile_update(sender: type, instance: Profile, created: bool, **kwargs: object) -> None:
+    if not created:
+        record_profile_change(instance)
+
+
+@receiver(m2m_changed, sender=Profile.interests.through)
+@receiver(m2m_changed, sender=Profile.disability_tags.through)
+def log_profile_m2m_update(
+    sender: type,
+    instance: object,
+    action: str,
+    reverse: bool,
+    pk_set: Optional[set[int]],
+    **kwargs: object,
+) -> None:
+    """Interest and tag edits don't save the profile, so log them here."""
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        assert isinstance(instance, Profile)
+        record_profile_change(instance)
+    elif pk_set:
+        # Edited from the interest's or tag's side: pk_set holds profile ids
+        for profile in Profile.objects.filter(id__in=pk_set):
+            record_profile_change(profile)
+
+
+@receiver(post_save, sender=ProfilePhoto)
+@receiver(post_delete, sender=ProfilePhoto)
+def log_profile_photo_update(sender: type, instance: ProfilePhoto, **kwargs: object) -> None:
+    profile = Profile.objects.filter(id=instance.profile_id).first()
+    if profile is not None:
+        record_profile_change(profile)
+
+
+@receiver(post_save, sender=Conversation)
+def reset_presence_partners(
+    sender: type, instance: Conversation, created: bool, **kwargs: object
+) -> None:
+    """New conversations must show up in both users' presence polls."""
+    if created:
+        match = instance.match
+        invalidate_conversation_partners([match.user1_id, match.user2_id])
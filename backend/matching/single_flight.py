@@ -0,0 +1,139 @@
+"""
+Single-flight coalescing of identical AI generations.
+
+``single_flight(key, fn)`` runs ``fn`` once for all concurrent callers that
+pass the same key, and hands every one of them its result:
+
+- Within a process, followers wait on the leader's in-flight call.
+- Across processes, the leader holds a lock in the shared cache
+  (``cache.add``) and publishes its result there briefly; followers in other
+  workers poll for it instead of calling the model themselves.
+
+If the leader fails or vanishes, followers stop waiting and run ``fn``
+themselves, so coalescing never turns one failure into a hang.
+
+Callers that cannot wrap their work in one function, such as a streamed
+generation, use the cross-process half directly: ``acquire`` the key's lock,
+then ``publish`` the result (or ``release`` the lock) when done; callers that
+do not get the lock ``wait_for`` the result.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional, TypeVar
+
+from django.core.cache import cache
+
+T = TypeVar("T")
+
+# How long a follower waits for the leader before generating itself
+WAIT_TIMEOUT = 30.0
+POLL_INTERVAL = 0.1
+
+# The cross-process lock expires on its own if its holder dies
+LOCK_TIMEOUT = 60
+# Published results only need to outlive the followers' polling
+RESULT_TIMEOUT = 30
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_calls: dict[str, _Call] = {}
+_calls_lock = threading.Lock()
+
+
+def _lock_key(key: str) -> str:
+    return f"singleflight:lock:{key}"
+
+
+def _result_key(key: str) -> str:
+    return f"singleflight:result:{key}"
+
+
+def single_flight(key: str, fn: Callable[[], T], wait: float = WAIT_TIMEOUT) -> T:
+    """Run ``fn`` once per ``key`` across concurrent callers and share its result."""
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+    assert call is not None
+
+    if not leader:
+        if call.done.wait(wait) and call.error is None:
+            result: T = call.result
+            return result
+        return fn()  # The leader failed or is too slow
+
+    try:
+        result = _run_shared(key, fn, wait)
+        call.result = result
+        return result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+
+def acquire(key: str) -> Optional[str]:
+    """Take the cross-process lock for ``key``; returns a token, or None if it is held."""
+    token = uuid.uuid4().hex
+    return token if cache.add(_lock_key(key), token, timeout=LOCK_TIMEOUT) else None
+
+
+def release(key: str, token: str) -> None:
+    if cache.get(_lock_key(key)) == token:
+        cache.delete(_lock_key(key))
+
+
+def publish(key: str, token: str, result: Any) -> None:
+    """Share ``result`` with the callers waiting on ``key``, then release the lock."""
+    cache.set(_result_key(key), {"value": result}, timeout=RESULT_TIMEOUT)
+    release(key, token)
+
+
+def wait_for(key: str, wait: float = WAIT_TIMEOUT) -> tuple[bool, Any]:
+    """
+    Wait for the lock holder to publish ``key``'s result.
+
+    Returns ``(True, result)``, or ``(False, None)`` if the holder released
+    the lock without a result or ``wait`` ran out.
+    """
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        published: Optional[dict[str, Any]] = cache.get(_result_key(key))
+        if published is not None:
+            return True, published["value"]
+        if cache.get(_lock_key(key)) is None:
+            break  # The holder gave up without a result
+        time.sleep(POLL_INTERVAL)
+    return False, None
+
+
+def _run_shared(key: str, fn: Callable[[], T], wait: float) -> T:
+    token = acquire(key)
+    if token is None:
+        # Another worker is generating this; wait for it to publish
+        found, published = wait_for(key, wait)
+        if found:
+            result: T = published
+            return result
+        return fn()
+
+    try:
+        result = fn()
+    except BaseException:
+        release(key, token)
+        raise
+    publish(key, token, result)
+    return result
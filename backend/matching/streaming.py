@@ -0,0 +1,115 @@
+"""
+Server-Sent Events for AI output that is streamed as it is generated.
+
+The streaming views in ``matching.views`` are async, so a stream occupies
+no worker thread while it waits on the model: each blocking step of the
+OpenAI stream runs in a thread of its own and hands control back to the
+event loop. Serve the project through ``config.asgi`` for this to hold.
+
+Each stream sends ``token`` events (``{"text": <delta>}``) followed by one
+``done`` event carrying the final, persisted result, or an ``error`` event.
+A stream that is answered from cache sends only ``done``.
+
+Clients authenticate with their DRF token in the ``Authorization`` header,
+so read the stream with ``fetch`` rather than ``EventSource``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, TypeVar
+
+from asgiref.sync import sync_to_async
+from django.http import HttpRequest, StreamingHttpResponse
+
+from users.models import User
+
+from .ai_client import stream_chat_completion
+from .gateway import authenticate_token
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream_response(events: AsyncIterator[str]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(events, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let nginx buffer the stream
+    return response
+
+
+async def single_event(event: str, data: Any) -> AsyncIterator[str]:
+    yield sse_event(event, data)
+
+
+def request_user(request: HttpRequest) -> Optional[User]:
+    """The user for the DRF token in the request's ``Authorization`` header."""
+    keyword, _, key = request.headers.get("Authorization", "").partition(" ")
+    return authenticate_token(key) if keyword.lower() == "token" else None
+
+
+def _next_item(iterator: Iterator[T]) -> list[T]:
+    """The iterator's next item as a one-item list, or ``[]`` once it is exhausted."""
+    for item in iterator:
+        return [item]
+    return []
+
+
+async def iterate_in_thread(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """Drive a blocking iterator from worker threads, keeping the event loop free."""
+    next_item = sync_to_async(_next_item, thread_sensitive=False)
+    try:
+        while True:
+            items = await next_item(iterator)
+            if not items:
+                break
+            yield items[0]
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=False)()
+
+
+async def stream_completion(
+    request: dict[str, Any],
+    finish: Callable[[str], Any],
+    fail: Optional[Callable[[Exception], Any]] = None,
+    abandon: Optional[Callable[[], Any]] = None,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion as SSE events.
+
+    ``finish`` receives the full text once the model is done, persists it
+    and returns the payload of the ``done`` event. ``fail`` is called if the
+    completion cannot be produced (including when the circuit breaker is
+    open or the latency budget runs out); if it returns a payload, such as a
+    fallback, that is sent as ``done`` instead of an ``error``. ``abandon``
+    is called instead of either if the client disconnects first. All three
+    run synchronously, so they may use the ORM.
+    """
+    text = ""
+    settled = False
+    try:
+        async for delta in iterate_in_thread(stream_chat_completion(**request)):
+            text += delta
+            yield sse_event("token", {"text": delta})
+        settled = True
+        done = await sync_to_async(finish)(text)
+    except Exception as e:
+        settled = True
+        logger.error(f"AI stream failed: {e}")
+        fallback = await sync_to_async(fail)(e) if fail is not None else None
+        if fallback is not None:
+            yield sse_event("done", fallback)
+        else:
+            yield sse_event("error", {"error": "Generation failed"})
+        return
+    finally:
+        if not settled and abandon is not None:
+            await sync_to_async(abandon)()
+    yield sse_event("done", done)
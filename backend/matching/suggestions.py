@@ -0,0 +1,124 @@
+"""
+Reply suggestions, generated on request or ahead of time.
+
+``generate_suggestions`` is what ``ConversationSuggestionsView`` runs on a
+cache miss. With ``AI_SPECULATIVE_SUGGESTIONS`` on, a message that arrives
+for a user who used suggestions within ``SPECULATIVE_SUGGESTIONS_RECENCY``
+seconds also queues that generation as a background job, so the user's next
+request is a cache hit. Each user gets at most
+``SPECULATIVE_SUGGESTIONS_DAILY_BUDGET`` speculative generations a day.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from users.models import User
+
+from .ai_results import cached_result, get_result
+from .context_window import build_context
+from .jobs import enqueue_once
+from .models import Conversation, Message
+
+logger = logging.getLogger(__name__)
+
+SUGGESTIONS_JOB = "suggestions"
+
+# Queued jobs wait briefly, so a burst of messages costs one generation
+PRECOMPUTE_DELAY = 3
+
+
+def _enabled() -> bool:
+    return getattr(settings, "AI_SPECULATIVE_SUGGESTIONS", False)
+
+
+def _used_key(user_id: int) -> str:
+    return f"ai:suggestions:used:{user_id}"
+
+
+def _budget_key(user_id: int) -> str:
+    return f"ai:suggestions:speculative:{user_id}:{timezone.localdate().isoformat()}"
+
+
+def generate_suggestions(
+    conversation: Conversation, user: User, other_user: User, language: str
+) -> Optional[list[str]]:
+    from .ai_service import generate_message_suggestions
+
+    context = build_context(conversation, user.id)
+    return generate_message_suggestions(
+        conversation_history=context.turns,
+        user_profile=user.profile,
+        other_profile=other_user.profile,
+        language_code=language,
+        memory=context.memory,
+    )
+
+
+def note_suggestions_used(user_id: int, language: str) -> None:
+    """Remember that the user wants suggestions (in ``language``) for a while."""
+    if _enabled():
+        recency = getattr(settings, "SPECULATIVE_SUGGESTIONS_RECENCY", 30 * 60)
+        cache.set(_used_key(user_id), language, timeout=recency)
+
+
+def schedule_precompute(message: Message) -> None:
+    """Queue suggestions for the recipient of ``message`` if they recently used them."""
+    if not _enabled():
+        return
+    match = message.conversation.match
+    recipient_id = match.user2_id if message.sender_id == match.user1_id else match.user1_id
+    language: Optional[str] = cache.get(_used_key(recipient_id))
+    if language is None:
+        return
+    enqueue_once(
+        SUGGESTIONS_JOB,
+        {"conversation_id": message.conversation_id, "user_id": recipient_id, "language": language},
+        delay=PRECOMPUTE_DELAY,
+        unique_on=["conversation_id", "user_id"],
+    )
+
+
+def _spend_budget(user_id: int) -> bool:
+    key = _budget_key(user_id)
+    cache.add(key, 0, timeout=60 * 60 * 24)
+    try:
+        spent = cache.incr(key)
+    except ValueError:
+        spent = 1  # Expired between add and incr
+        cache.set(key, spent, timeout=60 * 60 * 24)
+    return spent <= getattr(settings, "SPECULATIVE_SUGGESTIONS_DAILY_BUDGET", 50)
+
+
+def precompute_suggestions(conversation_id: int, user_id: int, language: str) -> None:
+    """Job handler: generate and cache suggestions for the conversation's latest message."""
+    conversation = (
+        Conversation.objects.select_related("match__user1__profile", "match__user2__profile")
+        .filter(id=conversation_id)
+        .first()
+    )
+    if conversation is None:
+        return
+    match = conversation.match
+    if user_id == match.user1_id:
+        user, other_user = match.user1, match.user2
+    else:
+        user, other_user = match.user2, match.user1
+    if not hasattr(user, "profile") or not hasattr(other_user, "profile"):
+        return
+    if get_result(SUGGESTIONS_JOB, conversation, user.id, language) is not None:
+        return  # The user asked first
+    if not _spend_budget(user.id):
+        logger.info(f"Speculative suggestions budget spent for user {user.id}")
+        return
+    cached_result(
+        SUGGESTIONS_JOB,
+        conversation,
+        user.id,
+        language,
+        lambda: generate_suggestions(conversation, user, other_user, language),
+    )
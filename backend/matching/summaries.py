@@ -0,0 +1,223 @@
+"""
+Incremental conversation summaries for ``ConversationSummaryView``.
+
+Each (conversation, user, language) keeps a ``ConversationSummaryState``
+with the latest summary and the newest message it covers. An update sends
+the model only that summary plus the messages after it, in batches of at
+most ``SUMMARY_INPUT_BUDGET`` tokens, so prompts stay bounded while the
+summary reflects the whole conversation.
+
+A request folds in one batch; a longer backlog is folded in order by the
+``catch_up_summary`` background job, and only a summary that covers the
+conversation's last message is cached. Until then a request gets the stored
+summary, or, for a first summary of a long conversation, an interim one of
+just the most recent batch that is neither stored nor cached.
+"""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from users.models import User
+
+from .ai_results import store_result
+from .context_window import MESSAGE_OVERHEAD, after_cursor, count_tokens, message_text
+from .jobs import enqueue_once
+from .models import Conversation, ConversationSummaryState, Message
+
+SUMMARY_INPUT_BUDGET = 2000
+
+SUMMARY_JOB = "summary"
+
+
+def _turn(msg: Message, user_id: int, content: str) -> dict[str, str]:
+    return {"role": "user" if msg.sender_id == user_id else "assistant", "content": content}
+
+
+def _next_batch(
+    conversation: Conversation, user_id: int, state: ConversationSummaryState
+) -> tuple[list[dict[str, str]], Optional[Message]]:
+    messages = conversation.messages.order_by("sent_at", "id").only(
+        "id", "sender_id", "sent_at", "message_type", "content"
+    )
+    if state.last_message_id is not None and state.last_message_at is not None:
+        messages = messages.filter(after_cursor(state.last_message_at, state.last_message_id))
+
+    turns: list[dict[str, str]] = []
+    used = 0
+    last: Optional[Message] = None
+    for msg in messages.iterator(chunk_size=50):
+        content = message_text(msg)
+        cost = count_tokens(content) + MESSAGE_OVERHEAD
+        if turns and used + cost > SUMMARY_INPUT_BUDGET:
+            break
+        used += cost
+        last = msg
+        turns.append(_turn(msg, user_id, content))
+    return turns, last
+
+
+def _recent_window(conversation: Conversation, user_id: int) -> list[dict[str, str]]:
+    """The most recent messages that fit in one batch, oldest first."""
+    messages = conversation.messages.order_by("-sent_at", "-id").only(
+        "id", "sender_id", "sent_at", "message_type", "content"
+    )
+    turns: list[dict[str, str]] = []
+    used = 0
+    for msg in messages.iterator(chunk_size=50):
+        content = message_text(msg)
+        cost = count_tokens(content) + MESSAGE_OVERHEAD
+        if turns and used + cost > SUMMARY_INPUT_BUDGET:
+            break
+        used += cost
+        turns.append(_turn(msg, user_id, content))
+    turns.reverse()
+    return turns
+
+
+def _deferred(
+    conversation: Conversation, state: ConversationSummaryState, last: Optional[Message]
+) -> bool:
+    """Whether this is a first summary too long to fold in one request."""
+    return (
+        state.last_message_id is None
+        and last is not None
+        and last.id != conversation.last_message_id
+    )
+
+
+def save_summary(state: ConversationSummaryState, summary: str, last: Message) -> None:
+    """Record ``summary`` as covering everything up to ``last``."""
+    state.summary = summary
+    state.last_message_id = last.id
+    state.last_message_at = last.sent_at
+    state.save(update_fields=["summary", "last_message_id", "last_message_at", "updated_at"])
+
+
+def _generate(
+    turns: list[dict[str, str]], user: User, other_profile: Any, language: str, previous: str
+) -> Optional[str]:
+    from .ai_service import generate_conversation_summary
+
+    return generate_conversation_summary(
+        conversation_history=turns,
+        user_profile=user.profile,
+        other_profile=other_profile,
+        language_code=language,
+        previous_summary=previous,
+    )
+
+
+def _fold(
+    state: ConversationSummaryState,
+    turns: list[dict[str, str]],
+    last: Message,
+    user: User,
+    other_profile: Any,
+    language: str,
+) -> bool:
+    summary = _generate(turns, user, other_profile, language, state.summary)
+    if not summary:
+        return False
+    save_summary(state, summary, last)
+    return True
+
+
+def _get_state(conversation: Conversation, user: User, language: str) -> ConversationSummaryState:
+    state, _ = ConversationSummaryState.objects.get_or_create(
+        conversation=conversation, user=user, language=language
+    )
+    return state
+
+
+def interim_summary(
+    conversation: Conversation, user: User, other_profile: Any, language: str
+) -> str:
+    """
+    What to show while the summary is not current.
+
+    That is the latest stored summary; for a first summary that is still
+    being caught up, a summary of just the most recent batch.
+    """
+    state = _get_state(conversation, user, language)
+    if state.summary:
+        return state.summary
+    _, last = _next_batch(conversation, user.id, state)
+    if not _deferred(conversation, state, last):
+        return ""
+    turns = _recent_window(conversation, user.id)
+    return _generate(turns, user, other_profile, language, "") or ""
+
+
+def schedule_catch_up(conversation: Conversation, user: User, language: str) -> None:
+    enqueue_once(
+        SUMMARY_JOB, {"conversation_id": conversation.id, "user_id": user.id, "language": language}
+    )
+
+
+def update_summary(
+    conversation: Conversation, user: User, other_profile: Any, language: str
+) -> Optional[str]:
+    """
+    Fold the next batch of new messages into the stored summary.
+
+    Returns the summary if it now covers the conversation's last message;
+    otherwise None, with the rest queued for ``catch_up_summary``. A first
+    summary that needs more than one batch is left to the job entirely.
+    """
+    state = _get_state(conversation, user, language)
+    turns, last = _next_batch(conversation, user.id, state)
+    if _deferred(conversation, state, last):
+        schedule_catch_up(conversation, user, language)
+        return None
+    if last is not None and not _fold(state, turns, last, user, other_profile, language):
+        return None
+    if state.last_message_id != conversation.last_message_id:
+        schedule_catch_up(conversation, user, language)
+        return None
+    return state.summary or None
+
+
+def final_batch(
+    conversation: Conversation, user: User, other_profile: Any, language: str
+) -> tuple[ConversationSummaryState, list[dict[str, str]], Optional[Message]]:
+    """
+    Return the next batch of new messages, for a streamed update.
+
+    Pass the result to ``save_summary`` once the streamed summary is
+    complete. The batch is empty when the summary is already up to date. Only
+    a batch that ends at the conversation's last message makes the summary
+    current. For a first summary that needs more than one batch, the full
+    fold is queued and the batch is the most recent window with no message:
+    its summary is an interim one, not to be saved.
+    """
+    state = _get_state(conversation, user, language)
+    turns, last = _next_batch(conversation, user.id, state)
+    if _deferred(conversation, state, last):
+        schedule_catch_up(conversation, user, language)
+        return state, _recent_window(conversation, user.id), None
+    return state, turns, last
+
+
+def catch_up_summary(conversation_id: int, user_id: int, language: str) -> None:
+    """Job handler: fold every remaining batch into a summary and cache the result."""
+    conversation = (
+        Conversation.objects.select_related("match__user1__profile", "match__user2__profile")
+        .filter(id=conversation_id)
+        .first()
+    )
+    if conversation is None:
+        return
+    match = conversation.match
+    user, other_user = (
+        (match.user1, match.user2) if user_id == match.user1_id else (match.user2, match.user1)
+    )
+    state = _get_state(conversation, user, language)
+    while True:
+        turns, last = _next_batch(conversation, user.id, state)
+        if last is None:
+            break
+        if not _fold(state, turns, last, user, other_user.profile, language):
+            raise RuntimeError(f"Summary update failed for conversation {conversation_id}")  # Retried
+    conversation.refresh_from_db(fields=["last_message"])
+    if state.summary and state.last_message_id == conversation.last_message_id:
+        store_result("summary", conversation, user.id, language, state.summary)
@@ -8,7 +8,6 @@ import logging
 from typing import Optional
 
 from django.db import transaction
-from django.db.models import Q
 
 from users.models import User
 
@@ -72,11 +71,7 @@ def ensure_support_match(user: User) -> None:
 
     support_user = get_or_create_support_user()
 
-    existing = Match.objects.filter(
-        Q(user1=user, user2=support_user) | Q(user1=support_user, user2=user)
-    ).first()
-
-    if existing:
+    if Match.objects.filter(**Match.pair_lookup(user.id, support_user.id)).exists():
         return
 
     with transaction.atomic():
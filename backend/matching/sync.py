@@ -0,0 +1,155 @@
+"""
+Inbox-wide delta sync.
+
+Changes a client has to learn about (new matches, unmatches, messages,
+read-state changes and profile updates of matches) are appended to
+``ChangeLogEntry`` per affected user. ``build_sync_payload`` turns the
+entries after a client's token into one response, so a reconnecting client
+only pays for what changed while it was away.
+
+Entries older than ``CHANGELOG_RETENTION_DAYS`` are removed by
+``manage.py prune_change_log``. A token from before the oldest retained entry
+may have missed pruned changes, so ``is_stale_token`` tells the client to do a
+full reload instead.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from profiles.cards import render_profile_cards
+from profiles.models import Profile
+
+from .models import ChangeLogEntry, Conversation, Match, Message
+
+# Entries handled per request; clients call again while ``has_more`` is set
+SYNC_BATCH_SIZE = 500
+
+
+def record_changes(user_ids: Iterable[int], kind: str, object_id: int) -> None:
+    """Append one change-log entry per user."""
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(user_id=user_id, kind=kind, object_id=object_id)
+        for user_id in set(user_ids)
+    )
+
+
+def record_profile_change(profile: Profile) -> None:
+    """Log a profile update for everyone matched with its owner."""
+    pairs = Match.objects.filter(
+        Q(user1_id=profile.user_id) | Q(user2_id=profile.user_id), is_active=True
+    ).values_list("user1_id", "user2_id")
+    partners = {user_id for pair in pairs for user_id in pair} - {profile.user_id}
+    if partners:
+        record_changes(partners, ChangeLogEntry.KIND_PROFILE, profile.id)
+
+
+def current_token() -> int:
+    """
+    The latest entry id overall.
+
+    Tokens are global so that ``is_stale_token`` can compare them with the
+    oldest retained entry, whoever that entry belongs to.
+    """
+    last: Optional[int] = (
+        ChangeLogEntry.objects.order_by("-id").values_list("id", flat=True).first()
+    )
+    return last or 0
+
+
+def is_stale_token(since: int) -> bool:
+    """Whether entries logged after ``since`` may have been pruned."""
+    oldest: Optional[int] = (
+        ChangeLogEntry.objects.order_by("id").values_list("id", flat=True).first()
+    )
+    if oldest is None:
+        return since > 0  # Everything logged after the token is gone
+    return since < oldest - 1
+
+
+def prune_change_log(days: Optional[int] = None) -> int:
+    """
+    Delete entries older than ``days`` (default ``CHANGELOG_RETENTION_DAYS``).
+
+    The latest entry is always kept, so ``is_stale_token`` can still tell
+    pruned history from no history.
+    """
+    if days is None:
+        days = getattr(settings, "CHANGELOG_RETENTION_DAYS", 30)
+    latest = current_token()
+    deleted, _ = (
+        ChangeLogEntry.objects.filter(created_at__lt=timezone.now() - timedelta(days=days))
+        .exclude(id=latest)
+        .delete()
+    )
+    return deleted
+
+
+def build_sync_payload(user: Any, since: int, context: dict[str, Any]) -> dict[str, Any]:
+    """Collect everything logged for ``user`` after the ``since`` token."""
+    from .serializers import MatchSerializer, MessageSerializer
+
+    entries = list(
+        ChangeLogEntry.objects.filter(user=user, id__gt=since)
+        .order_by("id")
+        .values_list("id", "kind", "object_id")[: SYNC_BATCH_SIZE + 1]
+    )
+    has_more = len(entries) > SYNC_BATCH_SIZE
+    entries = entries[:SYNC_BATCH_SIZE]
+
+    ids: dict[str, set[int]] = {kind: set() for kind, _ in ChangeLogEntry.KIND_CHOICES}
+    for _, kind, object_id in entries:
+        ids[kind].add(object_id)
+
+    matches = (
+        Match.objects.filter(id__in=ids[ChangeLogEntry.KIND_MATCH], is_active=True)
+        .select_related("conversation", "user1__profile", "user2__profile")
+        .order_by("matched_at")
+        if ids[ChangeLogEntry.KIND_MATCH]
+        else []
+    )
+    messages = (
+        Message.objects.filter(id__in=ids[ChangeLogEntry.KIND_MESSAGE])
+        .select_related("conversation__match", "sender__profile")
+        .order_by("sent_at", "id")
+        if ids[ChangeLogEntry.KIND_MESSAGE]
+        else []
+    )
+    conversations = (
+        Conversation.objects.filter(id__in=ids[ChangeLogEntry.KIND_READ])
+        .select_related("match")
+        if ids[ChangeLogEntry.KIND_READ]
+        else []
+    )
+    read_states = [
+        {
+            "conversation_id": conversation.id,
+            "user_id": user_id,
+            "last_read_id": getattr(conversation, f"{side}_last_read_id"),
+            "read_at": getattr(conversation, f"{side}_last_read_at"),
+        }
+        for conversation in conversations
+        for user_id, side in (
+            (conversation.match.user1_id, "user1"),
+            (conversation.match.user2_id, "user2"),
+        )
+    ]
+    profiles = (
+        list(Profile.objects.filter(id__in=ids[ChangeLogEntry.KIND_PROFILE]))
+        if ids[ChangeLogEntry.KIND_PROFILE]
+        else []
+    )
+
+    return {
+        "token": str(entries[-1][0] if entries else since),
+        "has_more": has_more,
+        "matches": MatchSerializer(matches, many=True, context=context).data,
+        "unmatched": sorted(ids[ChangeLogEntry.KIND_UNMATCH]),
+        "messages": MessageSerializer(messages, many=True, context=context).data,
+        "read_states": read_states,
+        "profiles": render_profile_cards(profiles, context),
+    }
@@ -0,0 +1,187 @@
+"""
+Telemetry for AI calls: latency, token usage and cost per caller.
+
+Every chat completion made through ``matching.ai_client`` runs inside
+``track_ai_call``, which
+
+- opens a Sentry span (``op="ai.chat_completion"``) tagged with the caller
+  and model and annotated with token counts, cost and outcome, and
+- adds an ``AICall`` sample to the process's ``MetricsRegistry``.
+
+Outcomes are ``success``, ``empty`` (the model returned no text), ``error``
+(the call failed or ran past its latency budget) and ``fallback`` (the call
+was not made because the circuit breaker was open or no slot was free).
+
+Each process keeps the latest ``MAX_SAMPLES`` calls per caller and publishes
+them to the shared cache every ``PUBLISH_INTERVAL`` seconds, so
+``manage.py ai_telemetry_report`` can report on all workers.
+"""
+from __future__ import annotations
+
+import math
+import os
+import socket
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import astuple, dataclass
+from typing import Any, Iterator, Optional
+
+import sentry_sdk
+from django.core.cache import cache
+
+OUTCOMES: tuple[str, ...] = ("success", "empty", "error", "fallback")
+
+# USD per million (prompt, completion) tokens
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+MAX_SAMPLES = 1000
+PUBLISH_INTERVAL = 10.0
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+PROCESSES_KEY = "ai:telemetry:processes"
+
+
+@dataclass
+class AICall:
+    caller: str
+    model: str
+    latency_ms: float
+    prompt_tokens: int
+    completion_tokens: int
+    outcome: str
+    cost_usd: float
+
+
+def call_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+def _token_count(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+class CallTracker:
+    """Collects what is known about one call while it runs."""
+
+    def __init__(self, caller: str, model: str) -> None:
+        self.caller = caller
+        self.model = model
+        self.outcome: Optional[str] = None
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def usage(self, usage: Any) -> None:
+        """Take token counts from a response's ``usage``, if it has one."""
+        self.prompt_tokens = _token_count(getattr(usage, "prompt_tokens", 0))
+        self.completion_tokens = _token_count(getattr(usage, "completion_tokens", 0))
+
+
+class MetricsRegistry:
+    """The latest ``MAX_SAMPLES`` AI calls per caller in this process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[AICall]] = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+        self._published_at = 0.0
+        self.process_key = f"ai:telemetry:{socket.gethostname()}:{os.getpid()}"
+
+    def record(self, call: AICall) -> None:
+        with self._lock:
+            self._samples[call.caller].append(call)
+            due = time.monotonic() - self._published_at >= PUBLISH_INTERVAL
+            if due:
+                self._published_at = time.monotonic()
+        if due:
+            self.publish()
+
+    def samples(self) -> list[AICall]:
+        with self._lock:
+            return [call for calls in self._samples.values() for call in calls]
+
+    def publish(self) -> None:
+        """Share this process's samples through the cache."""
+        try:
+            cache.set(
+                self.process_key,
+                [astuple(call) for call in self.samples()],
+                timeout=SNAPSHOT_TIMEOUT,
+            )
+            processes: list[str] = cache.get(PROCESSES_KEY) or []
+            if self.process_key not in processes:
+                cache.set(PROCESSES_KEY, processes + [self.process_key], timeout=SNAPSHOT_TIMEOUT)
+        except Exception:
+            pass  # Telemetry must never break an AI call
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+            self._published_at = 0.0
+
+
+registry = MetricsRegistry()
+
+
+def published_samples() -> list[AICall]:
+    """Samples published by every process (including this one)."""
+    registry.publish()
+    processes: list[str] = cache.get(PROCESSES_KEY) or []
+    snapshots = cache.get_many(processes)
+    live = [key for key in processes if key in snapshots]
+    if len(live) < len(processes):
+        cache.set(PROCESSES_KEY, live, timeout=SNAPSHOT_TIMEOUT)
+    return [AICall(*row) for key in live for row in snapshots[key]]
+
+
+def clear_published() -> None:
+    registry.reset()
+    processes: list[str] = cache.get(PROCESSES_KEY) or []
+    cache.delete_many(processes + [PROCESSES_KEY])
+
+
+@contextmanager
+def track_ai_call(caller: str, model: str) -> Iterator[CallTracker]:
+    """
+    Time and record one AI call.
+
+    The body sets ``outcome`` and token ``usage`` on the yielded tracker; an
+    exception that escapes without an outcome counts as ``error``.
+    """
+    tracker = CallTracker(caller, model)
+    started = time.monotonic()
+    with sentry_sdk.start_span(op="ai.chat_completion", name=caller) as span:
+        span.set_tag("ai.caller", caller)
+        span.set_tag("ai.model", model)
+        try:
+            yield tracker
+        except BaseException:
+            tracker.outcome = tracker.outcome or "error"
+            raise
+        finally:
+            call = AICall(
+                caller=caller,
+                model=model,
+                latency_ms=(time.monotonic() - started) * 1000,
+                prompt_tokens=tracker.prompt_tokens,
+                completion_tokens=tracker.completion_tokens,
+                outcome=tracker.outcome or "success",
+                cost_usd=call_cost(model, tracker.prompt_tokens, tracker.completion_tokens),
+            )
+            span.set_tag("ai.outcome", call.outcome)
+            span.set_data("ai.prompt_tokens", call.prompt_tokens)
+            span.set_data("ai.completion_tokens", call.completion_tokens)
+            span.set_data("ai.cost_usd", call.cost_usd)
+            registry.record(call)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile (``q`` in 0-100) of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(q / 100 * len(ordered)), 1)
+    return ordered[min(rank, len(ordered)) - 1]
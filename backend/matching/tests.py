@@ -1,12 +1,74 @@
 """Tests for the Matching Algorithm."""
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
 from datetime import date, timedelta
 from decimal import Decimal
-from unittest.mock import MagicMock
+from io import StringIO
+from typing import Any, Iterator, Optional
+from unittest.mock import MagicMock, patch
 
-from django.test import TestCase
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
 
+from config.asgi import application
 from profiles.enums import Gender, Mood
+from profiles.models import Interest, Profile, ProfilePhoto
+from users.models import User
+
+from .ai_client import (
+    AIBusyError,
+    AIUnavailableError,
+    ai_slot,
+    chat_completion,
+    get_client,
+    reset_client,
+    stream_chat_completion,
+)
+from .ai_results import flight_key
+from .ai_service import ProfileSummary, get_greeting_message
 from .algorithm import CandidateFilter, CompatibilityBreakdown, MatchingAlgorithm
+from .circuit_breaker import breaker_open
+from .context_window import MESSAGE_OVERHEAD, build_context, count_tokens
+from .greetings import fill_pools
+from .jobs import claim, release_job, run_pending
+from .models import (
+    BackgroundJob,
+    Block,
+    ChangeLogEntry,
+    Conversation,
+    ConversationSummaryState,
+    Match,
+    Message,
+    RealtimeEvent,
+    Swipe,
+)
+from .presence import mark_online
+from .realtime import (
+    RELAY_POLL_INTERVAL,
+    DatabaseChannelLayer,
+    get_presence_cache,
+    typing_key,
+)
+from .single_flight import single_flight
+from .streaming import sse_event, stream_completion
+from .telemetry import clear_published, percentile, published_samples, registry
 
 
 class MockLookingFor:
@@ -168,3 +230,1425 @@ class CompatibilityTests(TestCase):
         self.algo._calculate_mood_compatibility(
             MockProfile(mood=Mood.ADVENTUROUS), MockProfile(mood=Mood.LOW_ENERGY), bd)
         self.assertLess(bd.mood_compatibility_score, 50)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="alice", password="testpass123")
+        self.other = User.objects.create_user(username="bob", password="testpass123")
+        Profile.objects.create(user=self.user, display_name="Alice")
+        bob = Profile.objects.create(user=self.other, display_name="Bob", bio="Hi")
+        bob.interests.add(Interest.objects.create(name="Chess"))
+        match = Match.objects.create(user1=self.user, user2=self.other)
+        Conversation.objects.create(match=match)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _get(self, url: str, params: Optional[dict[str, str]] = None) -> tuple[list[Any], int]:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"], len(ctx.captured_queries)
+
+    def test_match_list_renders_only_selected_fields(self) -> None:
+        results, _ = self._get(
+            "/api/matches/", {"fields": "id,other_profile.display_name"}
+        )
+        bob = next(m for m in results if m["other_profile"]["display_name"] == "Bob")
+        self.assertEqual(set(bob), {"id", "other_profile"})
+        self.assertEqual(set(bob["other_profile"]), {"display_name"})
+
+    def test_expand_adds_whole_fields(self) -> None:
+        results, _ = self._get("/api/matches/", {"fields": "id", "expand": "other_profile"})
+        self.assertIn("interests", results[0]["other_profile"])
+
+    def test_lean_lists_run_fewer_queries(self) -> None:
+        _, full = self._get("/api/conversations/")
+        _, lean = self._get("/api/conversations/", {"fields": "id,updated_at"})
+        self.assertLess(lean, full)
+
+
+class ConversationListQueryTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="carol", password="testpass123")
+        Profile.objects.create(user=self.user, display_name="Carol")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _add_conversation(self, index: int) -> Conversation:
+        other = User.objects.create_user(username=f"partner{index}", password="testpass123")
+        Profile.objects.create(user=other, display_name=f"Partner {index}")
+        match = Match.objects.create(user1=self.user, user2=other)
+        conversation = Conversation.objects.create(match=match)
+        Message.objects.create(conversation=conversation, sender=other, content="first")
+        Message.objects.create(conversation=conversation, sender=other, content=f"hi {index}")
+        return conversation
+
+    def _count_queries(self) -> tuple[list[Any], int]:
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/conversations/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"], len(ctx.captured_queries)
+
+    def test_last_message_is_denormalized_on_insert(self) -> None:
+        conversation = self._add_conversation(1)
+        conversation.refresh_from_db()
+        self.assertEqual(conversation.last_message_text, "hi 1")
+        results, _ = self._count_queries()
+        row = next(r for r in results if r["id"] == conversation.id)
+        self.assertEqual(row["last_message"]["content"], "hi 1")
+        self.assertEqual(row["unread_count"], 2)
+
+    def test_query_count_does_not_grow_with_inbox_size(self) -> None:
+        self._add_conversation(1)
+        self._count_queries()  # warm the card cache
+        _, small = self._count_queries()
+        for index in range(2, 6):
+            self._add_conversation(index)
+        self._count_queries()
+        _, large = self._count_queries()
+        self.assertEqual(small, large)
+
+
+class ReadWatermarkTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="dana", password="testpass123")
+        self.other = User.objects.create_user(username="eli", password="testpass123")
+        match = Match.objects.create(user1=self.user, user2=self.other)
+        self.conversation = Conversation.objects.create(match=match)
+        self.client = APIClient()
+
+    def _send(self, sender: User, content: str) -> Message:
+        return Message.objects.create(
+            conversation=self.conversation, sender=sender, content=content
+        )
+
+    def test_counters_and_watermarks(self) -> None:
+        self._send(self.other, "one")
+        last = self._send(self.other, "two")
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.unread_count_for(self.user.id), 2)
+        self.assertEqual(self.conversation.unread_count_for(self.other.id), 0)
+
+        self.client.force_authenticate(self.user)
+        url = f"/api/conversations/{self.conversation.id}/messages/"
+        self.client.get(url)
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.user1_last_read_id, last.id)
+        self.assertEqual(self.conversation.unread_count_for(self.user.id), 0)
+
+        # The sender sees both messages as read, with the watermark's timestamp
+        self.client.force_authenticate(self.other)
+        results = self.client.get(url).json()["results"]
+        self.assertTrue(all(m["is_read"] for m in results))
+        self.assertIsNotNone(results[-1]["read_at"])
+
+    def test_partial_read_recounts_remaining(self) -> None:
+        first = self._send(self.other, "one")
+        self._send(self.other, "two")
+        self.conversation.refresh_from_db()
+        self.assertTrue(self.conversation.mark_read(self.user.id, up_to_id=first.id))
+        self.assertEqual(self.conversation.unread_count_for(self.user.id), 1)
+        self.assertFalse(self.conversation.mark_read(self.user.id, up_to_id=first.id))
+
+    @override_settings(STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage")
+    def test_admin_filters_messages_by_the_read_watermark(self) -> None:
+        first = self._send(self.other, "seen")
+        self._send(self.other, "not yet")
+        self.conversation.refresh_from_db()
+        self.conversation.mark_read(self.user.id, up_to_id=first.id)
+        admin_user = User.objects.create_superuser("root", "root@example.com", "testpass123")
+        self.client.force_login(admin_user)
+        read = self.client.get("/admin/matching/message/?read=yes")
+        unread = self.client.get("/admin/matching/message/?read=no")
+        self.assertEqual(read.context["cl"].result_count, 1)
+        self.assertContains(read, "seen")
+        self.assertContains(unread, "not yet")
+        self.assertNotContains(unread, "seen")
+
+
+class MessagePaginationTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="fay", password="testpass123")
+        self.other = User.objects.create_user(username="gil", password="testpass123")
+        match = Match.objects.create(user1=self.user, user2=self.other)
+        self.conversation = Conversation.objects.create(match=match)
+        self.messages = [
+            Message.objects.create(
+                conversation=self.conversation, sender=self.other, content=f"m{i}"
+            )
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/conversations/{self.conversation.id}/messages/"
+
+    def _ids(self, response: Any) -> list[int]:
+        return [m["id"] for m in response.json()["results"]]
+
+    def test_newest_page_then_older_history(self) -> None:
+        ids = [m.id for m in self.messages]
+        first = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(self._ids(first), ids[3:])
+        self.assertTrue(first.json()["has_more"])
+
+        older = self.client.get(self.url, {"page_size": 2, "before": first.json()["before"]})
+        self.assertEqual(self._ids(older), ids[1:3])
+
+        oldest = self.client.get(self.url, {"page_size": 2, "before": older.json()["before"]})
+        self.assertEqual(self._ids(oldest), ids[:1])
+        self.assertFalse(oldest.json()["has_more"])
+        self.assertIsNone(oldest.json()["before"])
+
+    def test_since_returns_only_new_messages(self) -> None:
+        newest = self.client.get(self.url).json()
+        caught_up = self.client.get(self.url, {"after": newest["after"]})
+        self.assertEqual(self._ids(caught_up), [])
+
+        new = Message.objects.create(
+            conversation=self.conversation, sender=self.other, content="new"
+        )
+        since = self.client.get(self.url, {"since": self.messages[-1].id})
+        self.assertEqual(self._ids(since), [new.id])
+        self.assertEqual(self._ids(self.client.get(self.url, {"after": newest["after"]})), [new.id])
+
+    def test_invalid_cursor_is_rejected(self) -> None:
+        self.assertEqual(self.client.get(self.url, {"before": "garbage"}).status_code, 404)
+
+    def test_page_renders_without_per_message_queries(self) -> None:
+        Profile.objects.create(user=self.other, display_name="Gil")
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+        for i in range(10):
+            Message.objects.create(
+                conversation=self.conversation, sender=self.other, content=f"n{i}"
+            )
+        with CaptureQueriesContext(connection) as large:
+            results = self.client.get(self.url).json()["results"]
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(results[-1]["sender_name"], "Gil")
+        self.assertFalse(results[-1]["is_mine"])
+
+
+class MatchPairKeyTests(TestCase):
+    def setUp(self) -> None:
+        self.a = User.objects.create_user(username="hila", password="testpass123")
+        self.b = User.objects.create_user(username="ido", password="testpass123")
+
+    def test_pair_is_unique_in_either_order(self) -> None:
+        match = Match.objects.create(user1=self.b, user2=self.a)
+        expected = tuple(sorted((self.a.id, self.b.id)))
+        self.assertEqual((match.pair_low, match.pair_high), expected)
+        self.assertEqual(Match.get_match_between(self.a, self.b), match)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Match.objects.create(user1=self.a, user2=self.b)
+
+    def test_mutual_swipe_reuses_existing_match(self) -> None:
+        match = Match.objects.create(user1=self.b, user2=self.a)
+        Conversation.objects.create(match=match)
+        Swipe.objects.create(from_user=self.b, to_user=self.a, action="like")
+        client = APIClient()
+        client.force_authenticate(self.a)
+        response = client.post("/api/swipe/", {"to_user": self.b.id, "action": "like"})
+        self.assertTrue(response.json()["is_match"])
+        self.assertEqual(response.json()["match"]["id"], match.id)
+        pair = Match.pair_lookup(self.a.id, self.b.id)
+        self.assertEqual(Match.objects.filter(**pair).count(), 1)
+
+    def test_swipe_rejects_a_non_numeric_user_id(self) -> None:
+        client = APIClient()
+        client.force_authenticate(self.a)
+        response = client.post("/api/swipe/", {"to_user": "ido", "action": "like"})
+        self.assertEqual(response.status_code, 400)
+
+
+class MatchPairMigrationTests(TransactionTestCase):
+    before = [("matching", "0016_mock_greeting_pool")]
+    after = [("matching", "0017_match_pair_key_bigint")]
+
+    def tearDown(self) -> None:
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_reverse_order_duplicates_are_merged(self) -> None:
+        a = User.objects.create_user(username="hila", password="testpass123")
+        b = User.objects.create_user(username="ido", password="testpass123")
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        OldMatch = apps.get_model("matching", "Match")
+        OldConversation = apps.get_model("matching", "Conversation")
+        OldMessage = apps.get_model("matching", "Message")
+        low, high = sorted((a.id, b.id))
+        keeper = OldMatch.objects.create(
+            user1_id=a.id, user2_id=b.id, pair_low=low, pair_high=high
+        )
+        duplicate = OldMatch.objects.create(user1_id=b.id, user2_id=a.id)
+        kept = OldConversation.objects.create(match=keeper)
+        merged = OldConversation.objects.create(match=duplicate)
+        OldMessage.objects.create(conversation=kept, sender_id=a.id, content="first")
+        OldMessage.objects.create(conversation=merged, sender_id=b.id, content="second")
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.after)
+
+        pair = Match.objects.filter(**Match.pair_lookup(a.id, b.id))
+        self.assertEqual(list(pair.values_list("id", flat=True)), [keeper.id])
+        self.assertFalse(Match.objects.filter(id=duplicate.id).exists())
+        conversation = Conversation.objects.get(match_id=keeper.id)
+        self.assertEqual(conversation.id, kept.id)
+        self.assertEqual(
+            list(conversation.messages.order_by("id").values_list("content", flat=True)),
+            ["first", "second"],
+        )
+        self.assertEqual(conversation.last_message.content, "second")
+        self.assertEqual(conversation.last_message_text, "second")
+        self.assertEqual(conversation.unread_count_for(a.id), 1)
+
+
+# Tables that grow with usage; a full scan of any of them is a regression.
+LARGE_TABLES = {"matching_message", "matching_swipe", "matching_match", "matching_block"}
+
+
+def full_scans(sql: str) -> list[str]:
+    """Return the large tables ``sql`` would read with a sequential scan."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            # Tiny test tables make seq scans look cheap; ask whether an
+            # index path exists at all.
+            cursor.execute("SET enable_seqscan = off")
+            try:
+                cursor.execute(f"EXPLAIN {sql}")
+                plan = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.execute("RESET enable_seqscan")
+            scanned = [line.split("Seq Scan on ")[1] for line in plan if "Seq Scan on" in line]
+            return [line for line in scanned if line.split()[0] in LARGE_TABLES]
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        details = [row[-1] for row in cursor.fetchall()]
+    # Subqueries and repeated joins use aliases such as U0 or T3
+    aliases = {alias: table for table, alias in re.findall(r'"(\w+)" ([A-Z]+\d+)\b', sql)}
+    scans = [detail for detail in details if detail.startswith("SCAN ")]
+    return [
+        detail for detail in scans
+        if aliases.get(detail.split()[1], detail.split()[1]) in LARGE_TABLES
+    ]
+
+
+class QueryPlanTests(TestCase):
+    """Run EXPLAIN on every query of the hot endpoints and fail on full scans."""
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="jon", password="testpass123")
+        Profile.objects.create(user=self.user, display_name="Jon")
+        self.others = []
+        for i in range(3):
+            other = User.objects.create_user(username=f"kim{i}", password="testpass123")
+            Profile.objects.create(user=other, display_name=f"Kim {i}")
+            self.others.append(other)
+        match = Match.objects.create(user1=self.others[0], user2=self.user)
+        self.conversation = Conversation.objects.create(match=match)
+        self.messages = [
+            Message.objects.create(
+                conversation=self.conversation, sender=self.others[0], content=f"m{i}"
+            )
+            for i in range(3)
+        ]
+        Swipe.objects.create(from_user=self.others[1], to_user=self.user, action="like")
+        Block.objects.create(blocker=self.others[2], blocked=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertNoFullScans(
+        self, method: str, url: str, data: Optional[dict[str, Any]] = None
+    ) -> None:
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data or {})
+        self.assertLess(response.status_code, 400, response.content)
+        scans = {
+            query["sql"]: found
+            for query in ctx.captured_queries
+            if query["sql"].lstrip().upper().startswith("SELECT")
+            and (found := full_scans(query["sql"]))
+        }
+        self.assertEqual(scans, {})
+
+    def test_read_endpoints(self) -> None:
+        messages_url = f"/api/conversations/{self.conversation.id}/messages/"
+        first_page = self.client.get(messages_url, {"page_size": 2}).json()
+        for url, params in [
+            ("/api/discover/", None),
+            ("/api/matches/", None),
+            ("/api/conversations/", None),
+            (messages_url, None),
+            (messages_url, {"before": first_page["before"]}),
+            (messages_url, {"since": self.messages[0].id}),
+        ]:
+            with self.subTest(url=url, params=params):
+                self.assertNoFullScans("get", url, params)
+
+    def test_write_endpoints(self) -> None:
+        swipe = {"to_user": self.others[1].id, "action": "like"}
+        self.assertNoFullScans("post", "/api/swipe/", swipe)
+        self.assertNoFullScans(
+            "post", f"/api/conversations/{self.conversation.id}/messages/", {"content": "hey"}
+        )
+
+
+class ChatGatewayTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="lea", password="testpass123")
+        self.other = User.objects.create_user(username="max", password="testpass123")
+        match = Match.objects.create(user1=self.user, user2=self.other)
+        self.conversation = Conversation.objects.create(match=match)
+        self.token = Token.objects.create(user=self.user)
+
+    def _connect(self, token: str) -> ApplicationCommunicator:
+        scope = {
+            "type": "websocket",
+            "path": "/ws/chat/",
+            "query_string": f"token={token}".encode(),
+        }
+        return ApplicationCommunicator(application, scope)
+
+    async def _open(self) -> ApplicationCommunicator:
+        communicator = self._connect(self.token.key)
+        await communicator.send_input({"type": "websocket.connect"})
+        self.assertEqual((await communicator.receive_output(1))["type"], "websocket.accept")
+        return communicator
+
+    async def _receive_event(self, communicator: ApplicationCommunicator) -> Any:
+        return json.loads((await communicator.receive_output(1))["text"])
+
+    async def test_rejects_unknown_token(self) -> None:
+        communicator = self._connect("nope")
+        await communicator.send_input({"type": "websocket.connect"})
+        output = await communicator.receive_output(1)
+        self.assertEqual(output, {"type": "websocket.close", "code": 4401})
+
+    async def test_pushes_messages_typing_and_reads(self) -> None:
+        communicator = await self._open()
+
+        def send_message() -> Message:
+            with self.captureOnCommitCallbacks(execute=True):
+                return Message.objects.create(
+                    conversation=self.conversation, sender=self.other, content="hello"
+                )
+
+        message = await sync_to_async(send_message)()
+        event = await self._receive_event(communicator)
+        self.assertEqual(event["type"], "message")
+        self.assertEqual(event["message"]["id"], message.id)
+
+        client = APIClient()
+        client.force_authenticate(self.other)
+        typing_url = f"/api/conversations/{self.conversation.id}/typing/"
+        await sync_to_async(client.post)(typing_url, {"is_typing": True})
+        event = await self._receive_event(communicator)
+        self.assertEqual(event, {
+            "type": "typing",
+            "conversation_id": self.conversation.id,
+            "user_id": self.other.id,
+            "is_typing": True,
+        })
+
+        # Reading over the socket updates the watermark and echoes a receipt
+        await communicator.send_input({
+            "type": "websocket.receive",
+            "text": json.dumps({"action": "read", "conversation_id": self.conversation.id}),
+        })
+        event = await self._receive_event(communicator)
+        self.assertEqual((event["type"], event["last_read_id"]), ("read", message.id))
+
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(1)
+
+    async def test_invalid_read_watermark_is_rejected(self) -> None:
+        communicator = await self._open()
+        await communicator.send_input({
+            "type": "websocket.receive",
+            "text": json.dumps({
+                "action": "read", "conversation_id": self.conversation.id, "up_to_id": "last"
+            }),
+        })
+        event = await self._receive_event(communicator)
+        self.assertEqual(event, {"type": "error", "error": "Invalid payload"})
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(1)
+
+    def test_messages_are_not_serialized_without_subscribers(self) -> None:
+        with patch("matching.serializers.MessageSerializer") as serializer:
+            with self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(
+                    conversation=self.conversation, sender=self.other, content="hello"
+                )
+        serializer.assert_not_called()
+
+
+class DatabaseChannelLayerTests(TransactionTestCase):
+    def test_events_reach_sockets_of_other_processes_once(self) -> None:
+        here, there = DatabaseChannelLayer(), DatabaseChannelLayer()
+
+        async def scenario() -> tuple[list[dict[str, Any]], bool]:
+            local = here.subscribe("user.1")
+            remote = there.subscribe("user.1")
+            await sync_to_async(here.group_send)("user.1", {"type": "typing"})
+            delivered = [
+                await asyncio.wait_for(local.get(), 1),
+                await asyncio.wait_for(remote.get(), 5),
+            ]
+            await asyncio.sleep(RELAY_POLL_INTERVAL * 3)
+            return delivered, local.empty() and remote.empty()
+
+        try:
+            delivered, drained = async_to_sync(scenario)()
+        finally:
+            here.close()
+            there.close()
+        self.assertEqual(delivered, [{"type": "typing"}, {"type": "typing"}])
+        self.assertTrue(drained)  # The sender's own sockets are not served twice
+        self.assertEqual(RealtimeEvent.objects.get().group, "user.1")
+
+
+class SyncTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="noa", password="testpass123")
+        self.other = User.objects.create_user(username="omer", password="testpass123")
+        Profile.objects.create(user=self.user, display_name="Noa")
+        self.other_profile = Profile.objects.create(user=self.other, display_name="Omer")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _sync(self, token: str) -> Any:
+        response = self.client.get("/api/sync/", {"since": token})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_returns_only_changes_after_token(self) -> None:
+        token = self.client.get("/api/sync/").json()["token"]
+        self.assertEqual(self._sync(token)["messages"], [])
+
+        match = Match.objects.create(user1=self.user, user2=self.other)
+        conversation = Conversation.objects.create(match=match)
+        message = Message.objects.create(conversation=conversation, sender=self.other, content="hi")
+        conversation.refresh_from_db()
+        conversation.mark_read(self.user.id)
+        self.other_profile.bio = "Updated"
+        self.other_profile.save()
+
+        data = self._sync(token)
+        self.assertEqual([m["id"] for m in data["matches"]], [match.id])
+        self.assertEqual([m["id"] for m in data["messages"]], [message.id])
+        states = {state["user_id"]: state for state in data["read_states"]}
+        self.assertEqual(states[self.user.id]["last_read_id"], message.id)
+        self.assertIsNone(states[self.other.id]["last_read_id"])
+        self.assertEqual([p["bio"] for p in data["profiles"]], ["Updated"])
+        self.assertFalse(data["has_more"])
+
+        # Nothing new since the returned token; an unmatch shows up next time
+        self.assertEqual(self._sync(data["token"])["messages"], [])
+        self.client.post(f"/api/matches/{match.id}/unmatch/")
+        self.assertEqual(self._sync(data["token"])["unmatched"], [match.id])
+
+    def test_interest_and_photo_edits_are_logged(self) -> None:
+        Match.objects.create(user1=self.user, user2=self.other)
+        token = self.client.get("/api/sync/").json()["token"]
+        chess = Interest.objects.create(name="Chess")
+
+        self.other_profile.interests.add(chess)
+        data = self._sync(token)
+        self.assertEqual([p["id"] for p in data["profiles"]], [self.other_profile.id])
+
+        chess.profiles.remove(self.other_profile)  # From the interest's side
+        photo = ProfilePhoto.objects.create(profile=self.other_profile, url="https://x.test/a.jpg")
+        photo.delete()
+        entries = ChangeLogEntry.objects.filter(user=self.user, id__gt=data["token"])
+        self.assertEqual(entries.count(), 3)
+
+    def test_pruned_tokens_get_a_reset(self) -> None:
+        Match.objects.create(user1=self.user, user2=self.other)
+        old_token = self.client.get("/api/sync/").json()["token"]
+        self.other_profile.save()
+        self.other_profile.save()
+        ChangeLogEntry.objects.update(created_at=timezone.now() - timedelta(days=31))
+        token = self.client.get("/api/sync/").json()["token"]
+
+        call_command("prune_change_log", stdout=StringIO())
+
+        # Only the latest entry survives, so the older token may have missed changes
+        self.assertEqual(ChangeLogEntry.objects.count(), 1)
+        self.assertTrue(self._sync(old_token)["reset"])
+        data = self._sync(token)
+        self.assertNotIn("reset", data)
+        self.assertEqual(data["profiles"], [])
+
+
+class PresenceTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="pia", password="testpass123")
+        self.others = [
+            User.objects.create_user(username=f"rob{i}", password="testpass123")
+            for i in range(3)
+        ]
+        self.conversations = [
+            Conversation.objects.create(match=Match.objects.create(user1=self.user, user2=other))
+            for other in self.others
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _presence(self) -> dict[int, dict[str, Any]]:
+        response = self.client.get("/api/presence/")
+        return {row["conversation_id"]: row for row in response.json()["conversations"]}
+
+    def test_batched_presence_reads_only_the_cache(self) -> None:
+        other_client = APIClient()
+        other_client.force_authenticate(self.others[0])
+        other_client.post(
+            f"/api/conversations/{self.conversations[0].id}/typing/", {"is_typing": True}
+        )
+        other_client.get("/api/presence/")  # Marks rob0 online
+
+        self._presence()  # Warm the partner map
+        with CaptureQueriesContext(connection) as ctx:
+            rows = self._presence()
+        self.assertEqual(len(ctx.captured_queries), 0)
+        first = rows[self.conversations[0].id]
+        self.assertEqual((first["is_typing"], first["is_online"]), (True, True))
+        self.assertFalse(rows[self.conversations[1].id]["is_typing"])
+
+    def test_new_and_removed_conversations_refresh_the_map(self) -> None:
+        self.assertEqual(len(self._presence()), 4)  # Including the support chat
+        newcomer = User.objects.create_user(username="sam", password="testpass123")
+        match = Match.objects.create(user1=newcomer, user2=self.user)
+        Conversation.objects.create(match=match)
+        self.assertEqual(len(self._presence()), 5)
+        self.client.post(f"/api/matches/{match.id}/unmatch/")
+        self.assertEqual(len(self._presence()), 4)
+
+
+CHILD_PROCESS = """
+import django
+django.setup()
+from matching.presence import online_key
+from matching.realtime import get_presence_cache, set_typing
+set_typing(7, 8, True)
+print(get_presence_cache().get(online_key(8)))
+"""
+
+
+class SharedCacheTests(TestCase):
+    def test_presence_state_is_shared_across_processes(self) -> None:
+        with tempfile.TemporaryDirectory() as location:
+            file_cache = "django.core.cache.backends.filebased.FileBasedCache"
+            caches_setting = {
+                alias: {"BACKEND": file_cache, "LOCATION": os.path.join(location, alias)}
+                for alias in ("default", "presence")
+            }
+            with override_settings(CACHES=caches_setting):
+                mark_online(8)
+                env = {
+                    **os.environ,
+                    "DJANGO_SETTINGS_MODULE": "config.settings",
+                    "CACHE_BACKEND": "file",
+                    "CACHE_LOCATION": location,
+                }
+                child = subprocess.run(
+                    [sys.executable, "-c", CHILD_PROCESS],
+                    cwd=settings.BASE_DIR,
+                    env=env,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                # Each process sees what the other one wrote
+                self.assertEqual(child.stdout.strip().splitlines()[-1], "True")
+                self.assertTrue(get_presence_cache().get(typing_key(7, 8)))
+
+
+class ChatTestCase(TestCase):
+    """A match between Tal and ``PARTNER`` (a mock user by default), with Tal logged in."""
+
+    PARTNER = ("mock_uri", "Uri")
+    MATCHED = True
+
+    def setUp(self) -> None:
+        cache.clear()
+        username, display_name = self.PARTNER
+        self.user = User.objects.create_user(username="tal", password="testpass123")
+        self.other = User.objects.create_user(username=username, password="testpass123")
+        Profile.objects.create(user=self.user, display_name="Tal")
+        Profile.objects.create(user=self.other, display_name=display_name)
+        if self.MATCHED:
+            match = Match.objects.create(user1=self.user, user2=self.other)
+            self.conversation = Conversation.objects.create(match=match)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class MockReplyJobTests(ChatTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        Profile.objects.filter(user=self.other).update(response_pace="slow")
+        self.url = f"/api/conversations/{self.conversation.id}/messages/"
+
+    def test_reply_is_generated_in_the_background(self) -> None:
+        with patch("matching.ai_service.generate_ai_response") as generate:
+            response = self.client.post(self.url, {"content": "hey"})
+            self.assertEqual(response.status_code, 201)
+            generate.assert_not_called()
+        job = BackgroundJob.objects.get()
+        self.assertEqual(job.payload["message_id"], response.json()["id"])
+
+        with patch("matching.ai_service.generate_ai_response", return_value="hi back"):
+            self.assertEqual(run_pending(), 1)
+        self.assertEqual(self.conversation.messages.latest("id").content, "hi back")
+        job.refresh_from_db()
+        self.assertEqual(job.status, BackgroundJob.STATUS_DONE)
+
+    @override_settings(MOCK_REPLY_HONOR_PACE=True)
+    def test_failures_retry_and_pace_delays_delivery(self) -> None:
+        self.client.post(self.url, {"content": "hey"})
+        job = BackgroundJob.objects.get()
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertEqual(run_pending(), 0)  # Not due yet
+
+        BackgroundJob.objects.update(run_after=timezone.now())
+        with patch("matching.ai_service.generate_ai_response", side_effect=RuntimeError("down")):
+            run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (BackgroundJob.STATUS_PENDING, 1))
+        self.assertEqual(job.last_error, "down")
+
+    def test_server_processes_start_the_worker_at_boot(self) -> None:
+        config = apps.get_app_config("matching")
+        cases = [
+            (["/venv/bin/gunicorn", "config.asgi:application"], {}, True),
+            (["manage.py", "runserver"], {"RUN_MAIN": "true"}, True),
+            (["manage.py", "runserver"], {}, False),  # The autoreloader's parent
+            (["manage.py", "migrate"], {}, False),
+        ]
+        for argv, env, started in cases:
+            with patch.object(sys, "argv", argv), patch.dict(os.environ, env), patch(
+                "matching.jobs.wake_worker"
+            ) as wake, patch("matching.context_window.preload_encoding") as preload:
+                config.ready()
+            self.assertEqual((wake.called, preload.called), (started, started), argv)
+
+
+class ContextWindowTests(ChatTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        for i in range(20):
+            sender = self.user if i % 2 == 0 else self.other
+            Message.objects.create(
+                conversation=self.conversation, sender=sender, content=f"message number {i:02d}"
+            )
+
+    def test_recent_turns_fit_the_budget_and_older_turns_become_memory(self) -> None:
+        budget = 5 * (count_tokens("message number 00") + MESSAGE_OVERHEAD)
+        with patch("matching.ai_service.summarize_conversation_memory") as summarize:
+            context = build_context(self.conversation, self.user.id, budget=budget)
+        self.assertEqual(
+            [turn["content"] for turn in context.turns],
+            [f"message number {i}" for i in range(15, 20)],
+        )
+        self.assertEqual(context.turns[0]["role"], "assistant")
+        # The memory is written in the background, not on the request path
+        summarize.assert_not_called()
+        self.assertEqual(context.memory, "")
+
+        with patch(
+            "matching.ai_service.summarize_conversation_memory", return_value="They said hi."
+        ) as summarize:
+            self.assertEqual(run_pending(), 1)
+        transcript = summarize.call_args.args[0]
+        self.assertIn("Uri: message number 01", transcript)
+        self.assertNotIn("message number 15", transcript)
+        context = build_context(self.conversation, self.user.id, budget=budget)
+        self.assertEqual(context.memory, "They said hi.")
+
+        # Only the turns that left the window since are summarized next time
+        for i in range(20, 22):
+            Message.objects.create(
+                conversation=self.conversation, sender=self.user, content=f"message number {i}"
+            )
+        build_context(self.conversation, self.user.id, budget=budget)
+        with patch(
+            "matching.ai_service.summarize_conversation_memory", return_value="Still chatting."
+        ) as summarize:
+            run_pending()
+        transcript, previous = summarize.call_args.args
+        self.assertEqual(transcript.splitlines(), ["Uri: message number 15", "Tal: message number 16"])
+        self.assertEqual(previous, "They said hi.")
+        context = build_context(self.conversation, self.user.id, budget=budget)
+        self.assertEqual(context.memory, "Still chatting.")
+
+    def test_memory_job_folds_a_long_backlog_in_batches(self) -> None:
+        budget = count_tokens("message number 00") + MESSAGE_OVERHEAD
+        with patch("matching.context_window.MEMORY_INPUT_BUDGET", 3 * budget):
+            build_context(self.conversation, self.user.id, budget=budget)
+            with patch(
+                "matching.ai_service.summarize_conversation_memory",
+                side_effect=lambda transcript, previous: previous + "+",
+            ) as summarize:
+                run_pending()
+        self.assertGreater(summarize.call_count, 1)
+        covered = "".join(call.args[0] for call in summarize.call_args_list)
+        self.assertIn("message number 18", covered)
+        self.assertNotIn("message number 19", covered)
+
+    def test_short_conversations_need_no_memory(self) -> None:
+        with patch("matching.ai_service.summarize_conversation_memory") as summarize:
+            context = build_context(self.conversation, self.user.id, budget=10_000)
+        summarize.assert_not_called()
+        self.assertEqual((len(context.turns), context.memory), (20, ""))
+
+    def test_mock_reply_history_excludes_the_new_message(self) -> None:
+        from .mock_replies import deliver_mock_reply
+
+        last = self.conversation.messages.filter(sender=self.user).latest("id")
+        with patch("matching.ai_service.generate_ai_response", return_value="ok") as generate:
+            deliver_mock_reply(self.conversation.id, self.user.id, last.id)
+        history = generate.call_args.kwargs["conversation_history"]
+        self.assertEqual(generate.call_args.kwargs["user_message"], last.content)
+        self.assertNotIn(last.content, [turn["content"] for turn in history])
+
+
+class AIResultCacheTests(ChatTestCase):
+    PARTNER = ("noa", "Noa")
+
+    def setUp(self) -> None:
+        super().setUp()
+        Message.objects.create(conversation=self.conversation, sender=self.other, content="hi")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/conversations/{self.conversation.id}/suggestions/"
+
+    def test_suggestions_are_reused_until_a_new_message_arrives(self) -> None:
+        target = "matching.ai_service.generate_message_suggestions"
+        with patch(target, return_value=["hey!"]) as generate:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+            self.client.get(self.url, {"lang": "he"})
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(generate.call_count, 2)  # once per language
+
+        Message.objects.create(conversation=self.conversation, sender=self.other, content="?")
+        with patch(target, return_value=["how are you?"]) as generate:
+            response = self.client.get(self.url)
+        generate.assert_called_once()
+        self.assertEqual(response.json(), {"suggestions": ["how are you?"]})
+
+        with patch(target, return_value=["and you?"]) as generate:
+            response = self.client.get(self.url, {"refresh": "1"})
+        generate.assert_called_once()
+        self.assertEqual(response.json(), {"suggestions": ["and you?"]})
+
+    def test_failed_summaries_are_not_cached(self) -> None:
+        url = f"/api/conversations/{self.conversation.id}/summary/"
+        with patch("matching.ai_service.generate_conversation_summary", return_value=None) as generate:
+            self.client.get(url)
+            self.client.get(url)
+        self.assertEqual(generate.call_count, 2)
+
+
+class IncrementalSummaryTests(ChatTestCase):
+    PARTNER = ("noa", "Noa")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.url = f"/api/conversations/{self.conversation.id}/summary/"
+
+    def _send(self, sender: User, content: str) -> Message:
+        return Message.objects.create(conversation=self.conversation, sender=sender, content=content)
+
+    def test_only_new_messages_are_sent_with_the_previous_summary(self) -> None:
+        self._send(self.other, "I love hiking")
+        first = self._send(self.user, "me too!")
+        target = "matching.ai_service.generate_conversation_summary"
+        with patch(target, return_value="Both like hiking.") as generate:
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), {"summary": "Both like hiking."})
+        self.assertEqual(len(generate.call_args.kwargs["conversation_history"]), 2)
+        self.assertEqual(generate.call_args.kwargs["previous_summary"], "")
+        state = ConversationSummaryState.objects.get()
+        self.assertEqual(state.last_message_id, first.id)
+
+        latest = self._send(self.other, "Next weekend?")
+        with patch(target, return_value="They plan a hike.") as generate:
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), {"summary": "They plan a hike."})
+        self.assertEqual(
+            generate.call_args.kwargs["conversation_history"],
+            [{"role": "assistant", "content": "Next weekend?"}],
+        )
+        self.assertEqual(generate.call_args.kwargs["previous_summary"], "Both like hiking.")
+        state.refresh_from_db()
+        self.assertEqual(state.last_message_id, latest.id)
+
+    def test_first_summary_of_a_long_chat_folds_the_whole_history(self) -> None:
+        for i in range(30):
+            self._send(self.other, f"message {i} " + "word " * 100)
+        target = "matching.ai_service.generate_conversation_summary"
+        with patch(target, return_value="Recent talk.") as generate:
+            response = self.client.get(self.url)
+        # An interim summary of the recent window, neither stored nor cached
+        generate.assert_called_once()
+        history = generate.call_args.kwargs["conversation_history"]
+        self.assertTrue(history[-1]["content"].startswith("message 29 "))
+        self.assertLess(len(history), 30)
+        self.assertEqual(response.json(), {"summary": "Recent talk."})
+        self.assertEqual(ConversationSummaryState.objects.get().summary, "")
+
+        with patch(target, side_effect=["Early.", "Middle.", "All of it."] * 5) as generate:
+            run_pending()
+        calls = generate.call_args_list
+        self.assertTrue(calls[0].kwargs["conversation_history"][0]["content"].startswith("message 0 "))
+        self.assertEqual(calls[0].kwargs["previous_summary"], "")
+        self.assertEqual(calls[1].kwargs["previous_summary"], "Early.")
+        folded = sum(len(call.kwargs["conversation_history"]) for call in calls)
+        self.assertEqual(folded, 30)
+
+        with patch(target) as generate:
+            response = self.client.get(self.url)
+        generate.assert_not_called()
+        state = ConversationSummaryState.objects.get()
+        self.assertEqual(response.json(), {"summary": state.summary})
+        self.conversation.refresh_from_db()
+        self.assertEqual(state.last_message_id, self.conversation.last_message_id)
+
+    def test_long_backlog_is_caught_up_in_the_background_and_not_cached_partial(self) -> None:
+        first = self._send(self.other, "hi")
+        ConversationSummaryState.objects.create(
+            conversation=self.conversation,
+            user=self.user,
+            language="en",
+            summary="Said hi.",
+            last_message_id=first.id,
+            last_message_at=first.sent_at,
+        )
+        for i in range(60):
+            self._send(self.other, f"message {i} " + "word " * 100)
+        target = "matching.ai_service.generate_conversation_summary"
+        with patch(target, return_value="Partial.") as generate:
+            response = self.client.get(self.url)
+            self.client.get(self.url)
+        # One batch per request; the partial summary is served but never cached
+        self.assertEqual(generate.call_count, 2)
+        self.assertEqual(response.json(), {"summary": "Partial."})
+        self.assertEqual(BackgroundJob.objects.filter(kind="summary").count(), 1)
+
+        with patch(target, return_value="Caught up.") as generate:
+            run_pending()
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), {"summary": "Caught up."})
+        state = ConversationSummaryState.objects.get()
+        self.conversation.refresh_from_db()
+        self.assertEqual(state.last_message_id, self.conversation.last_message_id)
+        with patch(target) as generate:
+            self.client.get(self.url)
+        generate.assert_not_called()
+
+    def test_failed_update_keeps_the_stored_summary(self) -> None:
+        self._send(self.other, "hi")
+        ConversationSummaryState.objects.create(
+            conversation=self.conversation, user=self.user, language="en", summary="Said hi."
+        )
+        with patch("matching.ai_service.generate_conversation_summary", return_value=None):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json(), {"summary": "Said hi."})
+
+
+@override_settings(OPENAI_API_KEY="sk-test", OPENAI_BASE_URL="http://stub.local/v1")
+class SharedAIClientTests(TestCase):
+    def setUp(self) -> None:
+        reset_client()
+        self.addCleanup(reset_client)
+
+    def test_one_client_is_reused_with_the_configured_base_url(self) -> None:
+        client = get_client()
+        self.assertIs(get_client(), client)
+        self.assertEqual(str(client.base_url), "http://stub.local/v1/")
+        with override_settings(OPENAI_BASE_URL=""):
+            self.assertIsNot(get_client(), client)
+
+    @override_settings(AI_MAX_CONCURRENCY=1, AI_QUEUE_TIMEOUT=0.01)
+    def test_requests_beyond_the_concurrency_limit_fail_fast(self) -> None:
+        with ai_slot():
+            with self.assertRaises(AIBusyError):
+                chat_completion(model="gpt-4o-mini", messages=[])
+
+    def test_stream_budget_is_a_deadline_for_the_whole_stream(self) -> None:
+        class SlowStream:
+            """Sends a chunk every 50ms until closed."""
+
+            def __init__(self) -> None:
+                self.closed = threading.Event()
+
+            def __iter__(self) -> Iterator[MagicMock]:
+                while not self.closed.wait(0.05):
+                    chunk = MagicMock(usage=None)
+                    chunk.choices[0].delta.content = "la "
+                    yield chunk
+
+            def close(self) -> None:
+                self.closed.set()
+
+        client = get_client()
+        with patch.object(type(client.chat.completions), "create", return_value=SlowStream()):
+            received = []
+            with self.assertRaises(TimeoutError):
+                for delta in stream_chat_completion(timeout=0.3, model="gpt-4o-mini", messages=[]):
+                    received.append(delta)
+        self.assertTrue(0 < len(received) < 10)
+
+    def test_streams_work_with_servers_that_reject_stream_options(self) -> None:
+        from openai import BadRequestError
+
+        chunk = MagicMock(usage=None)
+        chunk.choices[0].delta.content = "hi"
+        rejected = BadRequestError(
+            "Unrecognized request argument: stream_options",
+            response=MagicMock(status_code=400),
+            body=None,
+        )
+        streams = [MagicMock(), MagicMock()]
+        for stream in streams:
+            stream.__iter__.return_value = iter([chunk])
+        client = get_client()
+        with patch.object(
+            type(client.chat.completions), "create", side_effect=[rejected, *streams]
+        ) as create:
+            self.assertEqual(list(stream_chat_completion(model="gpt-4o-mini", messages=[])), ["hi"])
+            self.assertEqual(list(stream_chat_completion(model="gpt-4o-mini", messages=[])), ["hi"])
+        self.assertIn("stream_options", create.call_args_list[0].kwargs)
+        self.assertNotIn("stream_options", create.call_args_list[1].kwargs)
+        self.assertNotIn("stream_options", create.call_args_list[2].kwargs)  # Remembered
+
+    @override_settings(OPENAI_API_KEY="")
+    def test_missing_key_is_reported(self) -> None:
+        with self.assertRaises(ValueError):
+            get_client()
+
+
+class ProfileSummaryCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username="noa", password="testpass123")
+        self.profile = Profile.objects.create(
+            user=self.user, display_name="Noa", bio="\u05e9\u05dc\u05d5\u05dd"
+        )
+        self.profile.interests.add(Interest.objects.create(name="Hiking"))
+
+    def _load(self) -> Profile:
+        return Profile.objects.select_related("user").get(pk=self.profile.pk)
+
+    def test_summary_is_built_once_per_profile_version(self) -> None:
+        first = ProfileSummary.from_django_profile(self._load())
+        self.assertEqual(first.interests, "Hiking")
+        profile = self._load()
+        with self.assertNumQueries(0):
+            self.assertEqual(ProfileSummary.from_django_profile(profile), first)
+
+        self.profile.interests.add(Interest.objects.create(name="Chess"))
+        self.assertEqual(
+            ProfileSummary.from_django_profile(self._load()).interests, "Chess, Hiking"
+        )
+
+    def test_preferred_language_is_read_live(self) -> None:
+        self.user.preferred_language = ""
+        self.user.save()
+        self.assertEqual(ProfileSummary.from_django_profile(self._load()).language, "he")
+        self.user.preferred_language = "fr"
+        self.user.save()
+        self.assertEqual(ProfileSummary.from_django_profile(self._load()).language, "fr")
+
+
+class StreamingTests(ChatTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.token = Token.objects.create(user=self.user)
+        self.headers = {"Authorization": f"Token {self.token.key}"}
+        self.base = f"/api/conversations/{self.conversation.id}"
+
+    async def _events(self, url: str) -> list[tuple[str, dict[str, Any]]]:
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        body = b"".join([chunk async for chunk in response.streaming_content]).decode()
+        events = []
+        for block in body.strip().split("\n\n"):
+            name, data = block.split("\n")
+            events.append((name[len("event: "):], json.loads(data[len("data: "):])))
+        return events
+
+    async def test_suggestions_stream_tokens_then_cache_the_result(self) -> None:
+        await sync_to_async(Message.objects.create)(
+            conversation=self.conversation, sender=self.other, content="hi!"
+        )
+        with patch(
+            "matching.streaming.stream_chat_completion", return_value=iter(['["Hey', '!"]'])
+        ):
+            events = await self._events(f"{self.base}/suggestions/stream/")
+        self.assertEqual(
+            events,
+            [
+                ("token", {"text": '["Hey'}),
+                ("token", {"text": '!"]'}),
+                ("done", {"suggestions": ["Hey!"]}),
+            ],
+        )
+        with patch("matching.streaming.stream_chat_completion") as stream:
+            events = await self._events(f"{self.base}/suggestions/stream/")
+        stream.assert_not_called()
+        self.assertEqual(events, [("done", {"suggestions": ["Hey!"]})])
+
+    async def test_suggestions_stream_shares_an_identical_generation_in_flight(self) -> None:
+        await sync_to_async(Message.objects.create)(
+            conversation=self.conversation, sender=self.other, content="hi!"
+        )
+        await sync_to_async(self.conversation.refresh_from_db)()
+        key = flight_key("suggestions", self.conversation, self.user.id, "en")
+        cache.add(f"singleflight:lock:{key}", "other-worker")
+        timer = threading.Timer(
+            0.2, lambda: cache.set(f"singleflight:result:{key}", {"value": ["Yo"]})
+        )
+        timer.start()
+        with patch("matching.streaming.stream_chat_completion") as stream:
+            events = await self._events(f"{self.base}/suggestions/stream/")
+        stream.assert_not_called()
+        self.assertEqual(events, [("done", {"suggestions": ["Yo"]})])
+
+    async def test_summary_stream_persists_the_summary(self) -> None:
+        message = await sync_to_async(Message.objects.create)(
+            conversation=self.conversation, sender=self.other, content="I love jazz"
+        )
+        with patch("matching.streaming.stream_chat_completion", return_value=iter(["Uri ", "likes jazz."])):
+            events = await self._events(f"{self.base}/summary/stream/")
+        self.assertEqual(events[-1], ("done", {"summary": "Uri likes jazz."}))
+        state = await sync_to_async(ConversationSummaryState.objects.get)()
+        self.assertEqual((state.summary, state.last_message_id), ("Uri likes jazz.", message.id))
+
+    async def test_mock_reply_stream_takes_over_the_queued_job(self) -> None:
+        response = await sync_to_async(self.client.post)(
+            f"{self.base}/messages/", {"content": "hey", "stream_reply": True}
+        )
+        message_id = response.json()["id"]
+        url = f"{self.base}/messages/{message_id}/reply/stream/"
+        with patch("matching.streaming.stream_chat_completion", return_value=iter(["hi ", "back"])):
+            events = await self._events(url)
+        name, data = events[-1]
+        self.assertEqual((name, data["message"]["content"]), ("done", "hi back"))
+        job = await sync_to_async(BackgroundJob.objects.get)()
+        self.assertEqual(job.status, BackgroundJob.STATUS_DONE)
+
+        # The reply is produced once: a second stream finds no job to claim
+        response = await self.async_client.get(url, headers=self.headers)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(await sync_to_async(run_pending)(), 0)
+
+    async def test_mock_reply_job_is_released_when_the_client_disconnects(self) -> None:
+        response = await sync_to_async(self.client.post)(
+            f"{self.base}/messages/", {"content": "hey", "stream_reply": True}
+        )
+        job = await sync_to_async(claim)("mock_reply", message_id=response.json()["id"])
+        finish, fail = MagicMock(), MagicMock()
+        with patch("matching.streaming.stream_chat_completion", return_value=iter(["hi ", "back"])):
+            events = stream_completion({}, finish, fail, abandon=lambda: release_job(job))
+            self.assertEqual(await events.__anext__(), sse_event("token", {"text": "hi "}))
+            await events.aclose()
+        finish.assert_not_called()
+        fail.assert_not_called()
+        await sync_to_async(job.refresh_from_db)()
+        self.assertEqual(job.status, BackgroundJob.STATUS_PENDING)
+        self.assertLessEqual(job.run_after, timezone.now())
+
+    async def test_streams_require_the_authorization_header(self) -> None:
+        response = await self.async_client.get(f"{self.base}/summary/stream/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            f"{self.base}/summary/stream/?token={self.token.key}"
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class SingleFlightTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def test_concurrent_calls_share_one_execution(self) -> None:
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def generate() -> list[str]:
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return ["hey"]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight("k", generate)))
+            for _ in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        started.wait(5)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [["hey"]] * 3)
+
+    def test_followers_run_themselves_when_the_leader_fails(self) -> None:
+        started, release = threading.Event(), threading.Event()
+
+        def failing() -> list[str]:
+            started.set()
+            release.wait(5)
+            raise RuntimeError("down")
+
+        errors = []
+
+        def lead() -> None:
+            try:
+                single_flight("k", failing)
+            except RuntimeError as e:
+                errors.append(e)
+
+        leader = threading.Thread(target=lead)
+        leader.start()
+        started.wait(5)
+        results = []
+        follower = threading.Thread(
+            target=lambda: results.append(single_flight("k", lambda: "mine"))
+        )
+        follower.start()
+        release.set()
+        leader.join(5)
+        follower.join(5)
+        self.assertEqual((len(errors), results), (1, ["mine"]))
+
+    def test_waits_for_a_leader_in_another_worker(self) -> None:
+        cache.add("singleflight:lock:k", "other-worker")
+        timer = threading.Timer(
+            0.2, lambda: cache.set("singleflight:result:k", {"value": "theirs"})
+        )
+        timer.start()
+        generate = MagicMock(return_value="mine")
+        self.assertEqual(single_flight("k", generate), "theirs")
+        generate.assert_not_called()
+
+    def test_runs_itself_when_the_other_leader_gives_up(self) -> None:
+        cache.add("singleflight:lock:k", "other-worker")
+        generate = MagicMock(return_value="mine")
+        with patch("matching.single_flight.time.sleep", side_effect=lambda _: cache.clear()):
+            self.assertEqual(single_flight("k", generate), "mine")
+        generate.assert_called_once()
+
+
+@override_settings(
+    OPENAI_API_KEY="sk-test",
+    OPENAI_BASE_URL="http://stub.local/v1",
+    AI_BREAKER_THRESHOLD=2,
+    AI_BREAKER_COOLDOWN=30,
+)
+class CircuitBreakerTests(ChatTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        reset_client()
+        self.addCleanup(reset_client)
+        hiking = Interest.objects.create(name="Hiking")
+        self.user.profile.interests.add(hiking)
+        self.other.profile.interests.add(hiking)
+        Message.objects.create(conversation=self.conversation, sender=self.other, content="Coffee?")
+
+    def _fail(self, times: int) -> MagicMock:
+        client = get_client()
+        with patch.object(
+            type(client.chat.completions), "create", side_effect=TimeoutError("slow")
+        ) as create:
+            for _ in range(times):
+                with self.assertRaises(TimeoutError):
+                    chat_completion(model="gpt-4o-mini", messages=[], timeout=1)
+        return create
+
+    def test_breaker_opens_after_repeated_failures_and_fails_fast(self) -> None:
+        self._fail(2)
+        self.assertTrue(breaker_open())
+        with self.assertRaises(AIUnavailableError):
+            chat_completion(model="gpt-4o-mini", messages=[])
+
+        # After the cooldown one success closes it; one failure reopens it
+        cache.delete("ai:breaker:open")
+        self._fail(1)
+        self.assertTrue(breaker_open())
+
+    def test_suggestions_fall_back_to_templates_while_open(self) -> None:
+        self._fail(2)
+        url = f"/api/conversations/{self.conversation.id}/suggestions/"
+        response = self.client.get(url)
+        suggestions = response.json()["suggestions"]
+        self.assertEqual(len(suggestions), 3)
+        self.assertIn("Hiking", suggestions[1])
+        # Deterministic for the same last message, and never cached
+        self.assertEqual(self.client.get(url).json()["suggestions"], suggestions)
+        self.assertIsNone(cache.get(f"ai:suggestions:{self.conversation.id}:{self.user.id}:en"))
+
+
+@override_settings(MOCK_GREETINGS=True, GREETING_POOL_SIZE=3, GREETING_POOL_LOW_WATER=1)
+class GreetingPoolTests(ChatTestCase):
+    MATCHED = False
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.generate = patch(
+            "matching.ai_service.AIResponseGenerator.generate_greeting",
+            side_effect=lambda summary: f"Hi, I'm {summary.name}!",
+        )
+
+    def _like(self) -> Conversation:
+        response = self.client.post("/api/swipe/", {"to_user": self.other.id, "action": "like"})
+        self.assertTrue(response.json()["is_match"])
+        return Conversation.objects.get(match_id=response.json()["match"]["id"])
+
+    def test_pools_are_filled_concurrently_up_to_size(self) -> None:
+        with self.generate as generate:
+            self.assertEqual(fill_pools([self.other], concurrency=2, rate=0), 3)
+            self.assertEqual(fill_pools([self.other]), 0)
+        self.assertEqual(generate.call_count, 3)
+        self.assertEqual(self.other.greeting_pool.count(), 3)
+
+    def test_match_takes_a_pooled_greeting_without_calling_the_model(self) -> None:
+        with self.generate:
+            fill_pools([self.other])
+        with patch("matching.ai_service.chat_completion") as completion:
+            conversation = self._like()
+            completion.assert_not_called()
+        greeting = conversation.messages.get()
+        self.assertEqual((greeting.sender, greeting.content), (self.other, "Hi, I'm Uri!"))
+        self.assertEqual(self.other.greeting_pool.count(), 2)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_empty_pool_greets_from_the_refill_job_before_topping_up(self) -> None:
+        conversation = self._like()
+        self.assertFalse(conversation.messages.exists())
+        greeted_before_fill = []
+
+        def fill(users: list[User]) -> int:
+            greeted_before_fill.append(conversation.messages.exists())
+            return fill_pools(users)
+
+        with self.generate, patch("matching.greetings.fill_pools", side_effect=fill):
+            self.assertEqual(run_pending(), 1)
+        self.assertEqual(greeted_before_fill, [True])
+        self.assertEqual(conversation.messages.get().content, "Hi, I'm Uri!")
+        self.assertEqual(self.other.greeting_pool.count(), 3)
+
+    def test_get_greeting_message_prefers_the_pool(self) -> None:
+        with self.generate as generate:
+            fill_pools([self.other], size=1)
+            self.assertEqual(get_greeting_message(self.other.profile), "Hi, I'm Uri!")
+            self.assertEqual(generate.call_count, 1)
+            # An empty pool falls back to generating on the spot
+            self.assertEqual(get_greeting_message(self.other.profile), "Hi, I'm Uri!")
+            self.assertEqual(generate.call_count, 2)
+
+    @override_settings(MOCK_GREETINGS=False)
+    def test_greetings_are_opt_in(self) -> None:
+        conversation = self._like()
+        self.assertFalse(conversation.messages.exists())
+        self.assertFalse(BackgroundJob.objects.exists())
+
+
+@override_settings(AI_SPECULATIVE_SUGGESTIONS=True, SPECULATIVE_SUGGESTIONS_DAILY_BUDGET=1)
+class SpeculativeSuggestionsTests(ChatTestCase):
+    PARTNER = ("noa", "Noa")
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.url = f"/api/conversations/{self.conversation.id}/suggestions/"
+        self.target = "matching.ai_service.generate_message_suggestions"
+
+    def _receive(self, content: str) -> None:
+        Message.objects.create(conversation=self.conversation, sender=self.other, content=content)
+        BackgroundJob.objects.update(run_after=timezone.now())
+
+    def test_only_users_who_recently_used_suggestions_get_them_precomputed(self) -> None:
+        self._receive("hi")
+        self.assertFalse(BackgroundJob.objects.exists())
+
+        with patch(self.target, return_value=["hey!"]):
+            self.client.get(self.url)
+        self._receive("how are you?")
+        self._receive("still there?")
+        self.assertEqual(BackgroundJob.objects.count(), 1)  # The burst is coalesced
+        with patch(self.target, return_value=["all good!"]) as generate:
+            run_pending()
+            response = self.client.get(self.url)
+        generate.assert_called_once()
+        self.assertEqual(response.json(), {"suggestions": ["all good!"]})
+
+    def test_daily_budget_caps_precomputation(self) -> None:
+        with patch(self.target, return_value=["hey!"]):
+            self.client.get(self.url)
+        with patch(self.target, return_value=["one"]) as generate:
+            self._receive("one")
+            run_pending()
+            self._receive("two")
+            run_pending()
+        generate.assert_called_once()
+
+
+@override_settings(OPENAI_API_KEY="sk-test", OPENAI_BASE_URL="http://stub.local/v1")
+class AITelemetryTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        reset_client()
+        self.addCleanup(reset_client)
+        clear_published()
+        self.addCleanup(clear_published)
+
+    def _create(self, **kwargs: Any) -> Any:
+        client = get_client()
+        return patch.object(type(client.chat.completions), "create", **kwargs)
+
+    def test_calls_are_recorded_per_caller_with_usage_and_outcome(self) -> None:
+        response = MagicMock()
+        response.choices[0].message.content = "hey"
+        response.usage.prompt_tokens, response.usage.completion_tokens = 1000, 100
+        with self._create(return_value=response):
+            chat_completion(caller="suggestions", model="gpt-4o-mini", messages=[])
+        with self._create(side_effect=TimeoutError("slow")):
+            with self.assertRaises(TimeoutError):
+                chat_completion(caller="summary", model="gpt-4o-mini", messages=[])
+
+        success, failure = registry.samples()
+        self.assertEqual(
+            (success.caller, success.prompt_tokens, success.completion_tokens, success.outcome),
+            ("suggestions", 1000, 100, "success"),
+        )
+        self.assertAlmostEqual(success.cost_usd, (1000 * 0.15 + 100 * 0.60) / 1_000_000)
+        self.assertEqual((failure.caller, failure.outcome), ("summary", "error"))
+        self.assertEqual(len(published_samples()), 2)
+
+    @override_settings(AI_MAX_CONCURRENCY=1, AI_QUEUE_TIMEOUT=0.01)
+    def test_rejected_calls_count_as_fallbacks(self) -> None:
+        with ai_slot():
+            with self.assertRaises(AIBusyError):
+                chat_completion(caller="mock_reply", model="gpt-4o-mini", messages=[])
+        self.assertEqual(registry.samples()[0].outcome, "fallback")
+
+    def test_report_prints_percentiles_per_caller(self) -> None:
+        self.assertEqual(percentile([10, 20, 30, 40], 50), 20)
+        self.assertEqual(percentile([10, 20, 30, 40], 99), 40)
+        response = MagicMock()
+        response.choices[0].message.content = ""
+        with self._create(return_value=response):
+            chat_completion(caller="greeting", model="gpt-4o-mini", messages=[])
+        out = StringIO()
+        call_command("ai_telemetry_report", "--reset", stdout=out)
+        self.assertIn("greeting", out.getvalue())
+        self.assertIn("empty=1", out.getvalue())
+        self.assertEqual(published_samples(), [])
+
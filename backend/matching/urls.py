@@ -17,6 +17,10 @@ urlpatterns: list[URLPattern] = [
     path(
         "conversations/", views.ConversationListView.as_view(), name="conversations-list"
     ),
+    # Presence
+    path("presence/", views.PresenceView.as_view(), name="presence"),
+    # Delta sync
+    path("sync/", views.SyncView.as_view(), name="sync"),
     # Shortcuts
     path("shortcuts/", views.ShortcutListCreateView.as_view(), name="shortcuts-list"),
     path(
@@ -39,6 +43,22 @@ urlpatterns: list[URLPattern] = [
         views.ConversationSummaryView.as_view(),
         name="conversation-summary",
     ),
+    # Streamed (Server-Sent Events) variants
+    path(
+        "conversations/<int:conversation_id>/suggestions/stream/",
+        views.ConversationSuggestionsStreamView.as_view(),
+        name="conversation-suggestions-stream",
+    ),
+    path(
+        "conversations/<int:conversation_id>/summary/stream/",
+        views.ConversationSummaryStreamView.as_view(),
+        name="conversation-summary-stream",
+    ),
+    path(
+        "conversations/<int:conversation_id>/messages/<int:message_id>/reply/stream/",
+        views.MockReplyStreamView.as_view(),
+        name="mock-reply-stream",
+    ),
     path(
         "conversations/<int:conversation_id>/typing/",
         views.ConversationTypingView.as_view(),
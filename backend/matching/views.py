@@ -1,23 +1,79 @@
 from __future__ import annotations
 
 import logging
-from typing import Any, Iterable, Optional, cast
+from typing import Any, Optional, cast
 
-from django.core.cache import cache
+from asgiref.sync import sync_to_async
 from django.db.models import Q, QuerySet
+from django.http import HttpRequest, JsonResponse
+from django.http.response import HttpResponseBase
+from django.views import View
 from rest_framework import generics, permissions, status
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from profiles.fieldsets import (
+    Fieldset,
+    SparseFieldsetViewMixin,
+    parse_fieldset,
+    sub_fieldset,
+    wants,
+)
+from profiles.cards import render_profile_cards
 from profiles.models import Profile
-from profiles.serializers import ProfileCardSerializer
 from users.models import User
 
 from .algorithm import ProfileRanker
-from .ai_service import generate_conversation_summary, generate_message_suggestions
-from .models import Block, Conversation, Match, Message, ShortcutResponse, Swipe
+from .ai_results import cached_result, flight_key, get_result, store_result
+from .ai_service import (
+    ai_response_request,
+    parse_suggestions,
+    summary_request,
+    suggestions_request,
+)
+from .context_window import build_context
+from .fallbacks import fallback_suggestions
+from .greetings import greetings_enabled, send_greeting
+from .jobs import claim, enqueue, finish_job, release_job
+from .mock_replies import (
+    STREAM_CLAIM_WINDOW,
+    is_mock_user,
+    prepare_mock_reply,
+    reply_delay,
+    save_mock_reply,
+)
+from .models import (
+    BackgroundJob,
+    Block,
+    ChangeLogEntry,
+    Conversation,
+    Match,
+    Message,
+    ShortcutResponse,
+    Swipe,
+)
+from .pagination import MessageKeysetPagination
+from .presence import invalidate_conversation_partners, mark_online, presence_for
+from .realtime import (
+    get_presence_cache,
+    publish_read,
+    publish_typing,
+    set_typing,
+    typing_key,
+)
+from .single_flight import acquire, publish, release, wait_for
+from .streaming import event_stream_response, request_user, single_event, stream_completion
+from .suggestions import generate_suggestions, note_suggestions_used
+from .summaries import (
+    final_batch,
+    interim_summary,
+    save_summary,
+    schedule_catch_up,
+    update_summary,
+)
+from .sync import build_sync_payload, current_token, is_stale_token, record_changes
 from .serializers import (
     BlockSerializer,
     ConversationSerializer,
@@ -48,21 +104,24 @@ def _get_conversation_for_user(
     )
 
 
-def _build_conversation_history(
-    messages: Iterable[Message], user: User
-) -> list[dict[str, str]]:
-    history: list[dict[str, str]] = []
-    for msg in messages:
-        role = "user" if msg.sender_id == user.id else "assistant"
-        content = msg.content or ""
-        if msg.message_type == "voice":
-            content = "[Voice message]"
-        history.append({"role": role, "content": content})
-    return history
-
-
-def _get_request_language(request: Request) -> str:
-    language = request.query_params.get("lang")
+def _match_related_lookups(
+    fieldset: Fieldset, prefix: str = ""
+) -> tuple[list[str], list[str]]:
+    """Return the (select_related, prefetch_related) lookups MatchSerializer needs."""
+    select: list[str] = []
+    prefetch: list[str] = []
+    if wants(fieldset, "other_user") or wants(fieldset, "other_profile"):
+        select += [f"{prefix}user1", f"{prefix}user2"]
+    if wants(fieldset, "other_profile"):
+        # Card relations are loaded by the card cache, for misses only
+        select += [f"{prefix}user1__profile", f"{prefix}user2__profile"]
+    if wants(fieldset, "conversation_id") and not prefix:
+        prefetch.append("conversation")
+    return select, prefetch
+
+
+def _get_request_language(request: HttpRequest) -> str:
+    language = request.GET.get("lang")
     if not language:
         accept_language = request.headers.get("Accept-Language", "")
         language = accept_language.split(",")[0].split("-")[0].strip()
@@ -78,6 +137,7 @@ class DiscoveryView(APIView):
 
     def get(self, request: Request) -> Response:
         user = cast(User, request.user)
+        fieldset = parse_fieldset(request)
 
         # Get blocked users (in either direction)
         blocked_ids_raw: set[tuple[int, int]] = set(
@@ -101,18 +161,12 @@ class DiscoveryView(APIView):
         # Exclude self, blocked, already swiped, and support user
         exclude_ids: set[int] = blocked_ids | swiped_ids | support_ids | {user.id}
 
-        # Query candidate profiles with prefetched data for algorithm
+        # Query candidate profiles. The algorithm only needs the user and
+        # looking_for; card relations are loaded later for cache misses only.
         candidates: QuerySet[Profile] = (
             Profile.objects.filter(is_visible=True)
             .exclude(user_id__in=exclude_ids)
             .select_related("user", "looking_for")
-            .prefetch_related(
-                "disability_tags",
-                "interests",
-                "photos",
-                "tag_visibilities",
-                "tag_visibilities__allowed_viewers",
-            )
         )
 
         # Ensure user's profile has looking_for loaded for filtering
@@ -136,15 +190,19 @@ class DiscoveryView(APIView):
         )
 
         # Build response with compatibility data
+        cards = render_profile_cards(
+            [profile for profile, _ in ranked_profiles], {"request": request}, fieldset
+        )
         results: list[dict[str, Any]] = []
-        for profile, breakdown in ranked_profiles:
-            data: dict[str, Any] = ProfileCardSerializer(
-                profile, context={"request": request}
-            ).data
-            data["compatibility"] = breakdown.total_score
-            data["shared_tags_count"] = breakdown.shared_tags_count
-            data["shared_interests_count"] = breakdown.shared_interests_count
-            data["compatibility_breakdown"] = breakdown.to_dict()
+        for data, (profile, breakdown) in zip(cards, ranked_profiles):
+            if wants(fieldset, "compatibility"):
+                data["compatibility"] = breakdown.total_score
+            if wants(fieldset, "shared_tags_count"):
+                data["shared_tags_count"] = breakdown.shared_tags_count
+            if wants(fieldset, "shared_interests_count"):
+                data["shared_interests_count"] = breakdown.shared_interests_count
+            if wants(fieldset, "compatibility_breakdown"):
+                data["compatibility_breakdown"] = breakdown.to_dict()
             results.append(data)
 
         return Response(results)
@@ -157,8 +215,8 @@ class SwipeView(APIView):
 
     def post(self, request: Request) -> Response:
         user = cast(User, request.user)
-        to_user_id: Optional[int] = request.data.get("to_user")
-        action: Optional[str] = request.data.get("action")
+        data = request.data if isinstance(request.data, dict) else {}
+        action: Optional[str] = data.get("action")
 
         if action not in ["pass", "like"]:
             return Response(
@@ -166,6 +224,16 @@ class SwipeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
+        # Form posts send the id as a string; the match pair key needs an int
+        raw_user_id: Any = data.get("to_user")
+        try:
+            to_user_id = int(raw_user_id)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "Invalid user"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         # Create swipe
         swipe, created = Swipe.objects.get_or_create(
             from_user=user,
@@ -183,7 +251,7 @@ class SwipeView(APIView):
         is_match: bool = False
         match: Optional[Match] = None
 
-        if action == "like" and to_user_id is not None:
+        if action == "like":
             # Get the target user
             to_user = User.objects.filter(id=to_user_id).first()
             
@@ -218,18 +286,25 @@ class SwipeView(APIView):
                     shared_interests_count = breakdown.shared_interests_count
                     compatibility_breakdown = breakdown.to_dict()
                 
-                # Create match with compatibility data
-                match = Match.objects.create(
-                    user1=user,
-                    user2_id=to_user_id,
-                    compatibility_score=compatibility_score,
-                    shared_tags_count=shared_tags_count,
-                    shared_interests_count=shared_interests_count,
-                    compatibility_breakdown=compatibility_breakdown,
+                # Create match with compatibility data. The pair key is unique,
+                # so if both users swiped at once only one match is created.
+                match, _ = Match.objects.get_or_create(
+                    **Match.pair_lookup(user.id, to_user_id),
+                    defaults={
+                        "user1": user,
+                        "user2_id": to_user_id,
+                        "compatibility_score": compatibility_score,
+                        "shared_tags_count": shared_tags_count,
+                        "shared_interests_count": shared_interests_count,
+                        "compatibility_breakdown": compatibility_breakdown,
+                    },
                 )
 
                 # Create conversation for the match
-                Conversation.objects.create(match=match)
+                conversation, conversation_created = Conversation.objects.get_or_create(match=match)
+                if conversation_created and is_mock_user(to_user) and greetings_enabled():
+                    assert to_user is not None
+                    send_greeting(conversation, to_user)
                 
                 # Refresh match from DB to get the conversation relationship
                 match.refresh_from_db()
@@ -251,32 +326,50 @@ class SwipeView(APIView):
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
-class MatchListView(generics.ListAPIView):  # type: ignore[type-arg]
-    """List user's matches."""
+class MatchListView(SparseFieldsetViewMixin, generics.ListAPIView):  # type: ignore[type-arg]
+    """List user's matches. Supports ``?fields=``/``?expand=``."""
 
     serializer_class = MatchSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self) -> QuerySet[Match]:
         user = cast(User, self.request.user)
-        return Match.objects.filter(
-            Q(user1=user) | Q(user2=user),
-            is_active=True,
-        ).select_related("user1", "user2", "user1__profile", "user2__profile").prefetch_related("conversation")
+        select, prefetch = _match_related_lookups(self.fieldset)
+        return (
+            Match.objects.filter(Q(user1=user) | Q(user2=user), is_active=True)
+            .order_by("-matched_at")
+            .select_related(*select)
+            .prefetch_related(*prefetch)
+        )
 
 
-class ConversationListView(generics.ListAPIView):  # type: ignore[type-arg]
-    """List user's conversations."""
+class ConversationListView(SparseFieldsetViewMixin, generics.ListAPIView):  # type: ignore[type-arg]
+    """List user's conversations. Supports ``?fields=``/``?expand=``."""
 
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self) -> QuerySet[Conversation]:
         user = cast(User, self.request.user)
-        return Conversation.objects.filter(
-            Q(match__user1=user) | Q(match__user2=user),
-            match__is_active=True,
-        ).select_related("match")
+        select: list[str] = ["match"]
+        prefetch: list[str] = []
+        if wants(self.fieldset, "match"):
+            match_select, prefetch = _match_related_lookups(
+                sub_fieldset(self.fieldset, "match"), prefix="match__"
+            )
+            select += match_select
+        if wants(self.fieldset, "last_message"):
+            select += ["last_message", "last_message__sender", "last_message__sender__profile"]
+
+        return (
+            Conversation.objects.filter(
+                Q(match__user1=user) | Q(match__user2=user),
+                match__is_active=True,
+            )
+            .select_related(*select)
+            .prefetch_related(*prefetch)
+            .order_by("-updated_at")
+        )
 
 
 class ShortcutListCreateView(generics.ListCreateAPIView):  # type: ignore[type-arg]
@@ -315,12 +408,11 @@ class ConversationMessagesView(generics.ListCreateAPIView):  # type: ignore[type
 
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageKeysetPagination
 
     def get_queryset(self) -> QuerySet[Message]:
         conversation_id: int = self.kwargs["conversation_id"]
-        return Message.objects.filter(conversation_id=conversation_id).select_related(
-            "sender"
-        )
+        return Message.objects.filter(conversation_id=conversation_id)
 
     def get_conversation(self) -> Optional[Conversation]:
         user = cast(User, self.request.user)
@@ -329,9 +421,18 @@ class ConversationMessagesView(generics.ListCreateAPIView):  # type: ignore[type
         return (
             Conversation.objects.filter(id=conversation_id)
             .filter(Q(match__user1=user) | Q(match__user2=user))
+            .select_related("match__user1__profile", "match__user2__profile")
             .first()
         )
 
+    def get_serializer_context(self) -> dict[str, Any]:
+        context = dict(super().get_serializer_context())
+        conversation: Optional[Conversation] = getattr(self, "conversation", None)
+        if conversation is not None:
+            context["read_watermarks"] = conversation.read_watermarks()
+            context["participant_names"] = conversation.participant_names()
+        return context
+
     def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         user = cast(User, request.user)
         conversation: Optional[Conversation] = self.get_conversation()
@@ -341,10 +442,10 @@ class ConversationMessagesView(generics.ListCreateAPIView):  # type: ignore[type
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        # Mark messages as read
-        conversation.messages.filter(is_read=False).exclude(sender=user).update(
-            is_read=True
-        )
+        # Advance the read watermark: a single-row update
+        if conversation.mark_read(user.id):
+            publish_read(conversation, user.id)
+        self.conversation = conversation
 
         return super().list(request, *args, **kwargs)
 
@@ -365,127 +466,110 @@ class ConversationMessagesView(generics.ListCreateAPIView):  # type: ignore[type
 
         message: Message = serializer.save(conversation=conversation, sender=user)
 
-        # Update conversation timestamp
-        conversation.save()
-        
-        # Check if the other user is a mock user and generate AI response
-        # Wrap in try-except to not fail the user's message if AI fails
-        try:
-            self._generate_mock_user_response(conversation, user, message.content)
-        except Exception as e:
-            logger.error(f"Failed to generate mock user response: {e}")
+        # If the other user is a mock user, generate the AI reply in the
+        # background; it arrives as a normal message. With ``stream_reply``
+        # the client streams it instead (MockReplyStreamView), and the job
+        # only runs if the stream is not opened within STREAM_CLAIM_WINDOW.
+        # Wrap in try-except to not fail the user's message if queueing fails
+        match = conversation.match
+        other_user = match.user2 if match.user1_id == user.id else match.user1
+        if is_mock_user(other_user):
+            data = request.data if isinstance(request.data, dict) else {}
+            stream_reply = str(data.get("stream_reply", "")).lower() in {"1", "true"}
+            try:
+                enqueue(
+                    "mock_reply",
+                    {
+                        "conversation_id": conversation.id,
+                        "sender_id": user.id,
+                        "message_id": message.id,
+                    },
+                    delay=STREAM_CLAIM_WINDOW if stream_reply else reply_delay(other_user),
+                )
+            except Exception as e:
+                logger.error(f"Failed to queue mock user response: {e}")
 
+        context = {"request": request, "participant_names": conversation.participant_names()}
         return Response(
-            MessageSerializer(message, context={"request": request}).data,
+            MessageSerializer(message, context=context).data,
             status=status.HTTP_201_CREATED,
         )
-    
-    def _generate_mock_user_response(
-        self, conversation: Conversation, sender: User, user_message: str
-    ) -> None:
-        """Generate an AI response if the conversation partner is a mock user."""
-        from .ai_service import generate_ai_response
-        
-        # Get the other user in the conversation
-        match = conversation.match
-        other_user: Optional[User] = None
-        
-        if match.user1 == sender:
-            other_user = match.user2
-        else:
-            other_user = match.user1
-        
-        # Check if the other user is a mock user
-        if not other_user or not other_user.username.startswith("mock_"):
-            return
-        
-        # Get the mock user's profile
-        try:
-            mock_profile = other_user.profile
-        except Exception:
-            return
-        
-        # Get the real user's profile for context
-        real_user_profile = None
-        try:
-            real_user_profile = sender.profile
-        except Exception:
-            pass  # Continue without real user context
-        
-        # Build full conversation history
-        history: list[dict[str, str]] = []
-        messages = conversation.messages.order_by("sent_at").select_related("sender")
-        
-        for msg in messages:
-            role = "assistant" if msg.sender == other_user else "user"
-            history.append({"role": role, "content": msg.content})
-        
-        # Generate AI response with full context
-        ai_response = generate_ai_response(
-            mock_profile=mock_profile,
-            user_message=user_message,
-            conversation_history=history,
-            real_user_profile=real_user_profile,
-        )
-        
-        if ai_response:
-            # Create the AI response as a message from the mock user
-            Message.objects.create(
-                conversation=conversation,
-                sender=other_user,
-                content=ai_response,
-            )
-            # Update conversation timestamp
-            conversation.save()
 
 
-class ConversationSuggestionsView(APIView):
-    """Generate AI reply suggestions for a conversation."""
+def _ai_participants(
+    user: User, conversation_id: int
+) -> tuple[Optional[Conversation], Optional[User], Optional[tuple[str, int]]]:
+    """
+    Load a conversation and the partner for AI features.
+
+    Returns ``(conversation, other_user, None)``, or an ``(error, status)``
+    pair as the last item when either side is missing.
+    """
+    conversation = _get_conversation_for_user(user, conversation_id)
+    if not conversation:
+        return None, None, ("Conversation not found", status.HTTP_404_NOT_FOUND)
+
+    if not hasattr(user, "profile") or not user.profile:
+        return None, None, ("Profile not found", status.HTTP_400_BAD_REQUEST)
+
+    other_user = (
+        conversation.match.user2
+        if conversation.match.user1_id == user.id
+        else conversation.match.user1
+    )
+    if not hasattr(other_user, "profile") or not other_user.profile:
+        return None, None, ("Match profile not found", status.HTTP_400_BAD_REQUEST)
+    return conversation, other_user, None
 
-    permission_classes = [permissions.IsAuthenticated]
 
-    def get(self, request: Request, conversation_id: int) -> Response:
-        user = cast(User, request.user)
-        conversation = _get_conversation_for_user(user, conversation_id)
-        if not conversation:
-            return Response(
-                {"error": "Conversation not found"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+def _wants_refresh(request: HttpRequest) -> bool:
+    return request.GET.get("refresh", "").lower() in {"1", "true"}
 
-        if not hasattr(user, "profile") or not user.profile:
-            return Response(
-                {"error": "Profile not found"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
 
-        other_user = (
-            conversation.match.user2
-            if conversation.match.user1_id == user.id
-            else conversation.match.user1
-        )
-        if not hasattr(other_user, "profile") or not other_user.profile:
-            return Response(
-                {"error": "Match profile not found"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+def _suggestions_request(
+    conversation: Conversation, user: User, other_user: User, language: str
+) -> dict[str, Any]:
+    context = build_context(conversation, user.id)
+    return suggestions_request(
+        conversation_history=context.turns,
+        user_profile=user.profile,
+        other_profile=other_user.profile,
+        language_code=language,
+        memory=context.memory,
+    )
 
-        # Use the last 20 messages for richer suggestions
-        messages = list(
-            Message.objects.filter(conversation=conversation)
-            .order_by("-sent_at")[:20]
-        )
-        history = _build_conversation_history(reversed(messages), user)
 
-        suggestions = generate_message_suggestions(
-            conversation_history=history,
-            user_profile=user.profile,
-            other_profile=other_user.profile,
-            language_code=_get_request_language(request),
+class ConversationSuggestionsView(APIView):
+    """
+    Generate AI reply suggestions for a conversation.
+
+    Results are cached until the next message; ``?refresh=1`` asks for new ones.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request: Request, conversation_id: int) -> Response:
+        user = cast(User, request.user)
+        conversation, other_user, error = _ai_participants(user, conversation_id)
+        if error:
+            return Response({"error": error[0]}, status=error[1])
+        assert conversation is not None and other_user is not None
+
+        language = _get_request_language(request)
+        note_suggestions_used(user.id, language)
+
+        suggestions = cached_result(
+            "suggestions",
+            conversation,
+            user.id,
+            language,
+            lambda: generate_suggestions(conversation, user, other_user, language),
+            _wants_refresh(request),
         )
 
         if not suggestions:
-            suggestions = []
+            # Model unavailable or over budget; templates are not cached
+            suggestions = fallback_suggestions(conversation, user, other_user.profile, language)
 
         return Response({"suggestions": suggestions})
 
@@ -497,46 +581,195 @@ class ConversationSummaryView(APIView):
 
     def get(self, request: Request, conversation_id: int) -> Response:
         user = cast(User, request.user)
-        conversation = _get_conversation_for_user(user, conversation_id)
-        if not conversation:
-            return Response(
-                {"error": "Conversation not found"},
-                status=status.HTTP_404_NOT_FOUND,
-            )
+        conversation, other_user, error = _ai_participants(user, conversation_id)
+        if error:
+            return Response({"error": error[0]}, status=error[1])
+        assert conversation is not None and other_user is not None
+
+        language = _get_request_language(request)
+
+        summary = cached_result(
+            "summary",
+            conversation,
+            user.id,
+            language,
+            lambda: update_summary(conversation, user, other_user.profile, language),
+        )
+        if not summary:
+            # Not current yet (failed, or catching up in the background)
+            summary = interim_summary(conversation, user, other_user.profile, language)
 
-        if not hasattr(user, "profile") or not user.profile:
-            return Response(
-                {"error": "Profile not found"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        return Response({"summary": summary})
 
-        other_user = (
-            conversation.match.user2
-            if conversation.match.user1_id == user.id
-            else conversation.match.user1
+
+class ConversationSuggestionsStreamView(View):
+    """Reply suggestions streamed as Server-Sent Events (see ``matching.streaming``)."""
+
+    async def get(self, request: HttpRequest, conversation_id: int) -> HttpResponseBase:
+        user = await sync_to_async(request_user)(request)
+        if user is None:
+            return JsonResponse({"error": "Not authenticated"}, status=401)
+        conversation, other_user, error = await sync_to_async(_ai_participants)(
+            user, conversation_id
         )
-        if not hasattr(other_user, "profile") or not other_user.profile:
-            return Response(
-                {"error": "Match profile not found"},
-                status=status.HTTP_400_BAD_REQUEST,
+        if error:
+            return JsonResponse({"error": error[0]}, status=error[1])
+        assert conversation is not None and other_user is not None
+
+        language = _get_request_language(request)
+        await sync_to_async(note_suggestions_used)(user.id, language)
+        if not _wants_refresh(request):
+            cached = await sync_to_async(get_result)("suggestions", conversation, user.id, language)
+            if cached is not None:
+                return event_stream_response(single_event("done", {"suggestions": cached}))
+
+        # Coalesce with an identical generation (streamed or not) in any worker
+        flight = flight_key("suggestions", conversation, user.id, language)
+        token = await sync_to_async(acquire, thread_sensitive=False)(flight)
+        if token is None:
+            found, shared = await sync_to_async(wait_for, thread_sensitive=False)(flight)
+            if found and shared:
+                return event_stream_response(single_event("done", {"suggestions": shared}))
+
+        def release_flight() -> None:
+            if token is not None:
+                release(flight, token)
+
+        try:
+            ai_request = await sync_to_async(_suggestions_request)(
+                conversation, user, other_user, language
             )
+        except Exception:
+            release_flight()
+            raise
+
+        def finish(text: str) -> dict[str, Any]:
+            suggestions = parse_suggestions(text)
+            if suggestions:
+                store_result("suggestions", conversation, user.id, language, suggestions)
+                if token is not None:
+                    publish(flight, token, suggestions)
+            else:
+                release_flight()
+                suggestions = fallback_suggestions(conversation, user, other_user.profile, language)
+            return {"suggestions": suggestions}
+
+        def fail(error: Exception) -> dict[str, Any]:
+            release_flight()
+            return {"suggestions": fallback_suggestions(conversation, user, other_user.profile, language)}
+
+        return event_stream_response(
+            stream_completion(ai_request, finish, fail, abandon=release_flight)
+        )
 
-        messages = list(
-            Message.objects.filter(conversation=conversation)
-            .order_by("-sent_at")[:30]
+
+class ConversationSummaryStreamView(View):
+    """The conversation summary streamed as Server-Sent Events."""
+
+    async def get(self, request: HttpRequest, conversation_id: int) -> HttpResponseBase:
+        user = await sync_to_async(request_user)(request)
+        if user is None:
+            return JsonResponse({"error": "Not authenticated"}, status=401)
+        conversation, other_user, error = await sync_to_async(_ai_participants)(
+            user, conversation_id
         )
-        history = _build_conversation_history(reversed(messages), user)
+        if error:
+            return JsonResponse({"error": error[0]}, status=error[1])
+        assert conversation is not None and other_user is not None
 
-        summary = generate_conversation_summary(
-            conversation_history=history,
-            user_profile=user.profile,
-            other_profile=other_user.profile,
-            language_code=_get_request_language(request),
+        language = _get_request_language(request)
+        cached = await sync_to_async(get_result)("summary", conversation, user.id, language)
+        if cached is not None:
+            return event_stream_response(single_event("done", {"summary": cached}))
+
+        state, turns, last = await sync_to_async(final_batch)(
+            conversation, user, other_user.profile, language
         )
-        if not summary:
-            summary = ""
+        if not turns:
+            return event_stream_response(single_event("done", {"summary": state.summary}))
 
-        return Response({"summary": summary})
+        ai_request = await sync_to_async(summary_request)(
+            turns, user.profile, other_user.profile, language, state.summary
+        )
+
+        def finish(text: str) -> dict[str, Any]:
+            summary = text.strip()
+            if summary and last is not None:
+                save_summary(state, summary, last)
+                if last.id == conversation.last_message_id:
+                    store_result("summary", conversation, user.id, language, summary)
+                else:
+                    schedule_catch_up(conversation, user, language)
+            return {"summary": summary or state.summary}
+
+        def fail(error: Exception) -> Optional[dict[str, Any]]:
+            # Fall back to the last stored summary, if there is one
+            return {"summary": state.summary} if state.summary else None
+
+        return event_stream_response(stream_completion(ai_request, finish, fail))
+
+
+def _prepare_reply_stream(
+    user: User, conversation_id: int, message_id: int
+) -> tuple[Optional[tuple[Conversation, User, dict[str, Any], BackgroundJob]], Optional[tuple[str, int]]]:
+    conversation = _get_conversation_for_user(user, conversation_id)
+    if not conversation:
+        return None, ("Conversation not found", status.HTTP_404_NOT_FOUND)
+    if not conversation.messages.filter(id=message_id, sender=user).exists():
+        return None, ("Message not found", status.HTTP_404_NOT_FOUND)
+
+    job = claim("mock_reply", conversation_id=conversation.id, message_id=message_id)
+    if job is None:
+        return None, ("Reply already delivered or in progress", status.HTTP_409_CONFLICT)
+    prepared = prepare_mock_reply(conversation.id, user.id, message_id)
+    if prepared is None:
+        finish_job(job)
+        return None, ("Nothing to reply to", status.HTTP_409_CONFLICT)
+    conversation, mock_user, inputs = prepared
+    return (conversation, mock_user, ai_response_request(**inputs), job), None
+
+
+class MockReplyStreamView(View):
+    """
+    Stream a mock user's reply to one of the caller's messages.
+
+    Send the message with ``stream_reply`` set, then open this stream; it
+    takes over the queued background reply, so the reply is only produced
+    once. The finished reply is saved as a normal ``Message``. If generation
+    fails the background job retries it as usual; if the client disconnects
+    the job is handed back to run right away.
+    """
+
+    async def get(
+        self, request: HttpRequest, conversation_id: int, message_id: int
+    ) -> HttpResponseBase:
+        user = await sync_to_async(request_user)(request)
+        if user is None:
+            return JsonResponse({"error": "Not authenticated"}, status=401)
+        prepared, error = await sync_to_async(_prepare_reply_stream)(
+            user, conversation_id, message_id
+        )
+        if error:
+            return JsonResponse({"error": error[0]}, status=error[1])
+        assert prepared is not None
+        conversation, mock_user, ai_request, job = prepared
+
+        def finish(text: str) -> dict[str, Any]:
+            if not text.strip():
+                raise ValueError("Empty reply")
+            message = save_mock_reply(conversation, mock_user, text.strip())
+            finish_job(job)
+            context = {"participant_names": conversation.participant_names()}
+            return {"message": dict(MessageSerializer(message, context=context).data)}
+
+        def fail(error: Exception) -> None:
+            finish_job(job, error)
+
+        def abandon() -> None:
+            # The client went away; the background job delivers the reply
+            release_job(job)
+
+        return event_stream_response(stream_completion(ai_request, finish, fail, abandon))
 
 
 class ConversationTypingView(APIView):
@@ -558,8 +791,7 @@ class ConversationTypingView(APIView):
             if conversation.match.user1_id == user.id
             else conversation.match.user1
         )
-        key = f"typing:{conversation_id}:{other_user.id}"
-        is_typing = bool(cache.get(key))
+        is_typing = bool(get_presence_cache().get(typing_key(conversation_id, other_user.id)))
         return Response({"is_typing": is_typing, "user_id": other_user.id})
 
     def post(self, request: Request, conversation_id: int) -> Response:
@@ -571,16 +803,35 @@ class ConversationTypingView(APIView):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        is_typing = bool(request.data.get("is_typing", True))
-        key = f"typing:{conversation_id}:{user.id}"
-
-        if is_typing:
-            cache.set(key, True, timeout=8)
-        else:
-            cache.delete(key)
+        data = request.data if isinstance(request.data, dict) else {}
+        is_typing = bool(data.get("is_typing", True))
+        set_typing(conversation_id, user.id, is_typing)
+        partner_id = (
+            conversation.match.user2_id
+            if conversation.match.user1_id == user.id
+            else conversation.match.user1_id
+        )
+        publish_typing(conversation_id, user.id, partner_id, is_typing)
 
         return Response({"ok": True, "is_typing": is_typing})
 
+
+class PresenceView(APIView):
+    """
+    Typing and online state for all of the user's active conversations.
+
+    Polling this endpoint also marks the caller as online. It reads only the
+    cache, so one call replaces a typing poll per open conversation.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request: Request) -> Response:
+        user = cast(User, request.user)
+        mark_online(user.id)
+        return Response({"conversations": presence_for(user.id)})
+
+
 class VoiceMessageUploadView(APIView):
     """Upload voice message for a conversation."""
 
@@ -671,8 +922,6 @@ class VoiceMessageUploadView(APIView):
                 transcript=transcript,
             )
 
-            conversation.save()
-
             logger.info(f"Voice message uploaded: {message.id} by user {user.id}")
 
             return Response(
@@ -723,8 +972,6 @@ class ImageMessageUploadView(APIView):
             image=image_file,
         )
 
-        conversation.save()
-
         return Response(
             MessageSerializer(message, context={"request": request}).data,
             status=status.HTTP_201_CREATED,
@@ -760,9 +1007,15 @@ class BlockUserView(APIView):
             )
 
         # Deactivate any matches
-        Match.objects.filter(
-            Q(user1=user, user2_id=blocked_id) | Q(user1_id=blocked_id, user2=user)
-        ).update(is_active=False)
+        match_id: Optional[int] = (
+            Match.objects.filter(**Match.pair_lookup(user.id, blocked_id), is_active=True)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if match_id is not None:
+            Match.objects.filter(id=match_id).update(is_active=False)
+            record_changes([user.id, blocked_id], ChangeLogEntry.KIND_UNMATCH, match_id)
+            invalidate_conversation_partners([user.id, blocked_id])
 
         return Response(
             BlockSerializer(block).data,
@@ -791,12 +1044,9 @@ class UnmatchView(APIView):
         user = cast(User, request.user)
 
         # Get the match and verify user is part of it
-        match: Optional[Match] = Match.objects.filter(
-            Q(user1=user) | Q(user2=user),
-            id=match_id,
-        ).first()
+        match: Optional[Match] = Match.objects.filter(id=match_id).first()
 
-        if not match:
+        if not match or user.id not in (match.user1_id, match.user2_id):
             return Response(
                 {"error": "Match not found"},
                 status=status.HTTP_404_NOT_FOUND,
@@ -820,7 +1070,9 @@ class UnmatchView(APIView):
         ).delete()
 
         # Delete the match entirely (or set is_active=False if you want to keep history)
+        record_changes([match.user1_id, match.user2_id], ChangeLogEntry.KIND_UNMATCH, match.id)
         match.delete()
+        invalidate_conversation_partners([match.user1_id, match.user2_id])
 
         return Response({
             "message": "Successfully disconnected",
@@ -830,6 +1082,35 @@ class UnmatchView(APIView):
         })
 
 
+class SyncView(APIView):
+    """
+    Everything that changed for the user since a sync token.
+
+    Call without ``since`` to get a starting token (after a full load);
+    afterwards pass the returned ``token`` back and repeat while
+    ``has_more`` is true. A ``reset`` response means the token is older than
+    the retained change log: reload everything and continue from its token.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request: Request) -> Response:
+        user = cast(User, request.user)
+        since_param = request.query_params.get("since")
+        if not since_param:
+            return Response({"token": str(current_token()), "reset": True})
+        try:
+            since = int(since_param)
+        except ValueError:
+            return Response(
+                {"error": "Invalid sync token"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if is_stale_token(since):
+            return Response({"token": str(current_token()), "reset": True})
+        return Response(build_sync_payload(user, since, {"request": request}))
+
+
 class ResetPassesView(APIView):
     """Reset passed profiles so they appear in discovery again."""
 
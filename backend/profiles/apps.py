@@ -6,3 +6,6 @@ from django.apps import AppConfig
 class ProfilesConfig(AppConfig):
     default_auto_field: str = "django.db.models.BigAutoField"
     name: str = "profiles"
+
+    def ready(self) -> None:
+        import profiles.signals  # noqa: F401
@@ -0,0 +1,251 @@
+"""
+Cached, viewer-aware rendering of profile cards.
+
+A card is the same for every viewer except for which disability tags it
+shows, and that only depends on the viewer's *visibility class*:
+
+- ``owner``: the profile's own user (or no viewer at all) sees every tag.
+- ``matches``: viewers matched with the profile also see matches-only tags.
+- ``public``: everyone else sees public tags only.
+
+Tags with ``specific`` visibility depend on the individual viewer. Fragments
+are cached per (profile id, profile version, taxonomy version, class) and
+carry the specific tags with their allowed viewer ids, so the per-viewer part
+is merged in at response time without touching the database.
+
+The profile version is a token in the cache that ``profiles.signals`` bumps
+whenever the profile, its user, photos, tags, interests, tag visibilities
+or LookingFor change. ``age`` changes without any write, so fragments carry
+the date of birth and the age is computed when the card is merged.
+"""
+from __future__ import annotations
+
+import uuid
+from datetime import date
+from operator import itemgetter
+from typing import Any, Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Q, prefetch_related_objects
+
+from .fieldsets import Fieldset, apply_fieldset
+from .models import Profile
+from .taxonomy import get_taxonomy_version
+
+VISIBILITY_OWNER = "owner"
+VISIBILITY_MATCHES = "matches"
+VISIBILITY_PUBLIC = "public"
+
+CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Context key holding cards rendered earlier in the same request.
+RENDERED_CARDS_CONTEXT_KEY = "_profile_cards"
+MATCHED_IDS_CONTEXT_KEY = "matched_user_ids"
+
+
+def _version_key(profile_id: int) -> str:
+    return f"profiles:profile:{profile_id}:version"
+
+
+def get_profile_versions(profile_ids: Iterable[int]) -> dict[int, str]:
+    """Return the current version token for each profile id."""
+    ids = list(profile_ids)
+    keys = {_version_key(profile_id): profile_id for profile_id in ids}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: value for key, value in found.items()}
+    missing = {
+        _version_key(profile_id): uuid.uuid4().hex
+        for profile_id in ids
+        if profile_id not in versions
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        versions.update({keys[key]: value for key, value in missing.items()})
+    return versions
+
+
+def bump_profile_version(profile_id: int) -> None:
+    """Invalidate every cached card of a profile."""
+    cache.set(_version_key(profile_id), uuid.uuid4().hex, timeout=None)
+
+
+def tag_visibility_entries(profile: Profile) -> list[tuple[int, dict[str, Any], str, list[int]]]:
+    """
+    Return ``(position, tag data, visibility, allowed viewer ids)`` per tag.
+
+    Uses ``.all()`` throughout so prefetched relations are honoured.
+    """
+    from .serializers import DisabilityTagSerializer
+
+    records = {record.tag_id: record for record in profile.tag_visibilities.all()}
+    entries: list[tuple[int, dict[str, Any], str, list[int]]] = []
+    for position, tag in enumerate(profile.disability_tags.all()):
+        record = records.get(tag.id)
+        visibility = record.visibility if record else "public"
+        allowed = (
+            [viewer.id for viewer in record.allowed_viewers.all()]
+            if record and visibility == "specific"
+            else []
+        )
+        entries.append((position, dict(DisabilityTagSerializer(tag).data), visibility, allowed))
+    return entries
+
+
+def visible_tags(
+    entries: list[tuple[int, dict[str, Any], str, list[int]]],
+    visibility_class: str,
+    viewer_id: Optional[int],
+) -> list[dict[str, Any]]:
+    """Filter visibility entries down to what a viewer may see."""
+    tags: list[dict[str, Any]] = []
+    for _, data, visibility, allowed in entries:
+        if (
+            visibility_class == VISIBILITY_OWNER
+            or visibility == "public"
+            or (visibility == "matches" and visibility_class == VISIBILITY_MATCHES)
+            or (visibility == "specific" and viewer_id in allowed)
+        ):
+            tags.append(data)
+    return tags
+
+
+def get_viewer(context: dict[str, Any]) -> Any:
+    request = context.get("request")
+    if request and hasattr(request, "user") and request.user.is_authenticated:
+        return request.user
+    return None
+
+
+def get_matched_user_ids(context: dict[str, Any], viewer: Any) -> set[int]:
+    """Ids of users the viewer has a match with, computed once per context."""
+    matched: Optional[set[int]] = context.get(MATCHED_IDS_CONTEXT_KEY)
+    if matched is None:
+        from matching.models import Match
+
+        pairs = Match.objects.filter(Q(user1=viewer) | Q(user2=viewer)).values_list(
+            "user1_id", "user2_id"
+        )
+        matched = {user_id for pair in pairs for user_id in pair} - {viewer.id}
+        context[MATCHED_IDS_CONTEXT_KEY] = matched
+    return matched
+
+
+def get_visibility_class(profile: Profile, viewer: Any, matched_ids: set[int]) -> str:
+    if viewer is None or viewer.id == profile.user_id:
+        return VISIBILITY_OWNER
+    if profile.user_id in matched_ids:
+        return VISIBILITY_MATCHES
+    return VISIBILITY_PUBLIC
+
+
+def build_card_fragment(profile: Profile, visibility_class: str) -> dict[str, Any]:
+    """Render the viewer-independent part of a card for one visibility class."""
+    from .serializers import ProfileCardSerializer
+
+    base_fieldset = {
+        name: None for name in ProfileCardSerializer.Meta.fields if name != "disability_tags"
+    }
+    del base_fieldset["age"]  # Merged per request; see merge_card_fragment
+    card = dict(ProfileCardSerializer(profile, fieldset=base_fieldset).data)
+    tags: list[list[Any]] = []
+    specific: list[list[Any]] = []
+    for position, data, visibility, allowed in tag_visibility_entries(profile):
+        if (
+            visibility_class == VISIBILITY_OWNER
+            or visibility == "public"
+            or (visibility == "matches" and visibility_class == VISIBILITY_MATCHES)
+        ):
+            tags.append([position, data])
+        elif visibility == "specific":
+            specific.append([position, data, allowed])
+    birth = profile.date_of_birth.isoformat() if profile.date_of_birth else None
+    return {"card": card, "tags": tags, "specific": specific, "date_of_birth": birth}
+
+
+def merge_card_fragment(fragment: dict[str, Any], viewer_id: Optional[int]) -> dict[str, Any]:
+    """Combine a cached fragment with the viewer's specific-visibility tags and today's age."""
+    from .serializers import ProfileCardSerializer, age_from_birth
+
+    tags = list(fragment["tags"]) + [
+        [position, data]
+        for position, data, allowed in fragment["specific"]
+        if viewer_id in allowed
+    ]
+    tags.sort(key=itemgetter(0))
+    card = fragment["card"]
+    merged: dict[str, Any] = {}
+    for name in ProfileCardSerializer.Meta.fields:
+        if name == "disability_tags":
+            merged[name] = [data for _, data in tags]
+        elif name == "age":
+            birth = fragment["date_of_birth"]
+            merged[name] = age_from_birth(date.fromisoformat(birth) if birth else None)
+        elif name in card:
+            merged[name] = card[name]
+    return merged
+
+
+def _fragment_key(profile_id: int, version: str, taxonomy_version: str, visibility_class: str) -> str:
+    # v2: fragments carry the date of birth instead of the age
+    return f"profiles:card:v2:{profile_id}:{version}:{taxonomy_version}:{visibility_class}"
+
+
+def render_profile_cards(
+    profiles: Iterable[Profile],
+    context: dict[str, Any],
+    fieldset: Fieldset = None,
+) -> list[dict[str, Any]]:
+    """
+    Render cards for ``profiles`` as seen by the request's viewer.
+
+    Cached fragments are fetched in one ``get_many``; only the misses are
+    prefetched and serialized. Rendered cards are also kept in ``context``
+    so nested serializers in the same request can reuse them.
+    """
+    from .serializers import ProfileCardSerializer
+
+    profiles = list(profiles)
+    viewer = get_viewer(context)
+    viewer_id: Optional[int] = viewer.id if viewer else None
+    rendered: dict[int, dict[str, Any]] = context.setdefault(RENDERED_CARDS_CONTEXT_KEY, {})
+
+    pending = [profile for profile in profiles if profile.id not in rendered]
+    if pending:
+        matched_ids = get_matched_user_ids(context, viewer) if viewer else set()
+        versions = get_profile_versions(profile.id for profile in pending)
+        taxonomy_version = get_taxonomy_version()
+        keys = {
+            profile.id: _fragment_key(
+                profile.id,
+                versions[profile.id],
+                taxonomy_version,
+                get_visibility_class(profile, viewer, matched_ids),
+            )
+            for profile in pending
+        }
+        fragments = cache.get_many(list(keys.values()))
+
+        misses = [profile for profile in pending if keys[profile.id] not in fragments]
+        if misses:
+            select, prefetch = ProfileCardSerializer.related_lookups(None)
+            prefetch_related_objects(misses, *select, *prefetch)
+            new_fragments = {
+                keys[profile.id]: build_card_fragment(
+                    profile, get_visibility_class(profile, viewer, matched_ids)
+                )
+                for profile in misses
+            }
+            cache.set_many(new_fragments, timeout=CARD_CACHE_TIMEOUT)
+            fragments.update(new_fragments)
+
+        for profile in pending:
+            rendered[profile.id] = merge_card_fragment(fragments[keys[profile.id]], viewer_id)
+
+    return [apply_fieldset(rendered[profile.id], fieldset) for profile in profiles]
+
+
+def render_profile_card(
+    profile: Profile, context: dict[str, Any], fieldset: Fieldset = None
+) -> dict[str, Any]:
+    """Render a single card; see ``render_profile_cards``."""
+    return render_profile_cards([profile], context, fieldset)[0]
@@ -0,0 +1,127 @@
+"""
+Sparse fieldsets for API responses.
+
+Clients can ask for a subset of a payload with ``?fields=``, a comma
+separated list of field names. Dotted paths select inside nested objects,
+e.g. ``?fields=id,other_profile.display_name,other_profile.primary_photo``.
+``?expand=`` takes the same syntax and adds whole fields on top of
+``fields``, so ``?fields=id&expand=other_profile`` renders the full card.
+
+A fieldset is parsed into a tree: ``None`` means "every field", and a dict
+maps each selected field name to its own sub-fieldset. Views use the same
+tree to skip prefetches for fields that will not be rendered.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional, cast
+
+from rest_framework import serializers
+from rest_framework.request import Request
+
+Fieldset = Optional[dict[str, Any]]
+
+
+def _add_path(tree: dict[str, Any], parts: list[str]) -> None:
+    head, rest = parts[0], parts[1:]
+    if not rest:
+        tree[head] = None
+        return
+    if head in tree and tree[head] is None:
+        return  # The whole field was already requested
+    _add_path(tree.setdefault(head, {}), rest)
+
+
+def parse_fieldset(request: Optional[Request]) -> Fieldset:
+    """Build the fieldset tree from ``fields``/``expand``, or None for all fields."""
+    if request is None:
+        return None
+    raw_fields = request.query_params.get("fields", "")
+    if not raw_fields.strip():
+        return None
+
+    raw = f"{raw_fields},{request.query_params.get('expand', '')}"
+    tree: dict[str, Any] = {}
+    for item in raw.split(","):
+        parts = [part.strip() for part in item.split(".")]
+        if all(parts):
+            _add_path(tree, parts)
+    return tree
+
+
+def wants(fieldset: Fieldset, name: str) -> bool:
+    """Return True if ``name`` will be rendered under ``fieldset``."""
+    return fieldset is None or name in fieldset
+
+
+def sub_fieldset(fieldset: Fieldset, name: str) -> Fieldset:
+    """Return the fieldset for a nested field (None when it is rendered whole)."""
+    if fieldset is None:
+        return None
+    sub: Fieldset = fieldset.get(name)
+    return sub
+
+
+def apply_fieldset(data: Any, fieldset: Fieldset) -> Any:
+    """Trim already-rendered data (dicts and lists of dicts) to a fieldset."""
+    if fieldset is None:
+        return data
+    if isinstance(data, list):
+        return [apply_fieldset(item, fieldset) for item in data]
+    if not isinstance(data, dict):
+        return data
+    return {
+        name: apply_fieldset(value, fieldset[name])
+        for name, value in data.items()
+        if name in fieldset
+    }
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that renders only the fields selected by a fieldset.
+
+    Only the output side is trimmed: write-only and writable fields are still
+    validated normally, so the same serializer can back PATCH requests.
+    Nested serializers receive their sub-fieldset; SerializerMethodFields that
+    build nested payloads should pass ``self.sub_fieldset(name)`` along.
+    """
+
+    def __init__(self, *args: Any, fieldset: Fieldset = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.fieldset = fieldset
+
+    def sub_fieldset(self, name: str) -> Fieldset:
+        return sub_fieldset(self.fieldset, name)
+
+    @property
+    def _readable_fields(self) -> list[serializers.Field[Any, Any, Any, Any]]:
+        fields = cast(
+            "Iterable[serializers.Field[Any, Any, Any, Any]]",
+            super()._readable_fields,  # type: ignore[misc]
+        )
+        if self.fieldset is None:
+            return list(fields)
+        selected: list[serializers.Field[Any, Any, Any, Any]] = []
+        for field in fields:
+            if field.field_name not in self.fieldset:
+                continue
+            target = field.child if isinstance(field, serializers.ListSerializer) else field
+            if isinstance(target, SparseFieldsetMixin):
+                target.fieldset = self.sub_fieldset(field.field_name)
+            selected.append(field)
+        return selected
+
+
+class SparseFieldsetViewMixin:
+    """Generic-view mixin that passes the request's fieldset to its serializer."""
+
+    @property
+    def fieldset(self) -> Fieldset:
+        if not hasattr(self, "_fieldset"):
+            request = cast(Optional[Request], getattr(self, "request", None))
+            self._fieldset = parse_fieldset(request)
+        return self._fieldset
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> Any:
+        kwargs.setdefault("fieldset", self.fieldset)
+        return super().get_serializer(*args, **kwargs)  # type: ignore[misc]
@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Any, Optional
+from typing import Any, Optional, cast
 
 from rest_framework import serializers
 
 from users.models import User
 
+from .fieldsets import Fieldset, SparseFieldsetMixin, wants
 from .models import (
     DisabilityTag,
     Interest,
@@ -15,9 +16,34 @@ from .models import (
     ProfileDisabilityTagVisibility,
     ProfilePhoto,
 )
+from .taxonomy import get_taxonomy
 
 
-class DisabilityTagSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class TaxonomyRelatedField(serializers.PrimaryKeyRelatedField):  # type: ignore[type-arg]
+    """
+    Primary key field for DisabilityTag/Interest ids.
+
+    Resolves ids against the in-memory taxonomy snapshot instead of running
+    one query per submitted id.
+    """
+
+    def to_internal_value(self, data: Any) -> Any:
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        taxonomy = get_taxonomy()
+        model = self.get_queryset().model
+        obj = taxonomy.get_tag(pk) if model is DisabilityTag else taxonomy.get_interest(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+class DisabilityTagSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for disability tags."""
 
     class Meta:
@@ -33,7 +59,7 @@ class DisabilityTagSerializer(serializers.ModelSerializer):  # type: ignore[type
         ]
 
 
-class InterestSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class InterestSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for interests."""
 
     class Meta:
@@ -41,7 +67,7 @@ class InterestSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
         fields: list[str] = ["id", "name", "icon", "category"]
 
 
-class ProfilePhotoSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class ProfilePhotoSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for profile photos."""
 
     class Meta:
@@ -50,7 +76,7 @@ class ProfilePhotoSerializer(serializers.ModelSerializer):  # type: ignore[type-
         read_only_fields: list[str] = ["id", "uploaded_at"]
 
 
-class LookingForSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class LookingForSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for dating preferences."""
 
     class Meta:
@@ -68,7 +94,7 @@ class ProfileTagVisibilitySerializer(serializers.ModelSerializer):  # type: igno
     """Serializer for profile tag visibility settings."""
 
     tag = DisabilityTagSerializer(read_only=True)
-    tag_id = serializers.PrimaryKeyRelatedField(
+    tag_id = TaxonomyRelatedField(
         queryset=DisabilityTag.objects.all(),
         write_only=True,
         source="tag",
@@ -91,11 +117,11 @@ class ProfileTagVisibilitySerializer(serializers.ModelSerializer):  # type: igno
         ]
 
 
-class ProfileSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+class ProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """Serializer for user profiles."""
 
     disability_tags = serializers.SerializerMethodField()
-    disability_tag_ids = serializers.PrimaryKeyRelatedField(
+    disability_tag_ids = TaxonomyRelatedField(
         many=True,
         queryset=DisabilityTag.objects.all(),
         write_only=True,
@@ -106,7 +132,7 @@ class ProfileSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
     )
 
     interests = InterestSerializer(many=True, read_only=True)
-    interest_ids = serializers.PrimaryKeyRelatedField(
+    interest_ids = TaxonomyRelatedField(
         many=True,
         queryset=Interest.objects.all(),
         write_only=True,
@@ -163,14 +189,7 @@ class ProfileSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
 
     def get_age(self, obj: Profile) -> Optional[int]:
         """Calculate age from date_of_birth."""
-        if not obj.date_of_birth:
-            return None
-        today = date.today()
-        return (
-            today.year
-            - obj.date_of_birth.year
-            - ((today.month, today.day) < (obj.date_of_birth.month, obj.date_of_birth.day))
-        )
+        return age_from_birth(obj.date_of_birth)
 
     def validate_custom_interests(self, value: Any) -> list[str]:
         if not isinstance(value, list):
@@ -277,13 +296,28 @@ class ProfileSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
         return instance
 
 
-class ProfileCardSerializer(serializers.ModelSerializer):  # type: ignore[type-arg]
+def age_from_birth(date_of_birth: Optional[date]) -> Optional[int]:
+    """Age today for a date of birth (None when it is unknown)."""
+    if not date_of_birth:
+        return None
+    today = date.today()
+    return (
+        today.year
+        - date_of_birth.year
+        - ((today.month, today.day) < (date_of_birth.month, date_of_birth.day))
+    )
+
+
+class ProfileCardSerializer(SparseFieldsetMixin, serializers.ModelSerializer):  # type: ignore[type-arg]
     """
     Minimal profile serializer for discovery cards.
     Excludes sensitive/unnecessary data.
+
+    List endpoints should go through ``profiles.cards.render_profile_cards``,
+    which caches the rendered output per viewer visibility class.
     """
 
-    disability_tags = DisabilityTagSerializer(many=True, read_only=True)
+    disability_tags = serializers.SerializerMethodField()
     interests = InterestSerializer(many=True, read_only=True)
     photos = ProfilePhotoSerializer(many=True, read_only=True)
     primary_photo = serializers.SerializerMethodField()
@@ -318,48 +352,59 @@ class ProfileCardSerializer(serializers.ModelSerializer):  # type: ignore[type-a
             "is_bot",
         ]
 
-    def get_disability_tags(self, obj: Profile) -> list[dict[str, Any]]:
-        request = self.context.get("request")
-        viewer: Optional[User] = None
-        if request and hasattr(request, "user") and request.user.is_authenticated:
-            viewer = request.user
-
-        tags = list(obj.disability_tags.all())
-        if not viewer or viewer == obj.user:
-            return list(DisabilityTagSerializer(tags, many=True).data)
-
-        visibility_records = list(obj.tag_visibilities.all().prefetch_related("allowed_viewers"))
-        visibility_by_tag = {record.tag_id: record for record in visibility_records}
-        allowed_by_tag = {
-            record.tag_id: set(record.allowed_viewers.values_list("id", flat=True))
-            for record in visibility_records
-        }
+    @staticmethod
+    def related_lookups(
+        fieldset: Fieldset, prefix: str = ""
+    ) -> tuple[list[str], list[str]]:
+        """
+        Return the (select_related, prefetch_related) lookups a card needs.
+
+        Only relations that the fieldset will actually render are included.
+        ``prefix`` is the path from the queried model to the profile, e.g.
+        ``"user1__profile__"`` when querying matches.
+        """
+        select: list[str] = []
+        prefetch: list[str] = []
+        if wants(fieldset, "user_id") or wants(fieldset, "is_bot"):
+            select.append(f"{prefix}user")
+        if wants(fieldset, "looking_for"):
+            select.append(f"{prefix}looking_for")
+        if wants(fieldset, "disability_tags"):
+            prefetch += [
+                f"{prefix}disability_tags",
+                f"{prefix}tag_visibilities",
+                f"{prefix}tag_visibilities__allowed_viewers",
+            ]
+        if wants(fieldset, "interests"):
+            prefetch.append(f"{prefix}interests")
+        if wants(fieldset, "photos"):
+            prefetch.append(f"{prefix}photos")
+        return select, prefetch
 
-        try:
-            from matching.models import Match
-
-            is_match = Match.get_match_between(viewer, obj.user) is not None
-        except Exception:
-            is_match = False
-
-        visible_tags: list[DisabilityTag] = []
-        for tag in tags:
-            record = visibility_by_tag.get(tag.id)
-            if record is None or record.visibility == "public":
-                visible_tags.append(tag)
-                continue
-            if record.visibility == "matches" and is_match:
-                visible_tags.append(tag)
-                continue
-            if record.visibility == "specific":
-                if viewer.id in allowed_by_tag.get(tag.id, set()):
-                    visible_tags.append(tag)
+    def get_disability_tags(self, obj: Profile) -> list[dict[str, Any]]:
+        """Return the tags the requesting viewer is allowed to see."""
+        from .cards import (
+            get_matched_user_ids,
+            get_viewer,
+            get_visibility_class,
+            tag_visibility_entries,
+            visible_tags,
+        )
 
-        return list(DisabilityTagSerializer(visible_tags, many=True).data)
+        context = cast(dict[str, Any], self.context)  # DRF keeps it as a dict
+        viewer: Optional[User] = get_viewer(context)
+        matched_ids = get_matched_user_ids(context, viewer) if viewer else set()
+        visibility_class = get_visibility_class(obj, viewer, matched_ids)
+        return visible_tags(
+            tag_visibility_entries(obj), visibility_class, viewer.id if viewer else None
+        )
 
     def get_primary_photo(self, obj: Profile) -> Optional[dict[str, Any]]:
         """Get primary photo, or use picture_url as fallback."""
-        photo: Optional[ProfilePhoto] = obj.photos.filter(is_primary=True).first()
+        # Iterate .all() rather than filtering so prefetched photos are reused
+        photo: Optional[ProfilePhoto] = next(
+            (photo for photo in obj.photos.all() if photo.is_primary), None
+        )
         if photo:
             return dict(ProfilePhotoSerializer(photo).data)
         # Fallback to picture_url from social login
@@ -369,14 +414,7 @@ class ProfileCardSerializer(serializers.ModelSerializer):  # type: ignore[type-a
 
     def get_age(self, obj: Profile) -> Optional[int]:
         """Calculate age from date_of_birth."""
-        if not obj.date_of_birth:
-            return None
-        today = date.today()
-        return (
-            today.year
-            - obj.date_of_birth.year
-            - ((today.month, today.day) < (obj.date_of_birth.month, obj.date_of_birth.day))
-        )
+        return age_from_birth(obj.date_of_birth)
 
     def get_is_bot(self, obj: Profile) -> bool:
         """Return True if this is a mock/bot user."""
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import User
+
+from .cards import bump_profile_version
+from .models import (
+    DisabilityTag,
+    Interest,
+    LookingFor,
+    Profile,
+    ProfileDisabilityTagVisibility,
+    ProfilePhoto,
+)
+from .taxonomy import bump_taxonomy_version
+
+
+@receiver(post_save, sender=DisabilityTag)
+@receiver(post_delete, sender=DisabilityTag)
+@receiver(post_save, sender=Interest)
+@receiver(post_delete, sender=Interest)
+def invalidate_taxonomy(sender: type, **kwargs: object) -> None:
+    """Bump the taxonomy version whenever a tag or interest changes."""
+    bump_taxonomy_version()
+    # Bump again once the write is visible, so a worker that reloaded from the
+    # database mid-transaction does not keep a stale snapshot.
+    transaction.on_commit(bump_taxonomy_version)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile(sender: type, instance: Profile, **kwargs: object) -> None:
+    bump_profile_version(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_profile(
+    sender: type, instance: User, created: bool, update_fields: Any, **kwargs: object
+) -> None:
+    """Cards show ``is_bot``, which comes from the user's social provider."""
+    if created or (update_fields is not None and "social_provider" not in update_fields):
+        return  # e.g. last_login updates
+    profile_id = Profile.objects.filter(user_id=instance.pk).values_list("id", flat=True).first()
+    if profile_id is not None:
+        bump_profile_version(profile_id)
+
+
+@receiver(post_save, sender=ProfilePhoto)
+@receiver(post_delete, sender=ProfilePhoto)
+@receiver(post_save, sender=LookingFor)
+@receiver(post_delete, sender=LookingFor)
+@receiver(post_save, sender=ProfileDisabilityTagVisibility)
+@receiver(post_delete, sender=ProfileDisabilityTagVisibility)
+def invalidate_profile_relation(sender: type, instance: Any, **kwargs: object) -> None:
+    bump_profile_version(instance.profile_id)
+
+
+@receiver(m2m_changed, sender=Profile.disability_tags.through)
+@receiver(m2m_changed, sender=Profile.interests.through)
+def invalidate_profile_m2m(
+    sender: type, instance: Any, action: str, reverse: bool, pk_set: Any, **kwargs: object
+) -> None:
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        bump_profile_version(instance.pk)
+    elif action == "post_clear":
+        # Clearing from the tag/interest side does not report the profiles.
+        # Renamed or removed tags are covered by the taxonomy version instead.
+        return
+    else:
+        for profile_id in pk_set or ():
+            bump_profile_version(profile_id)
+
+
+@receiver(m2m_changed, sender=ProfileDisabilityTagVisibility.allowed_viewers.through)
+def invalidate_tag_viewers(
+    sender: type, instance: Any, action: str, reverse: bool, pk_set: Any, **kwargs: object
+) -> None:
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        bump_profile_version(instance.profile_id)
+        return
+    profile_ids = ProfileDisabilityTagVisibility.objects.filter(
+        pk__in=pk_set or ()
+    ).values_list("profile_id", flat=True)
+    for profile_id in profile_ids:
+        bump_profile_version(profile_id)
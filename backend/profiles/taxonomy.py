@@ -0,0 +1,123 @@
+"""
+Process-local cache for the DisabilityTag and Interest taxonomies.
+
+Both tables are effectively static (seeded by ``seed_data`` and edited
+occasionally in the admin), yet they are read on every tag/interest list
+call and on every profile save. Each worker keeps a snapshot of both tables
+in memory and revalidates it against a version token stored in the shared
+Django cache; saving or deleting a tag or interest bumps that token (see
+``profiles.signals``) so every worker reloads on its next access.
+"""
+from __future__ import annotations
+
+import json
+import threading
+import uuid
+from typing import Optional
+
+from django.core.cache import cache
+
+from .models import DisabilityTag, Interest
+
+TAXONOMY_VERSION_KEY = "profiles:taxonomy:version"
+
+SUPPORTED_LANGUAGES: tuple[str, ...] = ("en", "he", "es", "fr", "ar")
+
+
+class TaxonomySnapshot:
+    """An immutable in-memory copy of the tag and interest tables."""
+
+    def __init__(self, version: str) -> None:
+        self.version = version
+        tags = list(DisabilityTag.objects.all())
+        interests = list(Interest.objects.all())
+        self.tags_by_id: dict[int, DisabilityTag] = {tag.id: tag for tag in tags}
+        self.interests_by_id: dict[int, Interest] = {
+            interest.id: interest for interest in interests
+        }
+        self._active_tags: list[DisabilityTag] = [tag for tag in tags if tag.is_active]
+        self._interests: list[Interest] = interests
+        self._tag_payloads: dict[str, bytes] = {}
+        self._interest_payload: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def get_tag(self, tag_id: int) -> Optional[DisabilityTag]:
+        return self.tags_by_id.get(tag_id)
+
+    def get_interest(self, interest_id: int) -> Optional[Interest]:
+        return self.interests_by_id.get(interest_id)
+
+    def tag_list_bytes(self, language: Optional[str] = None) -> bytes:
+        """
+        Rendered JSON for the active tag list.
+
+        Without a language this matches ``DisabilityTagSerializer`` output;
+        with one, each entry also carries a localized ``name``.
+        """
+        key = language if language in SUPPORTED_LANGUAGES else ""
+        payload = self._tag_payloads.get(key)
+        if payload is None:
+            with self._lock:
+                payload = self._tag_payloads.get(key)
+                if payload is None:
+                    payload = self._render_tags(key or None)
+                    self._tag_payloads[key] = payload
+        return payload
+
+    def interest_list_bytes(self) -> bytes:
+        """Rendered JSON for the interest list."""
+        if self._interest_payload is None:
+            from .serializers import InterestSerializer
+
+            with self._lock:
+                if self._interest_payload is None:
+                    data = InterestSerializer(self._interests, many=True).data
+                    self._interest_payload = _dump(data)
+        return self._interest_payload
+
+    def _render_tags(self, language: Optional[str]) -> bytes:
+        from .serializers import DisabilityTagSerializer
+
+        data = DisabilityTagSerializer(self._active_tags, many=True).data
+        if language:
+            for item, tag in zip(data, self._active_tags):
+                item["name"] = tag.get_name(language)
+        return _dump(data)
+
+
+def _dump(data: object) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+_snapshot: Optional[TaxonomySnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_taxonomy_version() -> str:
+    """Return the current taxonomy version token."""
+    version: Optional[str] = cache.get(TAXONOMY_VERSION_KEY)
+    if version is None:
+        # First access (or the key was evicted): publish a fresh token.
+        cache.add(TAXONOMY_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(TAXONOMY_VERSION_KEY) or ""
+    return version
+
+
+def get_taxonomy() -> TaxonomySnapshot:
+    """Return the current snapshot, reloading it if the version changed."""
+    global _snapshot
+    version = get_taxonomy_version()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = TaxonomySnapshot(version)
+        return _snapshot
+
+
+def bump_taxonomy_version() -> None:
+    """Invalidate every worker's snapshot."""
+    global _snapshot
+    cache.set(TAXONOMY_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    _snapshot = None
@@ -1,11 +1,16 @@
+from datetime import date
+from unittest.mock import patch
+
 from django.test import TestCase
-from rest_framework.test import APIRequestFactory
+from rest_framework.test import APIClient, APIRequestFactory
 
 from matching.models import Match
 from users.models import User
 
-from .models import DisabilityTag, Profile, ProfileDisabilityTagVisibility
-from .serializers import ProfileCardSerializer
+from .cards import render_profile_card
+from .models import DisabilityTag, Interest, Profile, ProfileDisabilityTagVisibility
+from .serializers import ProfileCardSerializer, ProfileSerializer
+from .taxonomy import bump_taxonomy_version, get_taxonomy
 
 
 class ProfileTagVisibilityTests(TestCase):
@@ -59,3 +64,97 @@ class ProfileTagVisibilityTests(TestCase):
         request.user = self.other
         data = ProfileCardSerializer(self.profile, context={"request": request}).data
         self.assertEqual(len(data["disability_tags"]), 0)
+
+
+class TaxonomyCacheTests(TestCase):
+    def setUp(self) -> None:
+        bump_taxonomy_version()
+        self.tag = DisabilityTag.objects.create(
+            code="wheelchairUser",
+            name_en="Wheelchair user",
+            name_he="משתמש/ת בכיסא גלגלים",
+            icon="♿",
+        )
+        self.interest = Interest.objects.create(name="Photography", icon="📷")
+        self.user = User.objects.create_user(username="writer", password="testpass123")
+        self.profile = Profile.objects.create(user=self.user, display_name="Writer")
+
+    def test_tag_list_is_localized_and_refreshed_on_save(self) -> None:
+        client = APIClient()
+        response = client.get("/api/profiles/tags/", {"lang": "he"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["name"], "משתמש/ת בכיסא גלגלים")
+
+        self.tag.is_active = False
+        self.tag.save()
+        self.assertEqual(client.get("/api/profiles/tags/").json(), [])
+
+    def test_profile_ids_validated_without_queries(self) -> None:
+        get_taxonomy()
+        data = {"disability_tag_ids": [self.tag.id], "interest_ids": [self.interest.id]}
+        serializer = ProfileSerializer(self.profile, data=data, partial=True)
+        with self.assertNumQueries(0):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data["interests"], [self.interest])
+
+        serializer = ProfileSerializer(
+            self.profile, data={"interest_ids": [self.interest.id + 1000]}, partial=True
+        )
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("interest_ids", serializer.errors)
+
+
+class ProfileCardCacheTests(TestCase):
+    def setUp(self) -> None:
+        self.factory = APIRequestFactory()
+        self.viewer = User.objects.create_user(username="viewer", password="testpass123")
+        self.other = User.objects.create_user(username="other", password="testpass123")
+        owner = User.objects.create_user(username="owner", password="testpass123")
+        self.profile = Profile.objects.create(user=owner, display_name="Owner")
+        self.tag = DisabilityTag.objects.create(code="lowVision", name_en="Low vision", icon="👁️")
+        self.profile.disability_tags.add(self.tag)
+        visibility = ProfileDisabilityTagVisibility.objects.create(
+            profile=self.profile, tag=self.tag, visibility="specific"
+        )
+        visibility.allowed_viewers.set([self.viewer])
+
+    def _render(self, user: User) -> dict:
+        request = self.factory.get("/")
+        request.user = user
+        profile = Profile.objects.get(pk=self.profile.pk)
+        return render_profile_card(profile, {"request": request})
+
+    def test_cached_fragment_merges_viewer_specific_tags(self) -> None:
+        self.assertEqual(len(self._render(self.viewer)["disability_tags"]), 1)
+        request = self.factory.get("/")
+        request.user = self.other
+        profile = Profile.objects.get(pk=self.profile.pk)
+        # Fragment is shared with the first viewer; only the match lookup runs
+        with self.assertNumQueries(1):
+            card = render_profile_card(profile, {"request": request})
+        self.assertEqual(card["disability_tags"], [])
+
+    def test_profile_changes_invalidate_cached_cards(self) -> None:
+        self.assertEqual(self._render(self.other)["interests"], [])
+        self.profile.interests.add(Interest.objects.create(name="Chess"))
+        self.assertEqual(self._render(self.other)["interests"][0]["name"], "Chess")
+
+        self.profile.display_name = "Renamed"
+        self.profile.save()
+        self.assertEqual(self._render(self.other)["display_name"], "Renamed")
+
+    def test_user_fields_and_age_stay_current(self) -> None:
+        self.profile.date_of_birth = date(2000, 6, 15)
+        self.profile.save()
+        self.assertFalse(self._render(self.other)["is_bot"])
+
+        self.profile.user.social_provider = "mock"
+        self.profile.user.save()
+        self.assertTrue(self._render(self.other)["is_bot"])
+
+        # The cached fragment is reused across a birthday; the age is not
+        with patch("profiles.serializers.date") as today:
+            today.today.return_value = date(2030, 6, 14)
+            self.assertEqual(self._render(self.other)["age"], 29)
+            today.today.return_value = date(2030, 6, 15)
+            self.assertEqual(self._render(self.other)["age"], 30)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Optional, cast
 
+from django.http import HttpResponse
 from rest_framework import generics, permissions, status
 from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.request import Request
@@ -10,34 +11,47 @@ from rest_framework.views import APIView
 
 from users.models import User
 
-from .models import DisabilityTag, Interest, LookingFor, Profile, ProfilePhoto
+from .fieldsets import SparseFieldsetViewMixin
+from .models import LookingFor, Profile, ProfilePhoto
 from .serializers import (
-    DisabilityTagSerializer,
-    InterestSerializer,
     LookingForSerializer,
     ProfilePhotoSerializer,
     ProfileSerializer,
 )
+from .taxonomy import get_taxonomy
 
 
-class DisabilityTagListView(generics.ListAPIView):  # type: ignore[type-arg]
-    """List all available disability tags."""
+class DisabilityTagListView(APIView):
+    """
+    List all available disability tags.
+
+    Served from the taxonomy cache as pre-rendered JSON. Pass ``?lang=he``
+    (or another supported code) to get a localized ``name`` on each tag.
+    """
 
-    queryset = DisabilityTag.objects.filter(is_active=True)
-    serializer_class = DisabilityTagSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get(self, request: Request) -> HttpResponse:
+        payload = get_taxonomy().tag_list_bytes(request.query_params.get("lang"))
+        return HttpResponse(payload, content_type="application/json")
+
 
-class InterestListView(generics.ListAPIView):  # type: ignore[type-arg]
-    """List all available interests."""
+class InterestListView(APIView):
+    """List all available interests, served from the taxonomy cache."""
 
-    queryset = Interest.objects.all()
-    serializer_class = InterestSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get(self, request: Request) -> HttpResponse:
+        payload = get_taxonomy().interest_list_bytes()
+        return HttpResponse(payload, content_type="application/json")
+
+
+class MyProfileView(SparseFieldsetViewMixin, generics.RetrieveUpdateAPIView):  # type: ignore[type-arg]
+    """
+    Get or update the current user's profile.
 
-class MyProfileView(generics.RetrieveUpdateAPIView):  # type: ignore[type-arg]
-    """Get or update the current user's profile."""
+    Supports ``?fields=``; relations that are not rendered are never loaded.
+    """
 
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -11,6 +11,9 @@ def main():
     print("🚀 Running migrations...")
     subprocess.run([sys.executable, "manage.py", "migrate", "--noinput"], check=True)
     
+    # Create the cache table (the production cache, CACHE_BACKEND=db)
+    subprocess.run([sys.executable, "manage.py", "createcachetable"], check=True)
+    
     # Seed initial data (disability tags, interests) - idempotent
     print("🌱 Seeding initial data...")
     subprocess.run([sys.executable, "manage.py", "seed_data"], check=True)
@@ -29,10 +32,12 @@ def main():
     port = os.environ.get("PORT", "8000")
     print(f"🌐 Starting gunicorn on port {port}...")
     
-    # Start gunicorn
+    # Start gunicorn with ASGI workers; realtime events reach every worker's
+    # WebSockets through the database channel layer
     os.execvp("gunicorn", [
         "gunicorn",
-        "config.wsgi:application",
+        "config.asgi:application",
+        "-k", "uvicorn.workers.UvicornWorker",
         "--bind", f"0.0.0.0:{port}",
         "--workers", "2",
         "--log-file", "-",
@@ -7,6 +7,9 @@ echo "🚀 Starting Nomi backend..."
 echo "📦 Running database migrations..."
 python manage.py migrate --noinput
 
+# Create the cache table (the production cache, CACHE_BACKEND=db)
+python manage.py createcachetable
+
 # Seed initial data (disability tags, interests) - idempotent, uses update_or_create
 echo "🌱 Seeding initial data..."
 python manage.py seed_data
@@ -15,6 +18,14 @@ python manage.py seed_data
 echo "👥 Seeding mock users..."
 python manage.py seed_mock_users
 
+# Pre-generate mock users' greetings (tops up pools only; no-op unless MOCK_GREETINGS)
+echo "👋 Filling greeting pools..."
+python manage.py fill_greeting_pools
+
+# Drop sync change-log entries past CHANGELOG_RETENTION_DAYS
+echo "🧹 Pruning the sync change log..."
+python manage.py prune_change_log
+
 echo "👤 Ensuring admin user exists..."
 python manage.py shell -c "
 from django.contrib.auth import get_user_model
@@ -37,6 +48,8 @@ python manage.py create_support_user
 
 echo "✅ Database setup complete!"
 
-# Start gunicorn
+# Start gunicorn with ASGI workers, so WebSockets and streamed AI responses
+# don't tie up a worker. Realtime events reach sockets on every worker
+# through the database channel layer (REALTIME_CHANNEL_LAYER).
 echo "🌐 Starting gunicorn server on port ${PORT:-8000}..."
-exec gunicorn config.wsgi:application --bind "0.0.0.0:${PORT:-8000}" --workers 2 --log-file -
+exec gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker --bind "0.0.0.0:${PORT:-8000}" --workers 2 --log-file -
@@ -159,6 +159,41 @@ const apiRequest = async (endpoint, options = {}) => {
   return requestPromise
 }
 
+/**
+ * Read a Server-Sent Events stream from the API.
+ * Calls onToken(text) for each generated chunk and resolves with the
+ * payload of the final `done` event.
+ */
+const streamRequest = async (endpoint, onToken = () => {}) => {
+  const response = await fetch(`${API_URL}${endpoint}`, {
+    headers: { 'Authorization': `Token ${getToken()}` },
+  })
+  if (!response.ok) {
+    throw new Error(`Stream failed: ${response.status}`)
+  }
+
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  for (;;) {
+    const { value, done } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      const [eventLine, dataLine] = block.split('\n')
+      const event = eventLine.replace('event: ', '')
+      const data = JSON.parse(dataLine.replace('data: ', ''))
+      if (event === 'token') onToken(data.text)
+      else if (event === 'done') return data
+      else if (event === 'error') throw new Error(data.error)
+    }
+  }
+  throw new Error('Stream ended early')
+}
+
 /**
  * Profile API
  */
@@ -318,9 +353,18 @@ export const chatApi = {
   getConversations: () => apiRequest('/conversations/'),
   
   /**
-   * Get messages in a conversation
+   * Get messages in a conversation (newest page by default).
+   * Pass { before } / { after } cursors from a previous response, or
+   * { since: lastSeenMessageId } to fetch only new messages.
    */
-  getMessages: (conversationId) => apiRequest(`/conversations/${conversationId}/messages/`),
+  getMessages: (conversationId, { before, after, since } = {}) => {
+    const params = new URLSearchParams()
+    if (before) params.set('before', before)
+    if (after) params.set('after', after)
+    if (since) params.set('since', since)
+    const query = params.toString()
+    return apiRequest(`/conversations/${conversationId}/messages/${query ? `?${query}` : ''}`)
+  },
   
   /**
    * Send a message
@@ -407,7 +451,10 @@ export const chatApi = {
   getSuggestions: (conversationId, language, forceRefresh = false) => {
     const params = new URLSearchParams()
     if (language) params.set('lang', language)
-    if (forceRefresh) params.set('t', Date.now().toString())
+    if (forceRefresh) {
+      params.set('refresh', '1')
+      params.set('t', Date.now().toString())
+    }
     const query = params.toString()
     return apiRequest(`/conversations/${conversationId}/suggestions/${query ? `?${query}` : ''}`)
   },
@@ -418,6 +465,12 @@ export const chatApi = {
   getSummary: (conversationId, language) =>
     apiRequest(`/conversations/${conversationId}/summary/${language ? `?lang=${language}` : ''}`),
 
+  /**
+   * Stream the conversation summary as it is generated
+   */
+  streamSummary: (conversationId, language, onToken) =>
+    streamRequest(`/conversations/${conversationId}/summary/stream/${language ? `?lang=${language}` : ''}`, onToken),
+
   /**
    * Set typing status
    */
@@ -433,6 +486,11 @@ export const chatApi = {
   getTyping: (conversationId) =>
     apiRequest(`/conversations/${conversationId}/typing/`),
 
+  /**
+   * Get typing and online state for all conversations in one call
+   */
+  getPresence: () => apiRequest('/presence/'),
+
   /**
    * Get saved shortcuts
    */